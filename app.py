@@ -5,7 +5,6 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 
 import streamlit as st
 
-from src.state.workflow_state import WorkflowState
 from src.ui.requirement_input_ui import requirement_input
 from src.ui.handlers import handle_initial_workflow, handle_approval, handle_feedback
 from src.ui.product_owner_review_ui import product_owner_review
@@ -13,29 +12,62 @@ from src.ui.design_doc_ui import design_doc_ui
 from src.ui.handlers import handle_create_design_doc, handle_design_approval, handle_design_feedback
 from src.ui.handlers import handle_generate_code, handle_code_approval, handle_code_feedback
 from src.ui.code_generation_ui import code_generation_ui
+from src.llms.openai_helper import get_openai_service
+from src.ui.session import init_session, render_session_sidebar
 from src.utils.logger import Logger
 
 logger = Logger("app")
 
-try:
-    if "workflow_state" not in st.session_state or st.session_state.workflow_state is None:
-        st.session_state.workflow_state = WorkflowState(requirement="")
-        logger.info("Initialized workflow state.")
-    elif not isinstance(st.session_state.workflow_state, WorkflowState):
-        st.session_state.workflow_state = WorkflowState(requirement="")
 
-    state = st.session_state.workflow_state
+@st.cache_resource
+def warm_up_openai_service() -> None:
+    """Creates the shared OpenAI client once per process and opens its connection pool."""
+    try:
+        get_openai_service().warm_up()
+    except Exception:
+        logger.exception("Failed to warm up the shared OpenAI service.")
+
+
+warm_up_openai_service()
 
-    state = requirement_input(state, handle_initial_workflow)
+# Each step is a fragment: a widget interaction reruns only the step it belongs
+# to. Steps read the shared state from the session on every run, and a step
+# whose action changes what later steps show reruns the whole app
+# (see `rerun_after_action`).
+@st.fragment
+def requirement_step() -> None:
+    requirement_input(st.session_state.workflow_state, handle_initial_workflow)
 
+
+@st.fragment
+def product_owner_review_step() -> None:
+    state = st.session_state.workflow_state
     if hasattr(state, "user_stories") and state.user_stories:
-        state = product_owner_review(state, handle_approval, handle_feedback)
+        product_owner_review(state, handle_approval, handle_feedback)
     else:
-        logger.warning("Skipping Product Owner Review: no user stories found.")
-    
-    state = design_doc_ui(state, handle_create_design_doc, handle_design_approval, handle_design_feedback)
+        logger.debug("Skipping Product Owner Review: no user stories found.")
+
+
+@st.fragment
+def design_doc_step() -> None:
+    design_doc_ui(st.session_state.workflow_state, handle_create_design_doc, handle_design_approval,
+                  handle_design_feedback)
+
+
+@st.fragment
+def code_generation_step() -> None:
+    code_generation_ui(st.session_state.workflow_state, handle_generate_code, handle_code_approval,
+                       handle_code_feedback)
+
+
+try:
+    init_session()
+    render_session_sidebar()
 
-    state = code_generation_ui(state, handle_generate_code, handle_code_approval, handle_code_feedback)
+    requirement_step()
+    product_owner_review_step()
+    design_doc_step()
+    code_generation_step()
 
 except Exception as e:
     logger.exception("Unexpected error in main Streamlit app:")
@@ -0,0 +1,250 @@
+# src/batch/runner.py
+
+"""
+Headless batch runner: reads requirements from a JSONL file and runs user story,
+design doc and code generation for each of them on a bounded worker pool.
+
+Usage:
+    python -m src.batch.runner requests.jsonl results.jsonl --workers 8
+
+Each input line is a JSON object with an id ("request_id" or "id") and the
+requirement text ("requirement", or "title" plus "body"). Results are appended
+to the output file as each requirement finishes; ids already completed in the
+output file are skipped, so an interrupted run can simply be restarted.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, Optional
+
+from src.handlers.code_generation_service import (
+    CODEGEN_MODE,
+    handle_code_generation,
+    handle_code_generation_by_manifest,
+)
+from src.handlers.design_doc_service import (
+    DESIGN_DOC_MODE,
+    handle_design_doc_by_sections,
+    handle_design_doc_generation,
+)
+from src.llms.openai_helper import OpenAIService, get_openai_service
+from src.state.workflow_state import WorkflowState
+from src.utils.logger import Logger
+from src.utils.metrics import run_trace, span
+from src.utils.user_story_parser import parse_user_stories_from_llm_response
+
+logger = Logger(__name__)
+
+STAGES = ("user_stories", "design_doc", "code")
+
+
+def read_requirements(path: str) -> Iterator[dict]:
+    """
+    Streams requirement items from a JSONL file without loading it into memory.
+
+    Yields:
+        dict: {"id": str, "requirement": str}
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping malformed line {line_no} in {path}: {e}")
+                continue
+
+            item_id = str(record.get("request_id") or record.get("id") or f"line-{line_no}")
+            requirement = record.get("requirement")
+            if not requirement:
+                requirement = "\n\n".join(p for p in (record.get("title"), record.get("body")) if p)
+            yield {"id": item_id, "requirement": requirement or ""}
+
+
+def load_completed_ids(path: str) -> set[str]:
+    """Returns the ids already written with status "completed" to a results file."""
+    completed: set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A partially written last line from an interrupted run.
+            if record.get("status") == "completed":
+                completed.add(str(record.get("id")))
+    return completed
+
+
+def process_requirement(item: dict, ai_service: OpenAIService) -> dict:
+    """
+    Runs user stories -> design doc -> code for one requirement.
+
+    Returns:
+        dict: Result record with status, per-stage timings and generated artifacts.
+    """
+    timings: dict[str, float] = {}
+    result = {"id": item["id"], "status": "failed", "failed_stage": None, "timings": timings}
+    state = WorkflowState(requirement=item["requirement"])
+    stage = STAGES[0]
+
+    try:
+        if not state.requirement:
+            raise ValueError("Requirement is empty.")
+
+        with run_trace("batch", id=item["id"]):
+            started = time.perf_counter()
+            with span("stage", stage):
+                raw = ai_service.call_llm_for_user_stories(state.requirement)
+                state.user_stories = parse_user_stories_from_llm_response(raw)
+            timings[stage] = time.perf_counter() - started
+            if not state.user_stories:
+                raise ValueError("No user stories could be parsed from the response.")
+
+            stage = STAGES[1]
+            started = time.perf_counter()
+            with span("stage", stage):
+                if DESIGN_DOC_MODE == "sections":
+                    state = handle_design_doc_by_sections(state, ai_service)
+                else:
+                    state = handle_design_doc_generation(state, ai_service.call_llm_for_design_doc,
+                                                         ai_service.call_llm_for_design_doc_section)
+            timings[stage] = time.perf_counter() - started
+            state.design_doc.review_status = "Approved"
+
+            stage = STAGES[2]
+            started = time.perf_counter()
+            with span("stage", stage):
+                if CODEGEN_MODE == "manifest":
+                    state = handle_code_generation_by_manifest(state, ai_service)
+                else:
+                    state = handle_code_generation(state, ai_service.call_llm_for_code_generation,
+                                                   ai_service.call_llm_for_code_file)
+            timings[stage] = time.perf_counter() - started
+
+        result["status"] = "completed"
+
+    except Exception as e:
+        logger.exception(f"Batch item {item['id']} failed during {stage}.")
+        result["failed_stage"] = stage
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    timings["total"] = sum(timings.values())
+    result["user_stories"] = [s.model_dump() for s in state.user_stories or []]
+    result["design_doc"] = {
+        "functional_doc": state.design_doc.functional_doc,
+        "technical_doc": state.design_doc.technical_doc,
+    }
+    result["generated_code"] = state.code_generation.generated_code
+    return result
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_report(results: list[dict], skipped: int, wall_time: float) -> dict:
+    """Aggregates per-item timings ({"status", "timings"} of each result) into a throughput and latency report."""
+    completed = [r for r in results if r["status"] == "completed"]
+    report = {
+        "processed": len(results),
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "skipped": skipped,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_per_min": round(len(results) / wall_time * 60, 2) if wall_time else 0.0,
+        "latency_s": {},
+    }
+    for stage in STAGES + ("total",):
+        values = [r["timings"][stage] for r in completed if stage in r["timings"]]
+        if values:
+            report["latency_s"][stage] = {
+                "mean": round(statistics.fmean(values), 3),
+                "p50": round(_percentile(values, 50), 3),
+                "p95": round(_percentile(values, 95), 3),
+                "max": round(max(values), 3),
+            }
+    return report
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 4,
+              ai_service: Optional[OpenAIService] = None) -> dict:
+    """
+    Processes every not-yet-completed requirement in `input_path` concurrently.
+
+    At most `workers` requirements run at once and at most twice that many are
+    read ahead, so arbitrarily large input files are streamed.
+
+    Returns:
+        dict: Aggregate report (see `build_report`).
+    """
+    ai_service = ai_service or get_openai_service()
+    completed_ids = load_completed_ids(output_path)
+    if completed_ids:
+        logger.info(f"Resuming: {len(completed_ids)} requirements already completed in {output_path}.")
+
+    write_lock = threading.Lock()
+    results: list[dict] = []
+    skipped = 0
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        def record(future: Future) -> None:
+            result = future.result()
+            with write_lock:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                # Only what the report needs, so memory does not grow with the artifacts.
+                results.append({"id": result["id"], "status": result["status"], "timings": result["timings"]})
+            logger.info(
+                f"[batch] {result['id']} {result['status']} in {result['timings']['total']:.2f}s "
+                f"({len(results)} done)"
+            )
+
+        in_flight: set[Future] = set()
+        for item in read_requirements(input_path):
+            if item["id"] in completed_ids:
+                skipped += 1
+                continue
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            future = pool.submit(process_requirement, item, ai_service)
+            future.add_done_callback(record)
+            in_flight.add(future)
+
+        wait(in_flight)
+
+    report = build_report(results, skipped, time.perf_counter() - started)
+    logger.info(f"[batch] Report: {json.dumps(report)}")
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the DevPilot pipeline over a JSONL file of requirements.")
+    parser.add_argument("input", help="JSONL file with one requirement per line.")
+    parser.add_argument("output", help="JSONL file results are appended to.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of requirements processed concurrently.")
+    parser.add_argument("--report", help="Optional path to write the aggregate JSON report to.")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args.input, args.output, workers=max(1, args.workers))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
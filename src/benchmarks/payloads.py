@@ -0,0 +1,78 @@
+# src/benchmarks/payloads.py
+
+"""
+Deterministic synthetic LLM responses and workflow states used by the benchmarks.
+Payload builders take a target size in bytes and return JSON strings of at least
+that size, shaped like the responses the parsers handle in production.
+"""
+
+import json
+
+from src.state.user_story_model import UserStoryModel
+from src.state.workflow_state import WorkflowState
+
+_SENTENCE = "The system validates the input, records an audit entry and notifies the owner. "
+
+
+def _story(index: int) -> dict:
+    return {
+        "user_story": f"As a registered user #{index}, I want to export my reports so that I can share them offline.",
+        "acceptance_criteria": [
+            f"Given report {index} exists, when I click export, then a PDF is downloaded.",
+            "Exports larger than 10 MB are emailed instead of downloaded.",
+            "Failed exports show an actionable error message.",
+        ],
+    }
+
+
+def _repeat_to_size(build_item, size_bytes: int) -> list:
+    """Returns enough items from `build_item(i)` for their JSON to reach `size_bytes`."""
+    item_size = len(json.dumps(build_item(0))) + 2
+    return [build_item(i) for i in range(max(1, -(-size_bytes // item_size)))]
+
+
+def user_stories_payload(size_bytes: int) -> str:
+    return json.dumps({"user_stories": _repeat_to_size(_story, size_bytes)})
+
+
+def design_doc_payload(size_bytes: int) -> str:
+    half = max(1, size_bytes // 2 // len(_SENTENCE) + 1)
+    return json.dumps({
+        "functional_doc": "# Functional design\n" + _SENTENCE * half,
+        "technical_doc": "# Technical design\n" + _SENTENCE * half,
+    })
+
+
+def _source_file(index: int) -> str:
+    body = "".join(
+        f"def handler_{index}_{n}(request):\n"
+        f"    \"\"\"Handles request variant {n}.\"\"\"\n"
+        f"    return {{\"status\": \"ok\", \"id\": {n}}}\n\n\n"
+        for n in range(20)
+    )
+    return f"# module_{index}.py\n\nimport json\n\n\n{body}"
+
+
+def generated_code_payload(size_bytes: int) -> str:
+    sources = _repeat_to_size(_source_file, size_bytes)
+    return json.dumps({"files": {f"app/module_{i}.py": source for i, source in enumerate(sources)}})
+
+
+def fenced(payload: str) -> str:
+    """Wraps a payload in a markdown ```json fence, as chat models often do."""
+    return f"Here is the result:\n```json\n{payload}\n```\n"
+
+
+def workflow_state(revisions: int, stories_per_revision: int = 10) -> WorkflowState:
+    """A WorkflowState carrying `revisions` previous user story lists and their feedback."""
+    stories = [UserStoryModel(**_story(i)) for i in range(stories_per_revision)]
+    state = WorkflowState(
+        requirement="Build a reporting portal where users can export, schedule and share reports.",
+        user_stories=stories,
+        feedback_history=[f"Revision {i}: tighten acceptance criteria for exports." for i in range(revisions)],
+        revisions=[list(stories) for _ in range(revisions)],
+    )
+    state.design_doc.functional_doc = _SENTENCE * 50
+    state.design_doc.technical_doc = _SENTENCE * 50
+    state.code_generation.generated_code = {f"app/module_{i}.py": _source_file(i) for i in range(5)}
+    return state
@@ -0,0 +1,321 @@
+# src/benchmarks/runner.py
+
+"""
+Offline micro-benchmarks for the non-LLM overhead of the pipeline: response
+parsers, WorkflowState (de)serialization and LangGraph compile/invoke with a
+stub AI service. Nothing here touches the network.
+
+Usage:
+    python -m src.benchmarks.runner --output bench.json
+    python -m src.benchmarks.runner --compare                # against the stored baseline
+    python -m src.benchmarks.runner --update-baseline        # re-record the baseline
+    python -m src.benchmarks.runner --quick --filter parse_  # payloads up to 256 KB only
+
+A benchmark regresses when its median exceeds the baseline median by more than
+--tolerance (default 25%). Baselines are machine specific; re-record one on the
+machine that runs the comparison.
+"""
+
+import os
+import tempfile
+
+# Isolate the run from local caches, stores, logs and trace files before any
+# src module reads its configuration at import time.
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="devpilot-bench-")
+os.environ.update({
+    "DEVPILOT_LOG_LEVEL": os.getenv("DEVPILOT_BENCH_LOG_LEVEL", "ERROR"),
+    "DEVPILOT_LLM_CACHE": "0",
+    "DEVPILOT_CHECKPOINTS": "0",
+    "DEVPILOT_METRICS_FILE": "",
+    "DEVPILOT_TRACE_DIR": "",
+    "DEVPILOT_VECTORSTORE_DIR": os.path.join(_SCRATCH_DIR, "vectorstore"),
+    "DEVPILOT_DEDUP_INDEX_PATH": os.path.join(_SCRATCH_DIR, "requirement_minhash.sqlite3"),
+    "DEVPILOT_CODEGEN_MODE": "single",
+    "DEVPILOT_DESIGN_DOC_MODE": "single",
+})
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Optional
+
+from src.benchmarks import payloads
+from src.graph.config import build_run_config
+from src.graph.workflow import Workflow, _build_full_graph, _build_review_graph, get_compiled_graph
+from src.state.workflow_state import WorkflowState
+from src.utils.code_parser import parse_generated_code_response
+from src.utils.design_doc_parser import parse_design_doc_response
+from src.utils.user_story_parser import parse_user_stories_from_llm_response
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+PAYLOAD_SIZES = {"1KB": 1024, "16KB": 16 * 1024, "256KB": 256 * 1024, "1MB": 1024 * 1024, "5MB": 5 * 1024 * 1024}
+QUICK_MAX_BYTES = 256 * 1024
+REVISION_COUNTS = (10, 100, 1000)
+
+
+class StubAIService:
+    """Answers every LLM call instantly with a small canned response."""
+
+    USER_STORIES = payloads.user_stories_payload(1024)
+    DESIGN_DOC = payloads.design_doc_payload(2048)
+    CODE = payloads.generated_code_payload(2048)
+
+    def call_llm_for_user_stories(self, requirement: str) -> str:
+        return self.USER_STORIES
+
+    def revise_user_stories(self, requirement: str, feedback: str, changes: list[str] | None = None) -> str:
+        return self.USER_STORIES
+
+    def call_llm_for_design_doc(self, requirement: str, user_stories: str) -> str:
+        return self.DESIGN_DOC
+
+    def call_llm_for_design_doc_section(self, requirement: str, user_stories: str, doc: str,
+                                        scope: str = "full") -> str:
+        return self.DESIGN_DOC
+
+    def call_llm_for_code_generation(self, design_doc: str) -> str:
+        return self.CODE
+
+    def call_llm_for_code_file(self, design_doc: str, manifest: list[dict], file_entry: dict) -> str:
+        return self.CODE
+
+    def _call_openai_chat(self, messages: list[dict], context: str, use_cache: bool = True) -> str:
+        if "user stories" in context:
+            return self.USER_STORIES
+        if "design doc" in context:
+            return self.DESIGN_DOC
+        return self.CODE
+
+    async def acall_llm_for_user_stories(self, requirement: str) -> str:
+        return self.USER_STORIES
+
+    async def arevise_user_stories(self, requirement: str, feedback: str, changes: list[str] | None = None) -> str:
+        return self.USER_STORIES
+
+    async def acall_llm_for_design_doc_section(self, requirement: str, user_stories: str, doc: str,
+                                               scope: str = "full") -> str:
+        return self.DESIGN_DOC
+
+    async def acall_llm_for_code_file(self, design_doc: str, manifest: list[dict], file_entry: dict) -> str:
+        return self.CODE
+
+    async def _acall_openai_chat(self, messages: list[dict], context: str, use_cache: bool = True) -> str:
+        return self._call_openai_chat(messages, context, use_cache)
+
+
+def measure(func: Callable[[], object], min_time: float = 0.3, min_runs: int = 5, max_runs: int = 1000) -> dict:
+    """
+    Calls `func` once to warm up, then repeatedly until `min_time` seconds and
+    `min_runs` calls have elapsed.
+
+    Returns:
+        dict: Run count and min/median/mean/stdev wall times in milliseconds.
+    """
+    func()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": len(times),
+        "min_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "stdev_ms": round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+    }
+
+
+def _parser_benchmarks(quick: bool) -> dict[str, Callable[[], dict]]:
+    parsers = {
+        "user_stories": (parse_user_stories_from_llm_response, payloads.user_stories_payload),
+        "design_doc": (parse_design_doc_response, payloads.design_doc_payload),
+        "generated_code": (parse_generated_code_response, payloads.generated_code_payload),
+    }
+    benchmarks = {}
+    for name, (parse, build) in parsers.items():
+        for label, size in PAYLOAD_SIZES.items():
+            if quick and size > QUICK_MAX_BYTES:
+                continue
+            variants = {"": build(size)}
+            if label == "256KB":
+                variants["_fenced"] = payloads.fenced(variants[""])
+            for suffix, payload in variants.items():
+                benchmarks[f"parse_{name}_{label}{suffix}"] = _bench_parse(parse, payload)
+    return benchmarks
+
+
+def _bench_parse(parse: Callable, payload: str) -> Callable[[], dict]:
+    def run() -> dict:
+        result = measure(lambda: parse(payload))
+        result["bytes"] = len(payload.encode("utf-8"))
+        result["mb_per_s"] = round(result["bytes"] / 1e6 / (result["median_ms"] / 1000), 2)
+        return result
+    return run
+
+
+def _state_benchmarks(quick: bool) -> dict[str, Callable[[], dict]]:
+    benchmarks = {}
+    for revisions in REVISION_COUNTS:
+        if quick and revisions > 100:
+            continue
+        state = payloads.workflow_state(revisions)
+        as_dict = state.model_dump()
+        as_json = state.model_dump_json()
+        benchmarks[f"state_construct_{revisions}_revisions"] = lambda r=revisions: measure(
+            lambda: payloads.workflow_state(r)
+        )
+        benchmarks[f"state_validate_{revisions}_revisions"] = lambda d=as_dict: measure(
+            lambda: WorkflowState.model_validate(d)
+        )
+        benchmarks[f"state_dump_json_{revisions}_revisions"] = lambda s=state: measure(s.model_dump_json)
+        benchmarks[f"state_validate_json_{revisions}_revisions"] = lambda j=as_json: measure(
+            lambda: WorkflowState.model_validate_json(j)
+        )
+        benchmarks[f"state_deep_copy_{revisions}_revisions"] = lambda s=state: measure(
+            lambda: s.model_copy(deep=True)
+        )
+    return benchmarks
+
+
+def _graph_benchmarks(quick: bool) -> dict[str, Callable[[], dict]]:
+    stub = StubAIService()
+    config = build_run_config(stub)
+    workflow = Workflow(requirement="Build a reporting portal with scheduled exports.")
+    workflow.ai_service = stub
+
+    def fresh_state() -> WorkflowState:
+        # Pre-approved code review ends the run after one pass through all six nodes.
+        state = WorkflowState(requirement="Build a reporting portal with scheduled exports.")
+        state.code_generation.code_review_status = "Approved"
+        return state
+
+    def feedback_state() -> WorkflowState:
+        state = payloads.workflow_state(10)
+        state.feedback = "Add a story for scheduled exports."
+        return state
+
+    loop = asyncio.new_event_loop()
+
+    return {
+        "graph_compile_full": lambda: measure(_build_full_graph, min_time=0.5),
+        "graph_compile_full_async": lambda: measure(lambda: _build_full_graph(asynchronous=True), min_time=0.5),
+        "graph_compile_review": lambda: measure(_build_review_graph, min_time=0.5),
+        "graph_build_workflow_cached": lambda: measure(workflow.build_workflow),
+        "graph_invoke_full": lambda: measure(
+            lambda: get_compiled_graph("full").invoke(fresh_state(), config=config)
+        ),
+        "graph_ainvoke_full": lambda: measure(
+            lambda: loop.run_until_complete(get_compiled_graph("full_async").ainvoke(fresh_state(), config=config))
+        ),
+        "graph_invoke_review": lambda: measure(
+            lambda: get_compiled_graph("review").invoke(feedback_state(), config=config)
+        ),
+    }
+
+
+def run_benchmarks(quick: bool = False, name_filter: Optional[str] = None) -> dict:
+    """
+    Runs every benchmark whose name contains `name_filter`.
+
+    Returns:
+        dict: {"meta": {...}, "benchmarks": {name: measurement}}
+    """
+    suites = {}
+    for build in (_parser_benchmarks, _state_benchmarks, _graph_benchmarks):
+        suites.update(build(quick))
+
+    results = {}
+    for name, run in suites.items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = run()
+        print(f"{name:<45} {results[name]['median_ms']:>12.4f} ms  ({results[name]['runs']} runs)", file=sys.stderr)
+
+    return {"meta": _environment(quick), "benchmarks": results}
+
+
+def _environment(quick: bool) -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": quick,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.25, partial: bool = False) -> dict:
+    """
+    Compares median timings with a baseline. With `partial=True` (a --quick or
+    --filter run) baseline entries that were not run are not reported as missing.
+
+    Returns:
+        dict: {"regressions": [...], "improvements": [...], "missing": [...], "new": [...]}
+        where each regression/improvement is {"name", "baseline_ms", "current_ms", "change"}.
+    """
+    current, previous = results["benchmarks"], baseline.get("benchmarks", {})
+    report = {"regressions": [], "improvements": [], "missing": [], "new": []}
+    for name, measurement in current.items():
+        if name not in previous:
+            report["new"].append(name)
+            continue
+        before, after = previous[name]["median_ms"], measurement["median_ms"]
+        change = (after - before) / before if before else 0.0
+        entry = {"name": name, "baseline_ms": before, "current_ms": after, "change": round(change, 4)}
+        if change > tolerance:
+            report["regressions"].append(entry)
+        elif change < -tolerance:
+            report["improvements"].append(entry)
+    if not partial:
+        report["missing"] = sorted(set(previous) - set(current))
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline DevPilot micro-benchmarks.")
+    parser.add_argument("--output", help="Write results JSON to this path.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with or update.")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline; exit 1 on regressions.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown of the median.")
+    parser.add_argument("--quick", action="store_true", help="Skip the 1 MB/5 MB payloads and largest states.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this string.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick, name_filter=args.filter)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --update-baseline first.", file=sys.stderr)
+            return 2
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("platform") != results["meta"]["platform"]:
+            print("Warning: baseline was recorded on a different platform.", file=sys.stderr)
+        report = compare_to_baseline(results, baseline, args.tolerance, partial=bool(args.quick or args.filter))
+        print(json.dumps(report, indent=2))
+        exit_code = 1 if report["regressions"] else 0
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}.", file=sys.stderr)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
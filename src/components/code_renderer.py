@@ -1,8 +1,13 @@
 import streamlit as st
 
+from src.components.render_cache import content_hash, render_lazily
+
 def render_generated_code(code_files: dict[str, str], debug: bool = False) -> None:
     """
-    Render generated code files using collapsible blocks.
+    Render generated code files, one at a time.
+
+    Only the selected file is sent to the browser, and files larger than
+    LARGE_ARTIFACT_CHARS are previewed until expanded.
     """
     if debug:
         st.write("🧠 code_files type:", type(code_files))
@@ -12,6 +17,18 @@ def render_generated_code(code_files: dict[str, str], debug: bool = False) -> No
         st.info("No code has been generated yet.")
         return
 
-    for filename, content in code_files.items():
-        with st.expander(f"📄 {filename}", expanded=False):
-            st.code(content or "(empty)", language="python")
+    filenames = list(code_files)
+    total_lines = sum((content or "").count("\n") + 1 for content in code_files.values())
+    st.caption(f"{len(filenames)} file(s), {total_lines:,} lines")
+    filename = st.selectbox(
+        "File", filenames, key=f"code_file_{content_hash(filenames)}", format_func=lambda name: f"📄 {name}"
+    )
+    content = code_files.get(filename) or "(empty)"
+    render_lazily(content, f"code_{filename}", lambda text: st.code(text, language=_language(filename)))
+
+
+def _language(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return {"py": "python", "js": "javascript", "ts": "typescript", "md": "markdown", "json": "json",
+            "yml": "yaml", "yaml": "yaml", "toml": "toml", "html": "html", "css": "css", "sh": "bash",
+            "sql": "sql"}.get(extension, "python")
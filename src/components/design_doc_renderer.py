@@ -1,15 +1,23 @@
 import streamlit as st
 
+from src.components.render_cache import render_lazily
+
 def render_design_documents(functional_doc: str, technical_doc: str, debug: bool = False) -> None:
     """
     Render functional and technical design documents side by side or in sequence.
+
+    Documents larger than LARGE_ARTIFACT_CHARS are previewed until expanded.
     """
     if debug:
         st.write("🔍 functional_doc:", functional_doc)
         st.write("🔍 technical_doc:", technical_doc)
 
-    st.subheader("Functional Design Document")
-    st.text_area("Functional Spec", value=functional_doc or "(empty)", disabled=True, height=180)
+    st.subheader("Functional Document")
+    render_lazily(functional_doc or "", "functional_doc", lambda text: st.text_area(
+        "Functional Doc Content", value=text or "(empty)", disabled=True, height=150
+    ))
 
-    st.subheader("Technical Design Document")
-    st.text_area("Technical Spec", value=technical_doc or "(empty)", disabled=True, height=180)
+    st.subheader("Technical Document")
+    render_lazily(technical_doc or "", "technical_doc", lambda text: st.text_area(
+        "Technical Doc Content", value=text or "(empty)", disabled=True, height=150
+    ))
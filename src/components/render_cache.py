@@ -0,0 +1,43 @@
+# src/components/render_cache.py
+
+import hashlib
+import json
+import os
+from typing import Any, Callable
+
+import streamlit as st
+
+# Artifacts longer than this are shown as a preview until the user asks for all of it.
+LARGE_ARTIFACT_CHARS = int(os.getenv("DEVPILOT_UI_LARGE_ARTIFACT_CHARS", "20000"))
+PREVIEW_CHARS = int(os.getenv("DEVPILOT_UI_PREVIEW_CHARS", "4000"))
+
+
+def content_hash(value: Any) -> str:
+    """
+    Short stable digest of a rendered artifact, used as the memoization key of
+    renderers and in widget keys so they reset when the content changes.
+    """
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def render_lazily(text: str, key: str, render: Callable[[str], None]) -> None:
+    """
+    Renders `text` with `render`, or only its first PREVIEW_CHARS characters plus a
+    toggle for the rest when it is longer than LARGE_ARTIFACT_CHARS.
+
+    Args:
+        text (str): The artifact.
+        key (str): Widget key prefix, unique on the page.
+        render (callable): Emits the Streamlit element(s) for a piece of text.
+    """
+    if len(text) <= LARGE_ARTIFACT_CHARS:
+        render(text)
+        return
+
+    if st.toggle(f"Show all {len(text):,} characters", key=f"lazy_{key}_{content_hash(text)}"):
+        render(text)
+    else:
+        render(text[:PREVIEW_CHARS])
+        st.caption(f"Showing the first {PREVIEW_CHARS:,} characters.")
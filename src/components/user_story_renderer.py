@@ -4,9 +4,16 @@ import json
 
 import streamlit as st
 
-def render_user_stories(user_stories, debug=False):
+from src.components.render_cache import content_hash
+
+# Stories beyond this many are rendered only when the user asks for them.
+INITIAL_STORIES = 20
+
+def render_user_stories(user_stories, debug=False, key="user_stories"):
     """
     Render user stories and acceptance criteria from list[UserStoryModel] or JSON.
+
+    `key` prefixes widget keys, so the same stories can be shown twice on a page.
     """
 
     if debug:
@@ -30,18 +37,37 @@ def render_user_stories(user_stories, debug=False):
         if isinstance(parsed, dict):
             parsed = [parsed]
 
-        for idx, story in enumerate(parsed):
-            user_story_text = story.get("user_story", "").strip()
-            st.subheader(f"User Story {idx + 1}")
-            st.markdown(user_story_text)
+        for idx, story in enumerate(parsed[:INITIAL_STORIES]):
+            render_user_story(story, idx)
 
-            criteria = story.get("acceptance_criteria", [])
-            if criteria:
-                st.markdown("#### Acceptance Criteria")
-                for criterion in criteria:
-                    st.markdown(f"&nbsp;&nbsp;&nbsp;&rarr; {criterion.strip()}")
-            else:
-                st.markdown("_No acceptance criteria provided._")
+        hidden = len(parsed) - INITIAL_STORIES
+        if hidden > 0 and st.toggle(f"Show {hidden} more user stories", key=f"{key}_more_{content_hash(parsed)}"):
+            for idx, story in enumerate(parsed[INITIAL_STORIES:], start=INITIAL_STORIES):
+                render_user_story(story, idx)
 
     except Exception as e:
         st.error(f"❌ Failed to render user stories: {e}")
+
+
+def render_user_story(story, idx: int) -> None:
+    """
+    Render a single user story (UserStoryModel or dict) with its acceptance criteria.
+    """
+    if hasattr(story, "model_dump"):
+        story = story.model_dump()
+
+    st.subheader(f"User Story {idx + 1}")
+    st.markdown(_user_story_markdown(content_hash(story), story))
+
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _user_story_markdown(digest: str, _story: dict) -> str:
+    """Markdown body of a story, memoized by its content hash (`_story` is not hashed by Streamlit)."""
+    blocks = [_story.get("user_story", "").strip()]
+    criteria = _story.get("acceptance_criteria", [])
+    if criteria:
+        blocks.append("#### Acceptance Criteria")
+        blocks.extend(f"&nbsp;&nbsp;&nbsp;&rarr; {criterion.strip()}" for criterion in criteria)
+    else:
+        blocks.append("_No acceptance criteria provided._")
+    return "\n\n".join(blocks)
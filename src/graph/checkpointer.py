@@ -0,0 +1,546 @@
+# src/graph/checkpointer.py
+
+"""
+SQLite checkpoint saver for the LangGraph workflows.
+
+Checkpoints are stored the way LangGraph hands them over: the checkpoint itself
+(versions, versions seen, metadata) is one small row, and channel values (one
+channel per WorkflowState field) are stored only for the channels whose version
+changed. Values are content-addressed: a blob is stored once per distinct value,
+zlib-compressed when large, and shared by every checkpoint, thread and fork that
+holds the same value. A checkpoint after a step that only changed
+`user_story_status` therefore costs a few hundred bytes, not a copy of every
+artifact.
+
+Besides the BaseCheckpointSaver interface, `put_values` writes a checkpoint for
+state changed outside a graph run (UI actions), `list_threads` summarises the
+stored runs and `fork` starts a new thread from any checkpoint.
+
+Each thread keeps its newest `keep` checkpoints (DEVPILOT_CHECKPOINT_KEEP); older
+checkpoints, their pending writes and the values only they referenced are pruned
+as new ones are written. `prune` trims every thread on demand, e.g. after
+lowering the limit.
+"""
+
+from __future__ import annotations  # `list` below is also a method name.
+
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (  # type: ignore
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    empty_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.base.id import uuid6  # type: ignore
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # type: ignore
+
+from src.utils.logger import Logger
+from src.utils.metrics import registry
+
+logger = Logger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "../../.cache/checkpoints.sqlite3")
+COMPRESS_MIN_BYTES = 512
+# Newest checkpoints kept per thread (0 keeps all). Older ones are pruned once a
+# thread holds PRUNE_BATCH more than that, so pruning runs every PRUNE_BATCH writes.
+KEEP_CHECKPOINTS = int(os.getenv("DEVPILOT_CHECKPOINT_KEEP", "50"))
+PRUNE_BATCH = 10
+
+# Pydantic models that may be deserialized from stored channel values.
+STATE_MODELS = [
+    ("src.state.workflow_state", "WorkflowState"),
+    ("src.state.user_story_model", "UserStoryModel"),
+    ("src.state.design_doc_model", "DesignDocumentModel"),
+    ("src.state.generated_code_model", "CodeGenerationModel"),
+    ("src.state.revision_store", "RevisionStore"),
+    ("src.state.revision_store", "Revision"),
+    ("src.state.revision_store", "RevisionOp"),
+]
+
+_shared_checkpointer = None
+_shared_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional["SQLiteCheckpointer"]:
+    """
+    Returns the process-wide checkpointer, creating it on first use, or None
+    when checkpointing is disabled with DEVPILOT_CHECKPOINTS=0. The database
+    path is DEVPILOT_CHECKPOINT_PATH.
+    """
+    global _shared_checkpointer
+    if os.getenv("DEVPILOT_CHECKPOINTS", "1").strip().lower() in ("0", "off", "false", "no"):
+        return None
+    if _shared_checkpointer is None:
+        with _shared_checkpointer_lock:
+            if _shared_checkpointer is None:
+                _shared_checkpointer = SQLiteCheckpointer(os.getenv("DEVPILOT_CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH))
+    return _shared_checkpointer
+
+
+def thread_config(thread_id: str, checkpoint_id: Optional[str] = None, checkpoint_ns: str = "") -> RunnableConfig:
+    """Config addressing the latest checkpoint of a thread, or a specific one."""
+    configurable = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpoint saver backed by a single SQLite file.
+
+    Args:
+        path (str): Database file; created on first use.
+        keep (int): Newest checkpoints kept per thread; 0 keeps all.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, keep: int = KEEP_CHECKPOINTS):
+        super().__init__(serde=JsonPlusSerializer(allowed_msgpack_modules=STATE_MODELS))
+        self.path = os.path.abspath(path)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " thread_id TEXT NOT NULL,"
+                " checkpoint_ns TEXT NOT NULL DEFAULT '',"
+                " checkpoint_id TEXT NOT NULL,"
+                " parent_checkpoint_id TEXT,"
+                " checkpoint BLOB NOT NULL,"
+                " metadata BLOB NOT NULL,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+                "CREATE TABLE IF NOT EXISTS channel_versions ("
+                " thread_id TEXT NOT NULL,"
+                " checkpoint_ns TEXT NOT NULL DEFAULT '',"
+                " channel TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " digest TEXT,"  # NULL for a channel that was emptied.
+                " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY,"
+                " type TEXT NOT NULL,"
+                " compressed INTEGER NOT NULL,"
+                " data BLOB NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS writes ("
+                " thread_id TEXT NOT NULL,"
+                " checkpoint_ns TEXT NOT NULL DEFAULT '',"
+                " checkpoint_id TEXT NOT NULL,"
+                " task_id TEXT NOT NULL,"
+                " idx INTEGER NOT NULL,"
+                " channel TEXT NOT NULL,"
+                " type TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " task_path TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+            )
+            self._conn = conn
+        return self._conn
+
+    # -- Reading --------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints" \
+                " WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: list = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._load_tuple(conn, thread_id, checkpoint_ns, *row)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """Yields matching checkpoints, newest first."""
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata" \
+                " FROM checkpoints"
+        clauses: list[str] = []
+        params: list = []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint, metadata in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                loaded = self.serde.loads_typed(("msgpack", metadata))
+                if not all(loaded.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._load_tuple(self._connect(), thread_id, checkpoint_ns, checkpoint_id,
+                                        parent_id, checkpoint, metadata)
+            yield item
+
+    def _load_tuple(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+                    parent_id: Optional[str], checkpoint_blob: bytes, metadata_blob: bytes) -> CheckpointTuple:
+        checkpoint: Checkpoint = self.serde.loads_typed(("msgpack", checkpoint_blob))
+        checkpoint["channel_values"] = self._load_values(conn, thread_id, checkpoint_ns,
+                                                         checkpoint["channel_versions"])
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+            " ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=thread_config(thread_id, checkpoint_id, checkpoint_ns),
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(("msgpack", metadata_blob)),
+            parent_config=thread_config(thread_id, parent_id, checkpoint_ns) if parent_id else None,
+            pending_writes=[(task_id, channel, self.serde.loads_typed((type_, value)))
+                            for task_id, channel, type_, value in writes],
+        )
+
+    def _load_values(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str,
+                     versions: ChannelVersions) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT b.type, b.compressed, b.data FROM channel_versions v JOIN blobs b ON b.digest = v.digest"
+                " WHERE v.thread_id = ? AND v.checkpoint_ns = ? AND v.channel = ? AND v.version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None:
+                continue  # Never written, or emptied.
+            type_, compressed, data = row
+            values[channel] = self.serde.loads_typed((type_, zlib.decompress(data) if compressed else data))
+        return values
+
+    # -- Writing --------------------------------------------------------------
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        """Stores a checkpoint plus the values of the channels listed in `new_versions`."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        saved = checkpoint.copy()
+        values = saved.pop("channel_values")
+        _, checkpoint_blob = self.serde.dumps_typed(saved)
+        _, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        stored_bytes = 0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                for channel, version in new_versions.items():
+                    digest = None
+                    if channel in values:
+                        digest, size = self._store_blob(conn, values[channel])
+                        stored_bytes += size
+                    conn.execute(
+                        "INSERT OR REPLACE INTO channel_versions (thread_id, checkpoint_ns, channel, version, digest)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (thread_id, checkpoint_ns, channel, str(version), digest),
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints"
+                    " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     checkpoint_blob, metadata_blob),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if self.keep > 0:
+                count = conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                                     (thread_id, checkpoint_ns)).fetchone()[0]
+                if count >= self.keep + PRUNE_BATCH:
+                    self._prune_locked(conn, thread_id, checkpoint_ns, self.keep)
+        registry.increment("devpilot_checkpoints_total", source=str(metadata.get("source", "")))
+        registry.observe("devpilot_checkpoint_bytes", stored_bytes + len(checkpoint_blob) + len(metadata_blob))
+        return thread_config(thread_id, checkpoint["id"], checkpoint_ns)
+
+    def _store_blob(self, conn: sqlite3.Connection, value: Any) -> tuple[str, int]:
+        """Stores a channel value unless an identical one is stored; returns its digest and new bytes."""
+        type_, data = self.serde.dumps_typed(value)
+        digest = hashlib.blake2b(type_.encode("utf-8") + b"\0" + data, digest_size=16).hexdigest()
+        if conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+            return digest, 0
+        compressed = len(data) >= COMPRESS_MIN_BYTES
+        if compressed:
+            data = zlib.compress(data)
+        conn.execute("INSERT INTO blobs (digest, type, compressed, data) VALUES (?, ?, ?, ?)",
+                     (digest, type_, int(compressed), data))
+        return digest, len(data)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        """Stores the pending writes of a task against the checkpoint it ran from."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, data, task_path))
+        # Special channels (errors, interrupts) keep their first write, like the upstream savers.
+        verb = "INSERT OR REPLACE" if all(channel not in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self._connect().executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value,"
+                " task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def put_values(self, config: RunnableConfig, values: dict[str, Any], metadata: CheckpointMetadata) -> RunnableConfig:
+        """
+        Writes a checkpoint on top of the thread's latest one in which only the
+        channels of `values` that differ from it get a new version. Used to record
+        state that changed outside a graph run.
+
+        Returns:
+            RunnableConfig: Config of the new checkpoint, or of the latest one if nothing changed.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        latest = self.get_tuple(thread_config(thread_id, checkpoint_ns=checkpoint_ns))
+        if latest is not None:
+            checkpoint = latest.checkpoint
+            previous = checkpoint["channel_values"]
+            step = latest.metadata.get("step", -1) + 1
+            parent_config = latest.config
+        else:
+            checkpoint, previous, step = empty_checkpoint(), {}, -1
+            parent_config = thread_config(thread_id, checkpoint_ns=checkpoint_ns)
+
+        new_versions: ChannelVersions = {}
+        for channel, value in values.items():
+            if channel in previous and previous[channel] == value:
+                continue
+            new_versions[channel] = self.get_next_version(checkpoint["channel_versions"].get(channel), None)
+        if not new_versions and latest is not None:
+            return latest.config
+
+        checkpoint = {
+            **checkpoint,
+            "id": str(uuid6(clock_seq=step)),
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "channel_values": {**previous, **values},
+            "channel_versions": {**checkpoint["channel_versions"], **new_versions},
+            "updated_channels": sorted(new_versions),
+        }
+        return self.put(parent_config, checkpoint, {**metadata, "source": "update", "step": step}, new_versions)
+
+    def fork(self, config: RunnableConfig, new_thread_id: str) -> RunnableConfig:
+        """
+        Starts `new_thread_id` from the checkpoint addressed by `config` (the
+        latest of its thread if it names none). Values are shared, not copied.
+
+        Raises:
+            KeyError: If there is no such checkpoint.
+        """
+        source = self.get_tuple(config)
+        if source is None:
+            raise KeyError(f"No checkpoint for {config['configurable']}")
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = source.config["configurable"]["checkpoint_id"]
+        metadata = {**source.metadata, "source": "fork", "forked_from": f"{thread_id}/{checkpoint_id}"}
+        _, metadata_blob = self.serde.dumps_typed(metadata)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                for channel, version in source.checkpoint["channel_versions"].items():
+                    conn.execute(
+                        "INSERT OR IGNORE INTO channel_versions (thread_id, checkpoint_ns, channel, version, digest)"
+                        " SELECT ?, checkpoint_ns, channel, version, digest FROM channel_versions"
+                        " WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                        (new_thread_id, thread_id, checkpoint_ns, channel, str(version)),
+                    )
+                conn.execute(
+                    "INSERT INTO checkpoints"
+                    " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata)"
+                    " SELECT ?, checkpoint_ns, checkpoint_id, NULL, checkpoint, ? FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (new_thread_id, metadata_blob, thread_id, checkpoint_ns, checkpoint_id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Forked thread {thread_id} at {checkpoint_id} into {new_thread_id}.")
+        return thread_config(new_thread_id, checkpoint_id, checkpoint_ns)
+
+    def list_threads(self, limit: int = 50) -> list[dict]:
+        """
+        The most recently updated threads, newest first.
+
+        Returns:
+            list[dict]: {"thread_id", "checkpoint_id", "checkpoints", "metadata"} per thread.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT c.thread_id, c.checkpoint_id, c.metadata, t.checkpoints FROM checkpoints c"
+                " JOIN (SELECT thread_id, MAX(checkpoint_id) AS latest, COUNT(*) AS checkpoints FROM checkpoints"
+                "       WHERE checkpoint_ns = '' GROUP BY thread_id) t"
+                " ON c.thread_id = t.thread_id AND c.checkpoint_id = t.latest AND c.checkpoint_ns = ''"
+                " ORDER BY c.checkpoint_id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"thread_id": thread_id, "checkpoint_id": checkpoint_id, "checkpoints": count,
+             "metadata": self.serde.loads_typed(("msgpack", metadata))}
+            for thread_id, checkpoint_id, metadata, count in rows
+        ]
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Deletes a thread's checkpoints and writes. Blobs other threads share are kept."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                for table in ("checkpoints", "channel_versions", "writes"):
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM blobs WHERE digest NOT IN"
+                             " (SELECT digest FROM channel_versions WHERE digest IS NOT NULL)")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def prune_thread(self, thread_id: str, keep: Optional[int] = None, checkpoint_ns: str = "") -> int:
+        """
+        Deletes all but the newest `keep` (default: the saver's) checkpoints of a
+        thread, with their pending writes and the values only they referenced.
+
+        Returns:
+            int: Number of checkpoints deleted.
+        """
+        keep = self.keep if keep is None else keep
+        if keep <= 0:
+            return 0
+        with self._lock:
+            return self._prune_locked(self._connect(), thread_id, checkpoint_ns, keep)
+
+    def prune(self, keep: Optional[int] = None) -> int:
+        """Applies `prune_thread` to every thread and namespace; returns the checkpoints deleted."""
+        with self._lock:
+            threads = self._connect().execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+        return sum(self.prune_thread(thread_id, keep, checkpoint_ns) for thread_id, checkpoint_ns in threads)
+
+    def _prune_locked(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, keep: int) -> int:
+        rows = conn.execute(
+            "SELECT checkpoint_id, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        dropped = [checkpoint_id for checkpoint_id, _ in rows[keep:]]
+        if not dropped:
+            return 0
+        # Versions only grow along a thread, so a channel version older than every
+        # kept checkpoint's version of that channel is no longer referenced.
+        oldest_kept: dict[str, int] = {}
+        for _, blob in rows[:keep]:
+            for channel, version in self.serde.loads_typed(("msgpack", blob))["channel_versions"].items():
+                counter = _version_counter(version)
+                oldest_kept[channel] = min(counter, oldest_kept.get(channel, counter))
+        stale = [
+            (channel, version)
+            for channel, version in conn.execute(
+                "SELECT channel, version FROM channel_versions WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if channel not in oldest_kept or _version_counter(version) < oldest_kept[channel]
+        ]
+        conn.execute("BEGIN")
+        try:
+            for table in ("checkpoints", "writes"):
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in dropped],
+                )
+            conn.executemany(
+                "DELETE FROM channel_versions WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                [(thread_id, checkpoint_ns, channel, version) for channel, version in stale],
+            )
+            conn.execute("DELETE FROM blobs WHERE digest NOT IN"
+                         " (SELECT digest FROM channel_versions WHERE digest IS NOT NULL)")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        registry.increment("devpilot_checkpoints_pruned_total", amount=len(dropped))
+        logger.debug(f"Pruned {len(dropped)} checkpoints of thread {thread_id}.")
+        return len(dropped)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same scheme as LangGraph's in-memory saver: a zero-padded counter plus a random suffix.
+        current_v = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- Async twins (SQLite work runs on a worker thread) ---------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _version_counter(version: Any) -> int:
+    return int(str(version).split(".")[0])
@@ -0,0 +1,27 @@
+# src/graph/config.py
+
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from src.llms.openai_helper import OpenAIService, get_openai_service
+
+
+def build_run_config(ai_service: Optional[OpenAIService] = None, **configurable: Any) -> RunnableConfig:
+    """
+    Builds the LangGraph run config that carries the OpenAIService to the nodes.
+
+    Args:
+        ai_service (OpenAIService, optional): Service to use; defaults to the shared one.
+        **configurable: Extra entries for the "configurable" section (e.g. thread_id).
+
+    Returns:
+        RunnableConfig: Config to pass to `invoke`/`ainvoke` or directly to a node.
+    """
+    return {"configurable": {"ai_service": ai_service or get_openai_service(), **configurable}}
+
+
+def get_ai_service(config: Optional[RunnableConfig]) -> OpenAIService:
+    """Returns the OpenAIService carried by a run config, or the shared one."""
+    service = ((config or {}).get("configurable") or {}).get("ai_service")
+    return service or get_openai_service()
@@ -1,11 +1,11 @@
 # src/graph/nodes/__init__.py
 
-from .get_user_stories import get_user_stories
-from .review_user_stories import review_user_stories
-from .generate_design_doc import generate_design_doc
-from .generate_code_files import generate_code_files
-from .review_design_doc import review_design_doc
-from .review_code import review_code
+from .get_user_stories import get_user_stories, aget_user_stories, stream_user_stories
+from .review_user_stories import review_user_stories, areview_user_stories
+from .generate_design_doc import generate_design_doc, agenerate_design_doc
+from .generate_code_files import generate_code_files, agenerate_code_files
+from .review_design_doc import review_design_doc, areview_design_doc
+from .review_code import review_code, areview_code
 
 __all__ = [
     "get_user_stories",
@@ -14,4 +14,11 @@ __all__ = [
     "review_design_doc",
     "generate_code_files",
     "review_code",
-]
\ No newline at end of file
+    "aget_user_stories",
+    "areview_user_stories",
+    "agenerate_design_doc",
+    "areview_design_doc",
+    "agenerate_code_files",
+    "areview_code",
+    "stream_user_stories",
+]
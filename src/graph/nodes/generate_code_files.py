@@ -1,13 +1,23 @@
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
+from src.handlers.code_generation_service import (
+    CODEGEN_MODE,
+    agenerate_code_by_manifest,
+    arecover_lost_file,
+    generate_code_by_manifest,
+    recover_lost_file,
+)
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
 from src.prompts.code_generation_prompt import generate_code_generation_prompt
-from src.utils.code_parser import parse_generated_code_response
+from src.vectorstore.retrieval import find_similar_examples
 
 logger = Logger(__name__)
 
 @log_node
-def generate_code_files(self, state: WorkflowState) -> WorkflowState:
+def generate_code_files(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         logger.info("Generating code from design doc...")
 
@@ -16,17 +26,55 @@ def generate_code_files(self, state: WorkflowState) -> WorkflowState:
             state.next_step = "end"
             return state
 
-        combined_doc = f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
-        prompt = generate_code_generation_prompt(combined_doc)
-        raw = self.ai_service._call_openai_chat(prompt, context="generate code")
+        if CODEGEN_MODE == "manifest":
+            files = generate_code_by_manifest(_combined_doc(state), get_ai_service(config))
+        else:
+            ai_service = get_ai_service(config)
+            raw = ai_service._call_openai_chat(_build_prompt(state), context="generate code")
+            files = recover_lost_file(_combined_doc(state), raw, ai_service.call_llm_for_code_file)
+        return _apply_generated_code(state, files)
 
-        files = parse_generated_code_response(raw)
-        state.code_generation.generated_code = files
-        state.code_generation.code_review_status = "Pending"
+    except Exception as e:
+        logger.exception("Code generation failed.")
         state.next_step = "end"
         return state
 
+
+@log_node
+async def agenerate_code_files(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        logger.info("Generating code from design doc...")
+
+        if state.design_doc.review_status != "Approved":
+            logger.warning("Design doc not approved.")
+            state.next_step = "end"
+            return state
+
+        if CODEGEN_MODE == "manifest":
+            files = await agenerate_code_by_manifest(_combined_doc(state), get_ai_service(config))
+        else:
+            ai_service = get_ai_service(config)
+            raw = await ai_service._acall_openai_chat(_build_prompt(state), context="generate code")
+            files = await arecover_lost_file(_combined_doc(state), raw, ai_service.acall_llm_for_code_file)
+        return _apply_generated_code(state, files)
+
     except Exception as e:
         logger.exception("Code generation failed.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+        return state
+
+
+def _combined_doc(state: WorkflowState) -> str:
+    return f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
+
+
+def _build_prompt(state: WorkflowState) -> list[dict]:
+    design_doc = _combined_doc(state)
+    return generate_code_generation_prompt(design_doc, find_similar_examples("code", design_doc))
+
+
+def _apply_generated_code(state: WorkflowState, files: dict) -> WorkflowState:
+    state.code_generation.generated_code = files
+    state.code_generation.code_review_status = "Pending"
+    state.next_step = "end"
+    return state
@@ -1,14 +1,24 @@
 
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
+from src.handlers.design_doc_service import (
+    DESIGN_DOC_MODE,
+    agenerate_design_doc_by_sections,
+    arecover_lost_docs,
+    generate_design_doc_by_sections,
+    recover_lost_docs,
+)
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
 from src.prompts.design_doc_prompt import generate_design_doc_prompt
-from src.utils.design_doc_parser import parse_design_doc_response
+from src.vectorstore.retrieval import find_similar_examples
 
 logger = Logger(__name__)
 
 @log_node
-def generate_design_doc(self, state: WorkflowState) -> WorkflowState:
+def generate_design_doc(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         logger.info("Generating design document...")
 
@@ -17,18 +27,60 @@ def generate_design_doc(self, state: WorkflowState) -> WorkflowState:
             state.next_step = "end"
             return state
 
-        user_story_text = "\n".join([s.user_story for s in state.user_stories])
-        prompt = generate_design_doc_prompt((state.requirement or ""), user_story_text)
-        raw = self.ai_service._call_openai_chat(prompt, context="generate design doc")
+        if DESIGN_DOC_MODE == "sections":
+            docs = generate_design_doc_by_sections(state.requirement or "", _story_texts(state), get_ai_service(config))
+        else:
+            ai_service = get_ai_service(config)
+            raw = ai_service._call_openai_chat(_build_prompt(state), context="generate design doc")
+            docs = recover_lost_docs(state.requirement or "", "\n".join(_story_texts(state)), raw,
+                                     ai_service.call_llm_for_design_doc_section)
+        return _apply_design_doc(state, docs)
 
-        parsed = parse_design_doc_response(raw)
-        state.design_doc.functional_doc = parsed.get("functional_doc", "")
-        state.design_doc.technical_doc = parsed.get("technical_doc", "")
-        state.design_doc.review_status = "Pending"
-        state.next_step = "generate_code"
+    except Exception as e:
+        logger.exception("Design doc generation failed.")
+        state.next_step = "end"
         return state
 
+
+@log_node
+async def agenerate_design_doc(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        logger.info("Generating design document...")
+
+        if not state.user_stories:
+            logger.warning("No user stories found, skipping design doc.")
+            state.next_step = "end"
+            return state
+
+        if DESIGN_DOC_MODE == "sections":
+            docs = await agenerate_design_doc_by_sections(state.requirement or "", _story_texts(state),
+                                                          get_ai_service(config))
+        else:
+            ai_service = get_ai_service(config)
+            raw = await ai_service._acall_openai_chat(_build_prompt(state), context="generate design doc")
+            docs = await arecover_lost_docs(state.requirement or "", "\n".join(_story_texts(state)), raw,
+                                            ai_service.acall_llm_for_design_doc_section)
+        return _apply_design_doc(state, docs)
+
     except Exception as e:
         logger.exception("Design doc generation failed.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+        return state
+
+
+def _story_texts(state: WorkflowState) -> list[str]:
+    return [s.user_story for s in state.user_stories]
+
+
+def _build_prompt(state: WorkflowState) -> list[dict]:
+    user_story_text = "\n".join(_story_texts(state))
+    examples = find_similar_examples("design_doc", state.requirement or "")
+    return generate_design_doc_prompt((state.requirement or ""), user_story_text, examples)
+
+
+def _apply_design_doc(state: WorkflowState, docs: dict) -> WorkflowState:
+    state.design_doc.functional_doc = docs.get("functional_doc", "")
+    state.design_doc.technical_doc = docs.get("technical_doc", "")
+    state.design_doc.review_status = "Pending"
+    state.next_step = "generate_code"
+    return state
@@ -1,27 +1,124 @@
+from typing import Callable
+
+from pydantic import ValidationError
+
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
 from src.state.workflow_state import WorkflowState
+from src.state.user_story_model import UserStoryModel
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
+from src.utils.stream_parser import IncrementalJsonExtractor
 from src.utils.user_story_parser import parse_user_stories_from_llm_response
+from src.vectorstore.requirement_dedup import find_near_duplicate
 
 logger = Logger(__name__)
 
 
 @log_node
-def get_user_stories(self, state: WorkflowState) -> WorkflowState:
+def get_user_stories(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         if not hasattr(state, "requirement") or not state.requirement:
             logger.error("State missing 'requirement'.")
             return state
 
-        user_stories_response = get_user_stories(state.requirement)
-        state.user_stories = parse_user_stories_from_llm_response(user_stories_response)
-        state.user_story_status = "Pending Review"
-        state.next_step = "review_user_stories"
-        logger.info(f"Parsed {len(state.user_stories)} user stories.")
-        logger.info(f"User stories generated for: {state.requirement[:60]}...")
-        return state
+        if _reuse_near_duplicate(state, config):
+            return state
+
+        user_stories_response = get_ai_service(config).call_llm_for_user_stories(state.requirement)
+        return _apply_user_stories(state, user_stories_response)
 
     except Exception as e:
         logger.exception("Failed in get_user_stories node.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+        return state
+
+
+@log_node
+async def aget_user_stories(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        if not hasattr(state, "requirement") or not state.requirement:
+            logger.error("State missing 'requirement'.")
+            return state
+
+        if _reuse_near_duplicate(state, config):
+            return state
+
+        user_stories_response = await get_ai_service(config).acall_llm_for_user_stories(state.requirement)
+        return _apply_user_stories(state, user_stories_response)
+
+    except Exception as e:
+        logger.exception("Failed in aget_user_stories node.")
+        state.next_step = "end"
+        return state
+
+
+@log_node
+def stream_user_stories(state: WorkflowState, config: RunnableConfig,
+                        on_story: Callable[[int, UserStoryModel], None]) -> WorkflowState:
+    """
+    Streaming variant of `get_user_stories`: `on_story(index, story)` is called for
+    each user story as soon as it is complete in the streamed response.
+    """
+    try:
+        if not hasattr(state, "requirement") or not state.requirement:
+            logger.error("State missing 'requirement'.")
+            return state
+
+        if _reuse_near_duplicate(state, config):
+            for index, story in enumerate(state.user_stories):
+                on_story(index, story)
+            return state
+
+        extractor = IncrementalJsonExtractor(("user_stories",))
+        for delta in get_ai_service(config).stream_llm_for_user_stories(state.requirement):
+            for index, story in extractor.feed(delta):
+                try:
+                    on_story(index, UserStoryModel(**story))
+                except (ValidationError, TypeError) as e:
+                    logger.warning(f"Skipping invalid streamed user story {index}: {e}")
+
+        return _apply_user_stories(state, extractor.text)
+
+    except Exception as e:
+        logger.exception("Failed in stream_user_stories node.")
+        state.next_step = "end"
+        return state
+
+
+def _reuse_near_duplicate(state: WorkflowState, config: RunnableConfig) -> bool:
+    """
+    Reuses the user stories of an approved near-duplicate requirement instead of
+    calling the LLM. Disabled for a run with config["configurable"]["allow_reuse"] = False.
+    """
+    state.near_duplicate = None
+    if not ((config or {}).get("configurable") or {}).get("allow_reuse", True):
+        return False
+
+    match = find_near_duplicate(state.requirement)
+    if match is None:
+        return False
+    try:
+        stories = [UserStoryModel(**story) for story in match["user_stories"]]
+    except (ValidationError, TypeError) as e:
+        logger.warning(f"Ignoring near-duplicate with invalid stored user stories: {e}")
+        return False
+    if not stories:
+        return False
+
+    state.user_stories = stories
+    state.user_story_status = "Pending Review"
+    state.next_step = "review_user_stories"
+    state.near_duplicate = {"requirement": match["requirement"], "similarity": match["similarity"]}
+    logger.info(f"Reused {len(stories)} user stories from a {match['similarity']:.0%} similar approved requirement.")
+    return True
+
+
+def _apply_user_stories(state: WorkflowState, user_stories_response: str) -> WorkflowState:
+    state.user_stories = parse_user_stories_from_llm_response(user_stories_response)
+    state.user_story_status = "Pending Review"
+    state.next_step = "review_user_stories"
+    logger.info(f"Parsed {len(state.user_stories)} user stories.")
+    logger.info(f"User stories generated for: {state.requirement[:60]}...")
+    return state
@@ -1,13 +1,22 @@
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
+from src.handlers.code_generation_service import (
+    arecover_lost_file,
+    arevise_code_with_diffs,
+    recover_lost_file,
+    revise_code_with_diffs,
+)
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
 from src.prompts.code_generation_prompt import generate_code_generation_prompt
-from src.utils.code_parser import parse_generated_code_response
+from src.vectorstore.retrieval import find_similar_examples
 
 logger = Logger(__name__)
 
 @log_node
-def review_code(self, state: WorkflowState) -> WorkflowState:
+def review_code(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         logger.info("Reviewing generated code...")
 
@@ -16,16 +25,50 @@ def review_code(self, state: WorkflowState) -> WorkflowState:
             state.next_step = "end"
 
         elif state.code_generation.code_feedback:
-            logger.info("Feedback received. Regenerating code...")
-            combined_doc = f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
-            prompt = generate_code_generation_prompt(combined_doc)
-            raw = self.ai_service._call_openai_chat(prompt, context="regenerate code")
-            files = parse_generated_code_response(raw)
+            ai_service = get_ai_service(config)
+            if state.code_generation.generated_code:
+                logger.info("Feedback received. Revising code with diffs...")
+                files = revise_code_with_diffs(
+                    state.code_generation.generated_code, state.code_generation.code_feedback, ai_service
+                )
+            else:
+                logger.info("Feedback received. Regenerating code...")
+                raw = ai_service._call_openai_chat(_build_prompt(state), context="regenerate code")
+                files = recover_lost_file(_combined_doc(state), raw, ai_service.call_llm_for_code_file)
+            _apply_revision(state, files)
+
+        else:
+            state.next_step = "review_code"  # Waiting for input
+
+        return state
+
+    except Exception as e:
+        logger.exception("Code review failed.")
+        state.next_step = "end"
+        return state
+
+
+@log_node
+async def areview_code(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        logger.info("Reviewing generated code...")
 
-            state.code_generation.generated_code = files
-            state.code_generation.code_review_status = "Pending"
-            state.code_generation.code_feedback = ""
-            state.next_step = "review_code"
+        if state.code_generation.code_review_status == "Approved":
+            logger.info("Code generation approved.")
+            state.next_step = "end"
+
+        elif state.code_generation.code_feedback:
+            ai_service = get_ai_service(config)
+            if state.code_generation.generated_code:
+                logger.info("Feedback received. Revising code with diffs...")
+                files = await arevise_code_with_diffs(
+                    state.code_generation.generated_code, state.code_generation.code_feedback, ai_service
+                )
+            else:
+                logger.info("Feedback received. Regenerating code...")
+                raw = await ai_service._acall_openai_chat(_build_prompt(state), context="regenerate code")
+                files = await arecover_lost_file(_combined_doc(state), raw, ai_service.acall_llm_for_code_file)
+            _apply_revision(state, files)
 
         else:
             state.next_step = "review_code"  # Waiting for input
@@ -35,4 +78,20 @@ def review_code(self, state: WorkflowState) -> WorkflowState:
     except Exception as e:
         logger.exception("Code review failed.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+        return state
+
+
+def _combined_doc(state: WorkflowState) -> str:
+    return f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
+
+
+def _build_prompt(state: WorkflowState) -> list[dict]:
+    design_doc = _combined_doc(state)
+    return generate_code_generation_prompt(design_doc, find_similar_examples("code", design_doc))
+
+
+def _apply_revision(state: WorkflowState, files: dict) -> None:
+    state.code_generation.generated_code = files
+    state.code_generation.code_review_status = "Pending"
+    state.code_generation.code_feedback = ""
+    state.next_step = "review_code"
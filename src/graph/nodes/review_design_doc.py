@@ -1,14 +1,18 @@
 
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
 from src.prompts.design_doc_prompt import generate_design_doc_prompt
 from src.utils.design_doc_parser import parse_design_doc_response
+from src.vectorstore.retrieval import find_similar_examples
 
 logger = Logger(__name__)
 
 @log_node
-def review_design_doc(self, state: WorkflowState) -> WorkflowState:
+def review_design_doc(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         logger.info("Reviewing design document...")
 
@@ -18,18 +22,8 @@ def review_design_doc(self, state: WorkflowState) -> WorkflowState:
 
         elif state.design_doc.feedback:
             logger.info("Feedback received. Regenerating design doc...")
-            prompt = generate_design_doc_prompt(
-                state.requirement or "",
-                "\n".join([s.user_story for s in state.user_stories or []])
-            )
-            raw = self.ai_service._call_openai_chat(prompt, context="revise design doc")
-            parsed = parse_design_doc_response(raw)
-
-            state.design_doc.functional_doc = parsed.get("functional_doc", "")
-            state.design_doc.technical_doc = parsed.get("technical_doc", "")
-            state.design_doc.feedback = ""
-            state.design_doc.review_status = "Pending"
-            state.next_step = "review_design_doc"
+            raw = get_ai_service(config)._call_openai_chat(_build_prompt(state), context="revise design doc")
+            _apply_revision(state, raw)
 
         else:
             state.next_step = "review_design_doc"  # Waiting for review or feedback
@@ -39,4 +33,47 @@ def review_design_doc(self, state: WorkflowState) -> WorkflowState:
     except Exception as e:
         logger.exception("Design doc review failed.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+        return state
+
+
+@log_node
+async def areview_design_doc(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        logger.info("Reviewing design document...")
+
+        if state.design_doc.review_status == "Approved":
+            logger.info("Design doc approved.")
+            state.next_step = "generate_code"
+
+        elif state.design_doc.feedback:
+            logger.info("Feedback received. Regenerating design doc...")
+            raw = await get_ai_service(config)._acall_openai_chat(_build_prompt(state), context="revise design doc")
+            _apply_revision(state, raw)
+
+        else:
+            state.next_step = "review_design_doc"  # Waiting for review or feedback
+
+        return state
+
+    except Exception as e:
+        logger.exception("Design doc review failed.")
+        state.next_step = "end"
+        return state
+
+
+def _build_prompt(state: WorkflowState) -> list[dict]:
+    return generate_design_doc_prompt(
+        state.requirement or "",
+        "\n".join([s.user_story for s in state.user_stories or []]),
+        find_similar_examples("design_doc", state.requirement or ""),
+    )
+
+
+def _apply_revision(state: WorkflowState, raw: str) -> None:
+    parsed = parse_design_doc_response(raw)
+
+    state.design_doc.functional_doc = parsed.get("functional_doc", "")
+    state.design_doc.technical_doc = parsed.get("technical_doc", "")
+    state.design_doc.feedback = ""
+    state.design_doc.review_status = "Pending"
+    state.next_step = "review_design_doc"
@@ -1,12 +1,18 @@
+from langchain_core.runnables import RunnableConfig
+
+from src.graph.config import get_ai_service
+from src.state.feedback_compaction import acompact_feedback, compact_feedback
+from src.state.revision_store import MAX_REVISIONS
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
 from src.utils.decorators import log_node
+from src.utils.metrics import registry
 from src.utils.user_story_parser import parse_user_stories_from_llm_response
 
 logger = Logger(__name__)
 
 @log_node
-def review_user_stories(self, state: WorkflowState) -> WorkflowState:
+def review_user_stories(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
     try:
         logger.info("Reviewing user stories...")
 
@@ -16,32 +22,83 @@ def review_user_stories(self, state: WorkflowState) -> WorkflowState:
 
         elif state.feedback:
             logger.info("Feedback received. Regenerating user stories...")
-            state.feedback_history.append(state.feedback)
-            if state.user_stories is not None:
-                state.revisions.append(state.user_stories)
+            _record_revision(state)
+            ai_service = get_ai_service(config)
+            state.change_list = compact_feedback(state.change_list, state.feedback,
+                                                 getattr(ai_service, "summarize_feedback", None))
 
-            revised_response = self.ai_service.revise_user_stories(
+            revised_response = ai_service.revise_user_stories(
                 feedback=state.feedback,
                 requirement=state.requirement or "",
+                changes=state.change_list,
             )
-            state.user_stories = parse_user_stories_from_llm_response(revised_response)
-            state.feedback = ""
+            _apply_revision(state, revised_response)
+        else:
+            _wait_for_feedback(state)
+
+        return state
+
+    except Exception as e:
+        logger.exception("Error in review_user_stories node.")
+        state.next_step = "end"
+        return state
+
+
+@log_node
+async def areview_user_stories(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    try:
+        logger.info("Reviewing user stories...")
+
+        if state.user_story_status == "Approved":
+            logger.info("User stories approved. Workflow complete.")
+            state.next_step = "end"
 
-            logger.info(f"[review_user_stories] Updated user stories: {revised_response}")
+        elif state.feedback:
+            logger.info("Feedback received. Regenerating user stories...")
+            _record_revision(state)
+            ai_service = get_ai_service(config)
+            state.change_list = await acompact_feedback(state.change_list, state.feedback,
+                                                        getattr(ai_service, "asummarize_feedback", None))
 
-            state.next_step = "review_user_stories" if state.user_stories else "end"
+            revised_response = await ai_service.arevise_user_stories(
+                feedback=state.feedback,
+                requirement=state.requirement or "",
+                changes=state.change_list,
+            )
+            _apply_revision(state, revised_response)
         else:
-            state.review_attempts += 1
-            if state.review_attempts >= 2:
-                logger.warning("Max feedback attempts exceeded. Ending workflow.")
-                state.next_step = "end"
-            else:
-                logger.info("Waiting for feedback...")
-                state.next_step = "review_user_stories"
+            _wait_for_feedback(state)
 
         return state
 
     except Exception as e:
-        logger.exception("Error in review_user_stories node.")
+        logger.exception("Error in areview_user_stories node.")
+        state.next_step = "end"
+        return state
+
+
+def _record_revision(state: WorkflowState) -> None:
+    """Keeps the stories being replaced, and the feedback replacing them, within the retention limit."""
+    state.feedback_history = (state.feedback_history + [state.feedback])[-MAX_REVISIONS:]
+    if state.user_stories is not None:
+        state.revisions.record(state.user_stories, state.feedback or "")
+        registry.observe("devpilot_revision_store_bytes", state.revisions.memory_bytes())
+
+
+def _apply_revision(state: WorkflowState, revised_response: str) -> None:
+    state.user_stories = parse_user_stories_from_llm_response(revised_response)
+    state.feedback = ""
+
+    logger.info(f"[review_user_stories] Updated user stories: {revised_response}")
+
+    state.next_step = "review_user_stories" if state.user_stories else "end"
+
+
+def _wait_for_feedback(state: WorkflowState) -> None:
+    state.review_attempts += 1
+    if state.review_attempts >= 2:
+        logger.warning("Max feedback attempts exceeded. Ending workflow.")
         state.next_step = "end"
-        return state
\ No newline at end of file
+    else:
+        logger.info("Waiting for feedback...")
+        state.next_step = "review_user_stories"
@@ -0,0 +1,155 @@
+# src/graph/sessions.py
+
+"""
+Durable workflow sessions on top of the SQLite checkpointer.
+
+A session is a checkpointer thread: graph runs checkpoint after every node and
+the UI checkpoints the fields an action changed, so `resume` rebuilds the last
+WorkflowState of a session without calling the LLM again. `list_sessions` and
+`history` describe stored runs, and `fork` starts a new session from any of
+their checkpoints.
+"""
+
+import contextvars
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.graph.checkpointer import get_checkpointer, thread_config
+from src.state.workflow_state import WorkflowState
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+_current_thread: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("devpilot_thread", default=None)
+
+STATE_FIELDS = tuple(WorkflowState.model_fields)
+
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_thread_id() -> Optional[str]:
+    """The session bound with `bind_thread` in the calling context, if any."""
+    return _current_thread.get()
+
+
+@contextmanager
+def bind_thread(thread_id: Optional[str]) -> Iterator[None]:
+    """
+    Makes `thread_id` the session of workflows created in this context. Jobs
+    submitted inside the block inherit it.
+    """
+    token = _current_thread.set(thread_id)
+    try:
+        yield
+    finally:
+        _current_thread.reset(token)
+
+
+def save_state(thread_id: str, state: WorkflowState, step: str) -> Optional[str]:
+    """
+    Checkpoints the fields of `state` that changed since the session's latest checkpoint.
+
+    Args:
+        thread_id (str): Session id.
+        state (WorkflowState): State to record.
+        step (str): UI step or action that produced it, kept in the checkpoint metadata.
+
+    Returns:
+        str | None: Id of the session's latest checkpoint, or None if checkpointing is disabled.
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return None
+    values = {field: getattr(state, field) for field in STATE_FIELDS}
+    config = checkpointer.put_values(thread_config(thread_id), values, {"writer": step})
+    return config["configurable"]["checkpoint_id"]
+
+
+def resume(thread_id: str, checkpoint_id: Optional[str] = None) -> Optional[WorkflowState]:
+    """
+    The WorkflowState stored at a checkpoint (the session's latest by default),
+    or None if there is none.
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return None
+    saved = checkpointer.get_tuple(thread_config(thread_id, checkpoint_id))
+    if saved is None:
+        return None
+    values = {k: v for k, v in saved.checkpoint["channel_values"].items() if k in STATE_FIELDS}
+    logger.info(f"Resumed session {thread_id} at checkpoint {saved.config['configurable']['checkpoint_id']}.")
+    return WorkflowState(**values)
+
+
+def fork(thread_id: str, checkpoint_id: Optional[str] = None) -> str:
+    """
+    Starts a new session from a checkpoint (the session's latest by default).
+
+    Returns:
+        str: The new session id.
+
+    Raises:
+        KeyError: If the checkpoint does not exist or checkpointing is disabled.
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        raise KeyError("Checkpointing is disabled.")
+    forked = new_thread_id()
+    checkpointer.fork(thread_config(thread_id, checkpoint_id), forked)
+    return forked
+
+
+def list_sessions(limit: int = 20) -> list[dict]:
+    """
+    The most recently updated sessions, newest first.
+
+    Returns:
+        list[dict]: {"thread_id", "checkpoint_id", "checkpoints", "writer", "requirement"} per session.
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return []
+    sessions = []
+    for thread in checkpointer.list_threads(limit):
+        saved = checkpointer.get_tuple(thread_config(thread["thread_id"], thread["checkpoint_id"]))
+        values = saved.checkpoint["channel_values"] if saved else {}
+        sessions.append({
+            "thread_id": thread["thread_id"],
+            "checkpoint_id": thread["checkpoint_id"],
+            "checkpoints": thread["checkpoints"],
+            "writer": _writer(thread["metadata"]),
+            "requirement": values.get("requirement") or "",
+        })
+    return sessions
+
+
+def history(thread_id: str, limit: Optional[int] = None) -> list[dict]:
+    """
+    Checkpoints of a session, newest first, without their values.
+
+    Returns:
+        list[dict]: {"checkpoint_id", "parent_checkpoint_id", "ts", "writer", "updated"} per checkpoint.
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return []
+    return [
+        {
+            "checkpoint_id": saved.config["configurable"]["checkpoint_id"],
+            "parent_checkpoint_id": (saved.parent_config or {}).get("configurable", {}).get("checkpoint_id"),
+            "ts": saved.checkpoint["ts"],
+            "writer": _writer(saved.metadata),
+            "updated": [c for c in saved.checkpoint.get("updated_channels") or [] if c in STATE_FIELDS],
+        }
+        for saved in checkpointer.list(thread_config(thread_id), limit=limit)
+    ]
+
+
+def _writer(metadata: dict) -> str:
+    """What produced a checkpoint: the UI step, or the graph source and step number."""
+    if metadata.get("writer"):
+        return metadata["writer"]
+    return f"graph {metadata.get('source', '?')} step {metadata.get('step', '?')}"
@@ -1,64 +1,184 @@
 # src/graph/workflow.py
 
-from typing import Any, Optional
+import threading
+from typing import Any, Callable, Optional
 
 from langgraph.graph import StateGraph, END # type: ignore
 
-from src.llms.openai_helper import OpenAIService
+from src.graph.checkpointer import get_checkpointer
+from src.graph.config import build_run_config
+from src.graph.sessions import current_thread_id, new_thread_id
+from src.llms.openai_helper import get_openai_service
 from src.state.workflow_state import WorkflowState
+from src.state.user_story_model import UserStoryModel
 from src.graph.nodes import *
+from src.utils.metrics import run_trace
 
 from src.utils.logger import Logger
 
 logger = Logger(__name__)
 
+# Compiled graphs are immutable and hold no per-request data (the OpenAIService
+# and the thread id travel in the run config), so one compiled graph per shape
+# serves every session. They checkpoint after every node unless checkpointing is
+# disabled.
+_compiled_graphs: dict[str, Any] = {}
+_compiled_graphs_lock = threading.Lock()
+
+
+def get_compiled_graph(shape: str) -> Any:
+    """
+    Returns the process-wide compiled graph for `shape`, compiling it on first use.
+
+    Args:
+        shape (str): "full", "full_async" or "review".
+    """
+    graph = _compiled_graphs.get(shape)
+    if graph is None:
+        with _compiled_graphs_lock:
+            graph = _compiled_graphs.get(shape)
+            if graph is None:
+                logger.info(f"Compiling '{shape}' graph.")
+                graph = _GRAPH_BUILDERS[shape]()
+                _compiled_graphs[shape] = graph
+    return graph
+
+
+def _build_full_graph(asynchronous: bool = False) -> Any:
+    if asynchronous:
+        nodes = {
+            "get_user_stories": aget_user_stories,
+            "review_user_stories": areview_user_stories,
+            "generate_design_doc": agenerate_design_doc,
+            "generate_code": agenerate_code_files,
+            "review_design_doc": areview_design_doc,
+            "review_code": areview_code,
+        }
+    else:
+        nodes = {
+            "get_user_stories": get_user_stories,
+            "review_user_stories": review_user_stories,
+            "generate_design_doc": generate_design_doc,
+            "generate_code": generate_code_files,
+            "review_design_doc": review_design_doc,
+            "review_code": review_code,
+        }
+
+    builder = StateGraph(WorkflowState)
+    for name, node in nodes.items():
+        builder.add_node(name, node)
+
+    builder.set_entry_point("get_user_stories")
+    builder.add_edge("get_user_stories", "review_user_stories")
+    builder.add_edge("review_user_stories", "generate_design_doc")
+    builder.add_edge("generate_design_doc", "review_design_doc")
+    builder.add_edge("review_design_doc", "generate_code")
+    builder.add_edge("generate_code", "review_code")
+
+    builder.add_conditional_edges(
+        "review_code",
+        lambda state: state.next_step,
+        {
+            "review_code": "review_code",
+            "end": END,
+        },
+    )
+
+    return builder.compile(checkpointer=get_checkpointer())
+
+
+def _build_review_graph() -> Any:
+    """Creates a LangGraph for the review flow only."""
+    builder = StateGraph(WorkflowState)
+    builder.add_node("review_user_stories", review_user_stories)
+    builder.set_entry_point("review_user_stories")
+    builder.add_conditional_edges(
+        "review_user_stories",
+        lambda state: state.next_step,
+        {
+            "review_user_stories": "review_user_stories",
+            "end": END,
+        },
+    )
+
+    return builder.compile(checkpointer=get_checkpointer())
+
+
+_GRAPH_BUILDERS: dict[str, Callable[[], Any]] = {
+    "full": _build_full_graph,
+    "full_async": lambda: _build_full_graph(asynchronous=True),
+    "review": _build_review_graph,
+}
+
+
 class Workflow:
-    def __init__(self, requirement: str):
+    def __init__(self, requirement: str, thread_id: Optional[str] = None):
         self.state = WorkflowState(requirement=requirement)
-        self.ai_service = OpenAIService()
+        self.ai_service = get_openai_service()
+        # Checkpoints go to the bound session, or to a thread of their own.
+        self.thread_id = thread_id or current_thread_id() or new_thread_id()
 
 
-    def build_workflow(self) -> StateGraph:
-        builder = StateGraph(WorkflowState)
-        builder.add_node("get_user_stories",  lambda s: get_user_stories(s, self.ai_service))
-        builder.add_node("review_user_stories",lambda s: review_user_stories(s, self.ai_service))
-        builder.add_node("generate_design_doc", lambda s :generate_design_doc(s, self.ai_service))   
-        builder.add_node("generate_code",  lambda s: generate_code_files(s, self.ai_service))
-        builder.add_node("review_design_doc", lambda s: review_design_doc(s, self.ai_service))
-        builder.add_node("review_code", lambda s: review_code(s, self.ai_service))
+    @property
+    def config(self) -> dict:
+        """Run config that hands this workflow's OpenAIService and thread to the nodes."""
+        return build_run_config(self.ai_service, thread_id=self.thread_id)
 
-        builder.set_entry_point("get_user_stories")
-        builder.add_edge("get_user_stories", "review_user_stories")
-        builder.add_edge("review_user_stories", "generate_design_doc")
-        builder.add_edge("generate_design_doc", "review_design_doc")
-        builder.add_edge("review_design_doc", "generate_code")
-        builder.add_edge("generate_code", "review_code")
 
-        builder.add_conditional_edges(
-            "review_code",
-            lambda state: state.next_step,
-            {
-                "review_code": "review_code",
-                "end": END,
-            },
-        )
-
-        return  builder.compile()
+    def build_workflow(self, asynchronous: bool = False) -> StateGraph:
+        """
+        Returns the compiled full pipeline graph. With `asynchronous=True` the graph
+        uses the async node functions and must be run with `ainvoke`.
+        """
+        return get_compiled_graph("full_async" if asynchronous else "full")
 
 
     def run_workflow(self) -> WorkflowState:
         try:
             graph = self.build_workflow()
-            final_state = graph.invoke(self.state)
+            with run_trace("workflow"):
+                final_state = graph.invoke(self.state, config=self.config)
             return final_state
         except Exception as e:
             logger.exception("Error running full workflow.")
             return self.state
 
 
-    def run_initial_only(self) -> WorkflowState:
+    async def arun_workflow(self) -> WorkflowState:
+        """Runs the full pipeline on the event loop via LangGraph's `ainvoke`."""
+        try:
+            graph = self.build_workflow(asynchronous=True)
+            with run_trace("workflow"):
+                final_state = await graph.ainvoke(self.state, config=self.config)
+            return final_state
+        except Exception as e:
+            logger.exception("Error running full async workflow.")
+            return self.state
+
+
+    def run_initial_only(self, on_story: Optional[Callable[[int, UserStoryModel], None]] = None,
+                         allow_reuse: bool = True) -> WorkflowState:
+        """
+        Generates user stories for the requirement. When `on_story` is given the
+        response is streamed and each story is passed to it as soon as it completes.
+        With `allow_reuse=False` stories of an approved near-duplicate requirement
+        are never reused.
+        """
+        try:
+            config = build_run_config(self.ai_service, thread_id=self.thread_id, allow_reuse=allow_reuse)
+            with run_trace("initial"):
+                if on_story is not None:
+                    return stream_user_stories(self.state, config, on_story)
+                return get_user_stories(self.state, config)
+        except Exception as e:
+            logger.exception("Error running initial step.")
+            return self.state
+
+
+    async def arun_initial_only(self) -> WorkflowState:
         try:
-            return get_user_stories(self.state, self.ai_service)
+            with run_trace("initial"):
+                return await aget_user_stories(self.state, self.config)
         except Exception as e:
             logger.exception("Error running initial step.")
             return self.state
@@ -69,10 +189,14 @@ class Workflow:
             if feedback:
                 self._apply_feedback(feedback)
 
-            review_graph = self._build_review_graph()
+            review_graph = get_compiled_graph("review")
             logger.info("Invoking review_user_stories with updated state.")
-            result_state = review_graph.invoke(self.state)
-            logger.info(f"Final state after review = {dict(result_state)}")
+            with run_trace("review"):
+                result_state = review_graph.invoke(self.state, config=self.config)
+            # LangGraph returns the channel values as a dict, not the state model.
+            if not isinstance(result_state, WorkflowState):
+                result_state = WorkflowState(**result_state)
+            logger.debug("Final state after review = %s", result_state)
             return result_state
 
         except Exception as e:
@@ -81,29 +205,12 @@ class Workflow:
 
  
     def _apply_feedback(self, feedback: str) -> None:
-        """Applies feedback to the current state."""
+        """
+        Applies feedback to the current state. The review node records the
+        revision it replaces and merges the feedback into the change list; the
+        requirement itself is left as the user wrote it.
+        """
         trimmed = feedback.strip()
         self.state.feedback = trimmed
-        self.state.feedback_history.append(trimmed)
-        if self.state.user_stories is not None:
-            self.state.revisions.append(self.state.user_stories)
         self.state.user_story_status = "Pending"
-        self.state.requirement = f"{(self.state.requirement or "").strip()}. {trimmed}"
-        logger.info(f"Feedback applied. Updated requirement: {self.state.requirement}")
-
-
-    def _build_review_graph(self) ->StateGraph:  
-        """Creates a LangGraph for the review flow only."""
-        builder = StateGraph(WorkflowState)
-        builder.add_node("review_user_stories", lambda s: review_user_stories(s, self.ai_service))
-        builder.set_entry_point("review_user_stories")
-        builder.add_conditional_edges(
-            "review_user_stories",
-            lambda state: state.next_step,
-            {
-                "review_user_stories": "review_user_stories",
-                "end": END,
-            },
-        )
-
-        return builder.compile()
+        logger.info(f"Feedback applied: {trimmed}")
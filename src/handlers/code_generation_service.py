@@ -1,18 +1,38 @@
+import asyncio
+import contextvars
 import logging
-from typing import Callable
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 
 from src.state.workflow_state import WorkflowState
-from src.utils.code_parser import parse_generated_code_response
+from src.utils.code_parser import (
+    parse_generated_code_response,
+    parse_generated_code_result,
+    parse_code_manifest_response,
+    parse_code_revision_response,
+)
+from src.utils.diff_apply import apply_code_changes
 
 logger = logging.getLogger(__name__)
 
-def handle_code_generation(state: WorkflowState, llm_handler: Callable[[str], str]) -> WorkflowState:
+# "single" asks for the whole codebase in one completion; "manifest" plans the
+# files first and then generates each file as its own concurrent request.
+CODEGEN_MODE = os.getenv("DEVPILOT_CODEGEN_MODE", "single")
+MAX_PARALLEL_FILES = int(os.getenv("DEVPILOT_CODEGEN_CONCURRENCY", "6"))
+MAX_FILE_ATTEMPTS = int(os.getenv("DEVPILOT_CODEGEN_FILE_ATTEMPTS", "3"))
+
+
+def handle_code_generation(state: WorkflowState, llm_handler: Callable[[str], str],
+                           file_handler: Optional[Callable[[str, list, dict], str]] = None) -> WorkflowState:
     """
     Generates code based on the approved design document.
 
     Args:
         state: WorkflowState with functional + technical doc
         llm_handler: function to call OpenAI with design doc and return raw response
+        file_handler: function(design_doc, manifest, file_entry) returning one file;
+            re-requests only a file the response was cut off in
 
     Returns:
         Updated WorkflowState with code in the generated_code field
@@ -24,7 +44,7 @@ def handle_code_generation(state: WorkflowState, llm_handler: Callable[[str], st
         full_design_doc = f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
         raw_response = llm_handler(full_design_doc)
 
-        files = parse_generated_code_response(raw_response)
+        files = recover_lost_file(full_design_doc, raw_response, file_handler)
         state.code_generation.generated_code = files
         state.code_generation.code_review_status = "Pending"
         return state
@@ -32,3 +52,213 @@ def handle_code_generation(state: WorkflowState, llm_handler: Callable[[str], st
     except Exception as e:
         logger.exception("Failed to generate code from design doc.")
         raise
+
+
+def handle_code_generation_by_manifest(state: WorkflowState, ai_service) -> WorkflowState:
+    """
+    Manifest-mode variant of `handle_code_generation`: plans the files, then
+    generates each one concurrently (see `generate_code_by_manifest`).
+
+    Args:
+        state: WorkflowState with functional + technical doc
+        ai_service: OpenAIService used for the manifest and per-file calls
+
+    Returns:
+        Updated WorkflowState with code in the generated_code field
+    """
+    if state.design_doc.review_status != "Approved":
+        raise ValueError("Design document must be approved before code generation.")
+
+    try:
+        full_design_doc = f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}"
+        state.code_generation.generated_code = generate_code_by_manifest(full_design_doc, ai_service)
+        state.code_generation.code_review_status = "Pending"
+        return state
+
+    except Exception as e:
+        logger.exception("Failed to generate code from design doc.")
+        raise
+
+
+def generate_code_by_manifest(design_doc: str, ai_service, max_parallel: int = MAX_PARALLEL_FILES,
+                              max_attempts: int = MAX_FILE_ATTEMPTS) -> dict[str, str]:
+    """
+    Generates a codebase in two phases: one call produces the file manifest, then
+    every file is requested on its own, at most `max_parallel` at a time.
+
+    A file whose response cannot be parsed is retried on its own up to
+    `max_attempts` times; files that still fail are left out and logged.
+
+    Returns:
+        dict: { filename: code_str } in manifest order.
+    """
+    manifest = parse_code_manifest_response(ai_service.call_llm_for_code_manifest(design_doc))
+    if not manifest:
+        raise ValueError("Code manifest response contained no files.")
+    logger.info(f"Generating {len(manifest)} files with up to {max_parallel} in parallel.")
+
+    def generate(entry: dict) -> str | None:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                raw = ai_service.call_llm_for_code_file(design_doc, manifest, entry)
+                content = _extract_file(raw, entry["filename"])
+                if content is not None:
+                    return content
+                logger.warning(f"Empty or unparsable output for {entry['filename']} (attempt {attempt}).")
+            except Exception as e:
+                logger.warning(f"Generating {entry['filename']} failed (attempt {attempt}): {e}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        # Each task runs in a copy of the caller's context so its LLM calls are
+        # attributed to the calling node's metrics span.
+        futures = [pool.submit(contextvars.copy_context().run, generate, entry) for entry in manifest]
+        contents = [future.result() for future in futures]
+
+    return _merge_files(manifest, contents)
+
+
+async def agenerate_code_by_manifest(design_doc: str, ai_service, max_parallel: int = MAX_PARALLEL_FILES,
+                                     max_attempts: int = MAX_FILE_ATTEMPTS) -> dict[str, str]:
+    """
+    Async twin of `generate_code_by_manifest`; concurrency is bounded by a semaphore.
+    """
+    manifest = parse_code_manifest_response(await ai_service.acall_llm_for_code_manifest(design_doc))
+    if not manifest:
+        raise ValueError("Code manifest response contained no files.")
+    logger.info(f"Generating {len(manifest)} files with up to {max_parallel} in parallel.")
+
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def generate(entry: dict) -> str | None:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with semaphore:
+                    raw = await ai_service.acall_llm_for_code_file(design_doc, manifest, entry)
+                content = _extract_file(raw, entry["filename"])
+                if content is not None:
+                    return content
+                logger.warning(f"Empty or unparsable output for {entry['filename']} (attempt {attempt}).")
+            except Exception as e:
+                logger.warning(f"Generating {entry['filename']} failed (attempt {attempt}): {e}")
+        return None
+
+    contents = await asyncio.gather(*(generate(entry) for entry in manifest))
+    return _merge_files(manifest, contents)
+
+
+def recover_lost_file(design_doc: str, raw_response: str,
+                      file_handler: Optional[Callable[[str, list, dict], str]] = None) -> dict[str, str]:
+    """
+    Parses a whole-codebase response; a file it was cut off in is requested again
+    on its own through `file_handler` (when given), with the finished files as
+    the manifest it must fit into.
+
+    Returns:
+        dict: { filename: code_str }
+    """
+    files, lost = parse_generated_code_result(raw_response)
+    if lost is None or file_handler is None:
+        return files
+    manifest, entry = _lost_file_manifest(files, lost)
+    try:
+        _store_recovered(files, lost, _extract_file(file_handler(design_doc, manifest, entry), lost))
+    except Exception as e:
+        logger.warning(f"Re-requesting the lost file {lost} failed: {e}")
+    return files
+
+
+async def arecover_lost_file(design_doc: str, raw_response: str, afile_handler=None) -> dict[str, str]:
+    """Async twin of `recover_lost_file`."""
+    files, lost = parse_generated_code_result(raw_response)
+    if lost is None or afile_handler is None:
+        return files
+    manifest, entry = _lost_file_manifest(files, lost)
+    try:
+        _store_recovered(files, lost, _extract_file(await afile_handler(design_doc, manifest, entry), lost))
+    except Exception as e:
+        logger.warning(f"Re-requesting the lost file {lost} failed: {e}")
+    return files
+
+
+def _store_recovered(files: dict[str, str], filename: str, content: str | None) -> None:
+    if content is None:
+        logger.error(f"Re-requested {filename} returned no content; it is left out.")
+    else:
+        logger.info(f"Recovered the lost file {filename} with a single-file request.")
+        files[filename] = content
+
+
+def _lost_file_manifest(files: dict[str, str], lost: str) -> tuple[list[dict], dict]:
+    entry = {"filename": lost, "responsibility": "", "interfaces": []}
+    manifest = [{"filename": name, "responsibility": "", "interfaces": []} for name in files]
+    return manifest + [entry], entry
+
+
+def revise_code_with_diffs(files: dict[str, str], feedback: str, ai_service) -> dict[str, str]:
+    """
+    Applies review feedback to existing files by asking for unified diffs of only
+    the files that change. Files whose diff does not apply or whose result does
+    not compile are rewritten in full, one request per file.
+
+    Returns:
+        dict: Revised { filename: code_str }.
+    """
+    changes = parse_code_revision_response(ai_service.revise_code(files, feedback))
+    revised, failed = apply_code_changes(files, changes)
+    logger.info(f"Applied {len(changes) - len(failed)} of {len(changes)} file changes from diffs.")
+
+    for filename in failed:
+        try:
+            raw = ai_service.rewrite_code_file(filename, files.get(filename, ""), feedback)
+            _store_rewrite(revised, filename, _extract_file(raw, filename))
+        except Exception as e:
+            logger.error(f"Full rewrite of {filename} failed, keeping previous version: {e}")
+    return revised
+
+
+async def arevise_code_with_diffs(files: dict[str, str], feedback: str, ai_service) -> dict[str, str]:
+    """
+    Async twin of `revise_code_with_diffs`; fallback rewrites run concurrently.
+    """
+    changes = parse_code_revision_response(await ai_service.arevise_code(files, feedback))
+    revised, failed = apply_code_changes(files, changes)
+    logger.info(f"Applied {len(changes) - len(failed)} of {len(changes)} file changes from diffs.")
+
+    async def rewrite(filename: str) -> None:
+        try:
+            raw = await ai_service.arewrite_code_file(filename, files.get(filename, ""), feedback)
+            _store_rewrite(revised, filename, _extract_file(raw, filename))
+        except Exception as e:
+            logger.error(f"Full rewrite of {filename} failed, keeping previous version: {e}")
+
+    await asyncio.gather(*(rewrite(filename) for filename in failed))
+    return revised
+
+
+def _store_rewrite(files: dict[str, str], filename: str, content: str | None) -> None:
+    if content is None:
+        logger.error(f"Full rewrite of {filename} returned no content, keeping previous version.")
+    else:
+        files[filename] = content
+
+
+def _extract_file(raw: str, filename: str) -> str | None:
+    files = parse_generated_code_response(raw)
+    content = files.get(filename)
+    if content is None and len(files) == 1:
+        content = next(iter(files.values()))
+    return content if isinstance(content, str) and content.strip() else None
+
+
+def _merge_files(manifest: list[dict], contents: list[str | None]) -> dict[str, str]:
+    files = {}
+    failed = []
+    for entry, content in zip(manifest, contents):
+        if content is None:
+            failed.append(entry["filename"])
+        else:
+            files[entry["filename"]] = content
+    if failed:
+        logger.error(f"Could not generate {len(failed)} of {len(manifest)} files: {', '.join(failed)}")
+    return files
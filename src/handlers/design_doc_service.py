@@ -1,18 +1,38 @@
+import asyncio
+import contextvars
 import logging
-from typing import Callable
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, Optional
 
+from src.jobs.executor import JobCancelled, current_job
 from src.state.workflow_state import WorkflowState
-from src.utils.design_doc_parser import parse_design_doc_response
+from src.utils.design_doc_parser import parse_design_doc_response, parse_design_doc_result
+from src.utils.stream_parser import IncrementalJsonExtractor
+from src.vectorstore.clustering import cluster_texts
 
 logger = logging.getLogger(__name__)
 
-def handle_design_doc_generation(state: WorkflowState, llm_handler: Callable[[str, str], str]) -> WorkflowState:
+# "single" asks for both documents in one completion; "sections" generates the
+# functional and technical documents concurrently, each as an overview plus one
+# section per cluster of related user stories, and merges the sections locally.
+DESIGN_DOC_MODE = os.getenv("DEVPILOT_DESIGN_DOC_MODE", "single")
+MAX_PARALLEL_SECTIONS = int(os.getenv("DEVPILOT_DESIGN_DOC_CONCURRENCY", "8"))
+STORIES_PER_SECTION = int(os.getenv("DEVPILOT_DESIGN_DOC_CLUSTER_SIZE", "6"))
+MAX_SECTION_ATTEMPTS = int(os.getenv("DEVPILOT_DESIGN_DOC_SECTION_ATTEMPTS", "2"))
+
+DOCS = ("functional_doc", "technical_doc")
+
+def handle_design_doc_generation(state: WorkflowState, llm_handler: Callable[[str, str], str],
+                                 section_handler: Optional[Callable[[str, str, str], str]] = None) -> WorkflowState:
     """
     Calls LLM to generate design documentation based on requirement and user stories.
 
     Args:
         state: WorkflowState containing requirement and user stories
         llm_handler: function to send prompt and return raw LLM response (as string)
+        section_handler: function(requirement, user_stories, doc) returning one
+            document; re-requests only a document the response was cut off in
 
     Returns:
         Updated WorkflowState with functional and technical doc filled
@@ -24,13 +44,242 @@ def handle_design_doc_generation(state: WorkflowState, llm_handler: Callable[[st
         user_story_text = "\n".join([s.user_story for s in state.user_stories])
         raw_response = llm_handler(state.requirement, user_story_text)
 
-        parsed = parse_design_doc_response(raw_response)
+        parsed = recover_lost_docs(state.requirement, user_story_text, raw_response, section_handler)
+
+        state.design_doc.functional_doc = parsed.get("functional_doc", "")
+        state.design_doc.technical_doc = parsed.get("technical_doc", "")
+        state.design_doc.review_status = "Pending"
+        return state
+
+    except Exception as e:
+        logger.exception("Failed to generate design document.")
+        raise
+
+
+def handle_design_doc_streaming(state: WorkflowState, stream_handler: Callable[[str, str], Iterable[str]],
+                                on_section: Callable[[str, str], None],
+                                section_handler: Optional[Callable[[str, str, str], str]] = None) -> WorkflowState:
+    """
+    Streaming variant of `handle_design_doc_generation`.
+
+    Args:
+        state: WorkflowState containing requirement and user stories
+        stream_handler: function to send prompt and yield the LLM response in fragments
+        on_section: called with ("functional_doc" | "technical_doc", text) as soon as
+            each section has fully streamed in (or has been re-requested)
+        section_handler: as for `handle_design_doc_generation`
+
+    Returns:
+        Updated WorkflowState with functional and technical doc filled
+    """
+    if not state.requirement or not state.user_stories:
+        raise ValueError("Requirement or user stories missing in state.")
+
+    try:
+        user_story_text = "\n".join([s.user_story for s in state.user_stories])
+        extractor = IncrementalJsonExtractor()
+        for delta in stream_handler(state.requirement, user_story_text):
+            for key, value in extractor.feed(delta):
+                if key in ("functional_doc", "technical_doc") and isinstance(value, str):
+                    on_section(key, value)
+
+        parsed = recover_lost_docs(state.requirement, user_story_text, extractor.text, section_handler, on_section)
 
         state.design_doc.functional_doc = parsed.get("functional_doc", "")
         state.design_doc.technical_doc = parsed.get("technical_doc", "")
         state.design_doc.review_status = "Pending"
         return state
 
+    except JobCancelled:
+        raise
+    except Exception as e:
+        logger.exception("Failed to stream design document.")
+        raise
+
+
+def recover_lost_docs(requirement: str, user_story_text: str, raw_response: str,
+                      section_handler: Optional[Callable[[str, str, str], str]] = None,
+                      on_section: Optional[Callable[[str, str], None]] = None) -> dict:
+    """
+    Parses a design doc response; a document it was cut off in is requested
+    again on its own through `section_handler` (when given), keeping the other one.
+
+    Returns:
+        dict: { "functional_doc": str, "technical_doc": str }
+    """
+    docs, lost = parse_design_doc_result(raw_response)
+    for doc in lost if section_handler is not None else []:
+        _check_cancelled()
+        try:
+            content = _extract_section(section_handler(requirement, user_story_text, doc), doc)
+        except Exception as e:
+            logger.warning(f"Re-requesting the lost {doc} failed: {e}")
+            continue
+        if content is not None:
+            logger.info(f"Recovered the lost {doc} with a single-document request.")
+            docs[doc] = content
+            if on_section is not None:
+                on_section(doc, content)
+    return docs
+
+
+async def arecover_lost_docs(requirement: str, user_story_text: str, raw_response: str,
+                             asection_handler: Optional[Callable[[str, str, str], Awaitable[str]]] = None) -> dict:
+    """Async twin of `recover_lost_docs`."""
+    docs, lost = parse_design_doc_result(raw_response)
+    for doc in lost if asection_handler is not None else []:
+        try:
+            content = _extract_section(await asection_handler(requirement, user_story_text, doc), doc)
+        except Exception as e:
+            logger.warning(f"Re-requesting the lost {doc} failed: {e}")
+            continue
+        if content is not None:
+            logger.info(f"Recovered the lost {doc} with a single-document request.")
+            docs[doc] = content
+    return docs
+
+
+def handle_design_doc_by_sections(state: WorkflowState, ai_service,
+                                  on_section: Optional[Callable[[str, str], None]] = None) -> WorkflowState:
+    """
+    Sections-mode variant of `handle_design_doc_generation` (see
+    `generate_design_doc_by_sections`). `on_section` receives each merged document.
+    """
+    if not state.requirement or not state.user_stories:
+        raise ValueError("Requirement or user stories missing in state.")
+
+    try:
+        docs = generate_design_doc_by_sections(state.requirement, [s.user_story for s in state.user_stories], ai_service)
+        state.design_doc.functional_doc = docs["functional_doc"]
+        state.design_doc.technical_doc = docs["technical_doc"]
+        state.design_doc.review_status = "Pending"
+        if on_section is not None:
+            for doc in DOCS:
+                on_section(doc, docs[doc])
+        return state
+
+    except JobCancelled:
+        raise
     except Exception as e:
         logger.exception("Failed to generate design document.")
         raise
+
+
+def plan_design_doc_sections(user_stories: list[str], stories_per_section: int = STORIES_PER_SECTION) -> list[tuple]:
+    """
+    Splits design document generation into independent section requests.
+
+    Stories are clustered by similarity into groups of at most
+    `stories_per_section`. With a single group each document is one "full"
+    request; otherwise each document gets an "overview" request plus one "part"
+    request per group.
+
+    Returns:
+        list: (doc, scope, user_story_text) per request, in document order.
+    """
+    clusters = cluster_texts(user_stories, stories_per_section)
+    all_stories = "\n".join(user_stories)
+    if len(clusters) <= 1:
+        return [(doc, "full", all_stories) for doc in DOCS]
+    plan = []
+    for doc in DOCS:
+        plan.append((doc, "overview", all_stories))
+        plan.extend((doc, "part", "\n".join(user_stories[i] for i in cluster)) for cluster in clusters)
+    return plan
+
+
+def generate_design_doc_by_sections(requirement: str, user_stories: list[str], ai_service,
+                                    max_parallel: int = MAX_PARALLEL_SECTIONS,
+                                    max_attempts: int = MAX_SECTION_ATTEMPTS) -> dict[str, str]:
+    """
+    Generates both design documents from concurrent section requests (see
+    `plan_design_doc_sections`), at most `max_parallel` at a time, and joins each
+    document's sections in plan order. Latency follows the slowest section rather
+    than the total number of stories.
+
+    A section whose response cannot be parsed is retried up to `max_attempts`
+    times; sections that still fail are left out and logged.
+
+    Returns:
+        dict: { "functional_doc": str, "technical_doc": str }
+    """
+    plan = plan_design_doc_sections(user_stories)
+    logger.info(f"Generating {len(plan)} design doc sections with up to {max_parallel} in parallel.")
+
+    def generate(doc: str, scope: str, story_text: str) -> str | None:
+        for attempt in range(1, max_attempts + 1):
+            _check_cancelled()
+            try:
+                raw = ai_service.call_llm_for_design_doc_section(requirement, story_text, doc, scope)
+                content = _extract_section(raw, doc)
+                if content is not None:
+                    return content
+                logger.warning(f"Empty or unparsable {scope} section of {doc} (attempt {attempt}).")
+            except JobCancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Generating a {scope} section of {doc} failed (attempt {attempt}): {e}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        # Each task runs in a copy of the caller's context so its LLM calls are
+        # attributed to the caller's metrics span (and job).
+        futures = [pool.submit(contextvars.copy_context().run, generate, *section) for section in plan]
+        contents = [future.result() for future in futures]
+
+    return _merge_sections(plan, contents)
+
+
+async def agenerate_design_doc_by_sections(requirement: str, user_stories: list[str], ai_service,
+                                           max_parallel: int = MAX_PARALLEL_SECTIONS,
+                                           max_attempts: int = MAX_SECTION_ATTEMPTS) -> dict[str, str]:
+    """
+    Async twin of `generate_design_doc_by_sections`; concurrency is bounded by a semaphore.
+    """
+    plan = plan_design_doc_sections(user_stories)
+    logger.info(f"Generating {len(plan)} design doc sections with up to {max_parallel} in parallel.")
+
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def generate(doc: str, scope: str, story_text: str) -> str | None:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with semaphore:
+                    raw = await ai_service.acall_llm_for_design_doc_section(requirement, story_text, doc, scope)
+                content = _extract_section(raw, doc)
+                if content is not None:
+                    return content
+                logger.warning(f"Empty or unparsable {scope} section of {doc} (attempt {attempt}).")
+            except Exception as e:
+                logger.warning(f"Generating a {scope} section of {doc} failed (attempt {attempt}): {e}")
+        return None
+
+    contents = await asyncio.gather(*(generate(*section) for section in plan))
+    return _merge_sections(plan, contents)
+
+
+def _check_cancelled() -> None:
+    job = current_job()
+    if job is not None:
+        job.check_cancelled()
+
+
+def _extract_section(raw: str, doc: str) -> str | None:
+    content = parse_design_doc_response(raw).get(doc)
+    return content if isinstance(content, str) and content.strip() else None
+
+
+def _merge_sections(plan: list[tuple], contents: list[str | None]) -> dict[str, str]:
+    sections = {doc: [] for doc in DOCS}
+    failed = 0
+    for (doc, _, _), content in zip(plan, contents):
+        if content is None:
+            failed += 1
+        else:
+            sections[doc].append(content.strip())
+    if failed:
+        logger.error(f"Could not generate {failed} of {len(plan)} design doc sections.")
+    docs = {doc: "\n\n".join(parts) for doc, parts in sections.items()}
+    if not any(docs.values()):
+        raise ValueError("No design doc section could be generated.")
+    return docs
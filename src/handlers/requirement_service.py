@@ -7,19 +7,22 @@ from src.utils.user_story_parser import parse_user_stories_from_llm_response
 from pydantic import ValidationError
 
 import logging
-from typing import Callable 
+from typing import Callable, Optional
 import json
 
 logger = logging.getLogger(__name__)
 
 
-def handle_user_story_generation(state: WorkflowState, llm_handler: Callable[[WorkflowState], WorkflowState]) -> WorkflowState:
+def handle_user_story_generation(state: WorkflowState, llm_handler: Callable[[WorkflowState], WorkflowState],
+                                 on_story: Optional[Callable[[int, UserStoryModel], None]] = None) -> WorkflowState:
     """
     Handles the user story generation from a requirement in the workflow state.
 
     Args:
         requirement (str): The software requirement text to process.
         llm_handler (function): Function to process the workflow and return updated state.
+        on_story (function, optional): Passed through to `llm_handler` to receive each
+            user story as soon as it has streamed in.
 
     Returns:
         WorkflowState: Updated state with user stories populated.
@@ -28,7 +31,10 @@ def handle_user_story_generation(state: WorkflowState, llm_handler: Callable[[Wo
         raise ValueError("Requirement is missing in state.")
 
     try:
-        raw_response = llm_handler(WorkflowState(requirement=state.requirement))
+        if on_story is not None:
+            raw_response = llm_handler(WorkflowState(requirement=state.requirement), on_story=on_story)
+        else:
+            raw_response = llm_handler(WorkflowState(requirement=state.requirement))
         if isinstance(raw_response, WorkflowState):
             return raw_response
 
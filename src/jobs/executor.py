@@ -0,0 +1,241 @@
+# src/jobs/executor.py
+
+"""
+Process-wide background job executor.
+
+Handlers submit slow work (LLM round trips) as jobs instead of running it on the
+Streamlit script thread. Each job gets an id; callers poll its status and
+progress, request cancellation and collect its result. Finished jobs are kept
+for DEVPILOT_JOB_RESULT_TTL seconds so a session that reruns or reconnects can
+still pick up the result.
+
+Work runs in the submitter's contextvars context, so metric spans and traces
+recorded by the job attach to the caller's run.
+
+Cancellation is cooperative: a queued job never starts, and a running job stops
+at its next `Job.check_cancelled()` / `Job.report()` call (e.g. between streamed
+user stories); a result that arrives after cancellation is discarded.
+"""
+
+import contextvars
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.utils.logger import Logger
+from src.utils.metrics import registry
+
+logger = Logger(__name__)
+
+MAX_WORKERS = int(os.getenv("DEVPILOT_JOB_WORKERS", "8"))
+RESULT_TTL_SECONDS = float(os.getenv("DEVPILOT_JOB_RESULT_TTL", "3600"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("devpilot_job", default=None)
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> "JobExecutor":
+    """
+    Returns the process-wide JobExecutor, creating it on first use.
+    """
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                _shared_executor = JobExecutor()
+    return _shared_executor
+
+
+def current_job() -> Optional["Job"]:
+    """The job the calling code runs in, or None outside a job."""
+    return _current_job.get()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation was requested."""
+
+
+class Job:
+    """
+    One submitted unit of work.
+
+    Attributes:
+        id (str): Job id.
+        name (str): What the job does, e.g. "generate user stories".
+        status (str): queued | running | succeeded | failed | cancelled.
+        progress (list): Progress items reported by the job, in order.
+        result: Return value of the work once it succeeded.
+        error (str): "ExceptionType: message" once it failed.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.progress: list = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_requested = threading.Event()
+        self._future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raises JobCancelled if cancellation was requested."""
+        if self._cancel_requested.is_set():
+            raise JobCancelled(f"Job {self.name} ({self.id}) was cancelled.")
+
+    def report(self, item: Any) -> None:
+        """Appends a progress item (e.g. a streamed user story) and honours cancellation."""
+        self.check_cancelled()
+        self.progress.append(item)
+
+    def wait(self, timeout: Optional[float] = None) -> "Job":
+        """Blocks until the job has finished (or `timeout` seconds passed)."""
+        if self._future is not None:
+            try:
+                self._future.exception(timeout=timeout)
+            except Exception:
+                pass  # Cancelled before it started, or timed out; status tells which.
+        return self
+
+    def snapshot(self) -> dict:
+        """Status for polling, without the result itself."""
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": len(self.progress),
+            "error": self.error,
+            "elapsed_s": round(end - (self.started_at or end), 3),
+            "queued_s": round((self.started_at or end) - self.created_at, 3),
+        }
+
+
+class JobExecutor:
+    """
+    Bounded thread pool plus a registry of jobs by id.
+
+    Args:
+        max_workers (int): Jobs that can run at the same time.
+        result_ttl (float): Seconds a finished job (and its result) is kept.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, result_ttl: float = RESULT_TTL_SECONDS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.result_ttl = result_ttl
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queues `fn(*args, **kwargs)` as a job. Inside `fn`, `current_job()`
+        returns the job for progress reporting and cancellation checks.
+
+        Returns:
+            Job: The queued job; keep its `id` to poll it later.
+        """
+        self._prune()
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+        context = contextvars.copy_context()
+        job._future = self._pool.submit(context.run, self._run, job, fn, args, kwargs)
+        self._update_gauges()
+        logger.info(f"Queued job {name} ({job.id}).")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Requests cancellation. Returns False if the job is unknown or already finished.
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job._cancel_requested.set()
+        if job._future is not None and job._future.cancel():
+            self._finish(job, CANCELLED)
+        logger.info(f"Cancellation requested for job {job.name} ({job.id}).")
+        return True
+
+    def forget(self, job_id: str) -> None:
+        """Drops a job and its result once the caller has consumed it."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._update_gauges()
+        token = _current_job.set(job)
+        try:
+            result = fn(*args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.exception = e
+            job.error = f"{type(e).__name__}: {e}"
+            logger.exception(f"Job {job.name} ({job.id}) failed.")
+            self._finish(job, FAILED)
+        else:
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+            else:
+                job.result = result
+                self._finish(job, SUCCEEDED)
+        finally:
+            _current_job.reset(token)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        if job.started_at is not None:
+            registry.observe("devpilot_job_duration_seconds", job.finished_at - job.started_at, job=job.name)
+        registry.increment("devpilot_jobs_total", job=job.name, status=status)
+        self._update_gauges()
+        logger.info(f"Job {job.name} ({job.id}) {status}.")
+
+    def _update_gauges(self) -> None:
+        jobs = self.jobs()
+        registry.set_gauge("devpilot_jobs_queued", sum(job.status == QUEUED for job in jobs))
+        registry.set_gauge("devpilot_jobs_running", sum(job.status == RUNNING for job in jobs))
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
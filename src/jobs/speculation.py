@@ -0,0 +1,189 @@
+# src/jobs/speculation.py
+
+"""
+Speculative design document generation.
+
+While the product owner reviews freshly generated user stories, the design
+document for those stories is generated in the background. When the stories are
+approved unchanged the finished (or still running) job is claimed, so the design
+document is ready at once; when feedback changes them the job is cancelled
+mid-stream or its result discarded.
+
+Speculation is opt-in (DEVPILOT_SPECULATIVE_DESIGN_DOC=1) and capped by a
+process-wide budget of wasted tokens per rolling hour
+(DEVPILOT_SPECULATION_WASTE_BUDGET); once the budget is spent no new
+speculation starts until older waste ages out.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from src.handlers.design_doc_service import DESIGN_DOC_MODE, handle_design_doc_by_sections, handle_design_doc_streaming
+from src.jobs.executor import SUCCEEDED, Job, current_job, get_job_executor
+from src.llms.openai_helper import get_openai_service
+from src.llms.token_budget import count_tokens
+from src.state.workflow_state import WorkflowState
+from src.utils.logger import Logger
+from src.utils.metrics import registry
+
+logger = Logger(__name__)
+
+ENABLED = os.getenv("DEVPILOT_SPECULATIVE_DESIGN_DOC", "0").strip().lower() in ("1", "on", "true", "yes")
+WASTE_BUDGET_TOKENS = int(os.getenv("DEVPILOT_SPECULATION_WASTE_BUDGET", "50000"))
+WASTE_WINDOW_SECONDS = 3600.0
+
+JOB_NAME = "speculate design doc"
+TOKEN_MODEL = "gpt-3.5-turbo"
+CHARS_PER_TOKEN = 4  # Streamed output is metered approximately, without tokenizing it.
+
+_shared_budget = None
+_shared_budget_lock = threading.Lock()
+
+
+def get_waste_budget() -> "WasteBudget":
+    """
+    Returns the process-wide WasteBudget, creating it on first use.
+    """
+    global _shared_budget
+    if _shared_budget is None:
+        with _shared_budget_lock:
+            if _shared_budget is None:
+                _shared_budget = WasteBudget()
+    return _shared_budget
+
+
+def design_doc_fingerprint(state: WorkflowState) -> str:
+    """Identity of the inputs of a design document prompt: the requirement and the story texts."""
+    stories = "\n".join(s.user_story for s in state.user_stories or [])
+    return hashlib.blake2b(f"{state.requirement}\0{stories}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class WasteBudget:
+    """
+    Tokens spent on speculation whose result was thrown away, over a rolling window.
+
+    Args:
+        max_tokens (int): Wasted tokens allowed per window; 0 allows none.
+        window (float): Window length in seconds.
+    """
+
+    def __init__(self, max_tokens: int = WASTE_BUDGET_TOKENS, window: float = WASTE_WINDOW_SECONDS):
+        self.max_tokens = max_tokens
+        self.window = window
+        self._entries: deque = deque()
+        self._lock = threading.Lock()
+
+    def wasted(self) -> int:
+        with self._lock:
+            cutoff = time.monotonic() - self.window
+            while self._entries and self._entries[0][0] < cutoff:
+                self._entries.popleft()
+            return sum(tokens for _, tokens in self._entries)
+
+    def allows(self) -> bool:
+        return self.wasted() < self.max_tokens
+
+    def record(self, tokens: int) -> None:
+        with self._lock:
+            self._entries.append((time.monotonic(), tokens))
+        registry.increment("devpilot_speculation_wasted_tokens_total", amount=tokens)
+
+
+class Speculation:
+    """
+    A design document generated ahead of approval for one set of user stories.
+
+    Attributes:
+        fingerprint (str): `design_doc_fingerprint` of the stories it was started for.
+        job (Job): The background job; its result is the state with the design document.
+        prompt_tokens (int): Approximate prompt size, for waste accounting.
+        streamed_chars (int): Output received so far.
+    """
+
+    def __init__(self, fingerprint: str, prompt_tokens: int):
+        self.fingerprint = fingerprint
+        self.prompt_tokens = prompt_tokens
+        self.streamed_chars = 0
+        self.job: Optional[Job] = None
+
+    def matches(self, state: WorkflowState) -> bool:
+        return self.fingerprint == design_doc_fingerprint(state)
+
+    def claim(self, state: WorkflowState) -> Optional[Job]:
+        """
+        The job to use for `state`'s design document, or None if the speculation
+        does not match the stories (it is then discarded) or has failed.
+        """
+        if not self.matches(state):
+            self.discard("stories changed")
+            return None
+        if self.job.done and self.job.status != SUCCEEDED:
+            get_job_executor().forget(self.job.id)
+            registry.increment("devpilot_speculation_total", outcome=self.job.status)
+            return None
+        registry.increment("devpilot_speculation_total", outcome="hit" if self.job.done else "hit_running")
+        logger.info(f"Using speculative design document ({self.job.status}).")
+        return self.job
+
+    def discard(self, reason: str) -> None:
+        """Cancels the job if it is still running and books what it spent as waste."""
+        running = not self.job.done
+        if running:
+            get_job_executor().cancel(self.job.id)
+        outcome = "cancelled" if running else "discarded"
+        get_job_executor().forget(self.job.id)
+        wasted = self.prompt_tokens + self.streamed_chars // CHARS_PER_TOKEN
+        get_waste_budget().record(wasted)
+        registry.increment("devpilot_speculation_total", outcome=outcome)
+        logger.info(f"Speculative design document {outcome} ({reason}); ~{wasted} tokens wasted.")
+
+
+def speculate_design_doc(state: WorkflowState) -> Optional[Speculation]:
+    """
+    Starts generating the design document for `state`'s user stories in the
+    background, if speculation is enabled and the waste budget allows it.
+    """
+    if not ENABLED or not state.requirement or not state.user_stories:
+        return None
+    if not get_waste_budget().allows():
+        registry.increment("devpilot_speculation_total", outcome="skipped_budget")
+        logger.info("Speculation waste budget is spent; not pre-generating the design document.")
+        return None
+
+    stories = "\n".join(s.user_story for s in state.user_stories)
+    speculation = Speculation(design_doc_fingerprint(state), count_tokens(f"{state.requirement}\n{stories}", TOKEN_MODEL))
+    snapshot = WorkflowState(requirement=state.requirement, user_stories=list(state.user_stories))
+    speculation.job = get_job_executor().submit(JOB_NAME, _generate, snapshot, speculation)
+    registry.increment("devpilot_speculation_total", outcome="started")
+    return speculation
+
+
+def _generate(state: WorkflowState, speculation: Speculation) -> WorkflowState:
+    """Job body: streams the design document, stopping as soon as the job is cancelled."""
+    job = current_job()
+    ai_service = get_openai_service()
+    if DESIGN_DOC_MODE == "sections":
+        # Section requests are not streamed; cancellation is checked before each one.
+        def on_section(section: str, text: str) -> None:
+            speculation.streamed_chars += len(text)
+            job.report(section)
+
+        return handle_design_doc_by_sections(state, ai_service, on_section)
+
+    def stream(requirement: str, user_stories: str) -> Iterator[str]:
+        for delta in _metered(ai_service.stream_llm_for_design_doc(requirement, user_stories), speculation):
+            job.check_cancelled()
+            yield delta
+
+    return handle_design_doc_streaming(state, stream, lambda section, text: job.report(section),
+                                       ai_service.call_llm_for_design_doc_section)
+
+
+def _metered(deltas: Iterable[str], speculation: Speculation) -> Iterator[str]:
+    for delta in deltas:
+        speculation.streamed_chars += len(delta)
+        yield delta
@@ -0,0 +1,128 @@
+# src/llms/cassette.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from itertools import count
+from typing import Optional
+
+from src.llms.response_cache import make_cache_key
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+# Request fields that determine a completion; transport options such as
+# `stream` are ignored so streamed and non-streamed calls match the same entry.
+_MATCH_FIELDS = ("model", "messages", "response_format", "temperature", "max_tokens")
+
+
+def request_key(request: dict) -> str:
+    """Key of a chat completion request for exact cassette matching."""
+    return make_cache_key({field: request.get(field) for field in _MATCH_FIELDS})
+
+
+def prompt_family(request: dict) -> str:
+    """
+    Key shared by requests built from the same prompt template: the hash of the
+    system message. Used to replay a recorded answer for a different requirement.
+    """
+    messages = request.get("messages") or []
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    return hashlib.sha256(str(system).encode("utf-8")).hexdigest()[:16]
+
+
+class CassetteRecorder:
+    """
+    Appends real chat completion exchanges to a JSONL cassette, one per line:
+
+        {"key", "family", "context", "request", "response": {"content", "usage",
+         "finish_reason"}, "latency_ms", "recorded_at"}
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["CassetteRecorder"]:
+        """Returns a recorder for DEVPILOT_CASSETTE_RECORD, or None when recording is off."""
+        path = os.getenv("DEVPILOT_CASSETTE_RECORD", "").strip()
+        if not path:
+            return None
+        logger.info(f"Recording OpenAI exchanges to {path}.")
+        return cls(path)
+
+    def record(self, context: str, request: dict, content: str, call: dict, latency_ms: float) -> None:
+        """
+        Args:
+            context (str): Call context (e.g. "generate user stories").
+            request (dict): Request payload sent to the API.
+            content (str): Completion content.
+            call (dict): Metrics span attributes holding usage and finish reason.
+            latency_ms (float): Time from sending the request to the full response.
+        """
+        entry = {
+            "key": request_key(request),
+            "family": prompt_family(request),
+            "context": context,
+            "request": request,
+            "response": {
+                "content": content,
+                "usage": {
+                    "prompt_tokens": call.get("prompt_tokens"),
+                    "completion_tokens": call.get("completion_tokens"),
+                },
+                "finish_reason": call.get("finish_reason", "stop"),
+            },
+            "latency_ms": round(latency_ms, 3),
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class Cassette:
+    """
+    Recorded exchanges loaded for replay. `match` prefers an exact request match,
+    then cycles through recordings of the same prompt family.
+    """
+
+    def __init__(self, entries: list[dict]):
+        self.entries = entries
+        self._by_key = {entry["key"]: entry for entry in entries}
+        self._by_family: dict[str, list[dict]] = defaultdict(list)
+        for entry in entries:
+            self._by_family[entry.get("family") or prompt_family(entry.get("request", {}))].append(entry)
+        self._cursor = count()
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # A partially written last line.
+        logger.info(f"Loaded {len(entries)} recorded exchanges from {path}.")
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, request: dict) -> Optional[dict]:
+        exact = self._by_key.get(request_key(request))
+        if exact is not None:
+            return exact
+        family = self._by_family.get(prompt_family(request))
+        if family:
+            return family[next(self._cursor) % len(family)]
+        return None
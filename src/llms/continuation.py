@@ -0,0 +1,73 @@
+# src/llms/continuation.py
+
+import os
+
+from src.utils.json_extract import has_complete_json
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+# Follow-up requests allowed after a completion stops at its token limit, and the
+# completion tokens they may spend in total. Set DEVPILOT_MAX_CONTINUATIONS=0 to disable.
+MAX_CONTINUATIONS = int(os.getenv("DEVPILOT_MAX_CONTINUATIONS", "3"))
+CONTINUATION_TOKEN_BUDGET = int(os.getenv("DEVPILOT_CONTINUATION_TOKEN_BUDGET", "8192"))
+
+# A continuation shorter than this is not worth a request.
+MIN_CONTINUATION_TOKENS = 256
+
+# How far back a continuation is checked for text it repeated from the partial
+# output, and the shortest repeat that is treated as one rather than a coincidence.
+OVERLAP_WINDOW = 400
+MIN_OVERLAP = 8
+
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off by the length limit. Continue it exactly where it stopped. "
+    "Output only the remaining characters: do not repeat anything already written, and do not "
+    "add a code fence, a preamble or any commentary."
+)
+
+
+def should_continue(finish_reason: str | None, content: str) -> bool:
+    """
+    True when a completion was cut off by its token limit and the output so far
+    does not already hold a complete JSON payload.
+    """
+    if finish_reason != "length" or not content:
+        return False
+    return not has_complete_json(content)
+
+
+def continuation_messages(messages: list[dict], partial: str) -> list[dict]:
+    """
+    Messages for a follow-up request: the original prompt, the partial output as
+    the assistant's turn and an instruction to carry on from its last character.
+    """
+    return [
+        *messages,
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_PROMPT},
+    ]
+
+
+def stitch(partial: str, piece: str) -> str:
+    """
+    Returns the part of a continuation to append to the partial output: a code
+    fence the model opened anyway and any text it repeated from the end of the
+    partial output are dropped.
+
+    Args:
+        partial (str): Output so far.
+        piece (str): Continuation content.
+
+    Returns:
+        str: Text to append to `partial`.
+    """
+    if piece.lstrip().startswith("```"):
+        newline = piece.find("\n")
+        piece = piece[newline + 1:] if newline >= 0 else ""
+
+    for size in range(min(len(partial), len(piece), OVERLAP_WINDOW), MIN_OVERLAP - 1, -1):
+        if partial.endswith(piece[:size]):
+            logger.debug("Dropped %d characters the continuation repeated.", size)
+            return piece[size:]
+    return piece
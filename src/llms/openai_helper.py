@@ -1,75 +1,660 @@
 # src/llms/openai_helper.py
+import asyncio
 import os
+import threading
+import time
+import weakref
+from typing import Iterator
 
-from openai import OpenAI  # type: ignore
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI  # type: ignore
 
 from src.prompts.user_story_prompt import generate_user_story_prompt
 from src.prompts.revision_prompt import generate_revision_prompt
-from src.prompts.design_doc_prompt import generate_design_doc_prompt
-from src.prompts.code_generation_prompt import generate_code_generation_prompt
+from src.prompts.feedback_summary_prompt import generate_feedback_summary_prompt
+from src.prompts.design_doc_prompt import generate_design_doc_prompt, generate_design_doc_section_prompt
+from src.prompts.code_generation_prompt import (
+    generate_code_generation_prompt,
+    generate_code_manifest_prompt,
+    generate_code_file_prompt,
+    generate_code_revision_prompt,
+    generate_code_file_rewrite_prompt,
+)
+from src.llms.cassette import CassetteRecorder
+from src.llms.rate_limiter import RequestScheduler, get_request_scheduler
+from src.llms.continuation import (
+    CONTINUATION_TOKEN_BUDGET,
+    MAX_CONTINUATIONS,
+    MIN_CONTINUATION_TOKENS,
+    OVERLAP_WINDOW,
+    continuation_messages,
+    should_continue,
+    stitch,
+)
+from src.llms.response_cache import ResponseCache, make_cache_key
+from src.llms.single_flight import SingleFlight
+from src.llms.token_budget import PromptTooLargeError, fit_request
+from src.vectorstore.retrieval import find_similar_examples
 from src.utils.logger import Logger
+from src.utils.metrics import record_span, span
 
 logger = Logger(__name__)
 
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+# Keep-alive connection pool shared by every request made through one client.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=120.0)
+
+
+def get_openai_service() -> "OpenAIService":
+    """
+    Returns the process-wide OpenAIService, creating it on first use.
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = OpenAIService()
+    return _shared_service
+
+
 class OpenAIService:
-    def __init__(self):
+    MODEL = "gpt-3.5-turbo-1106"
+    # Cheaper model for housekeeping calls such as feedback summaries.
+    SUMMARY_MODEL = os.getenv("DEVPILOT_SUMMARY_MODEL", "gpt-4o-mini")
+    TEMPERATURE = 0.7
+
+    def __init__(self, cache: ResponseCache | None = None, recorder: CassetteRecorder | None = None,
+                 scheduler: RequestScheduler | None = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             logger.error("OpenAI API key is not set. Please set the 'OPENAI_API_KEY' environment variable.")
             raise ValueError("Missing OpenAI API key.")
-        
+
+        self._api_key = api_key
         try:
-            self.client = OpenAI(api_key=api_key)
+            # Retries are left to the scheduler, which also paces them across sessions.
+            self.client = OpenAI(api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(limits=HTTP_LIMITS))
         except Exception as e:
             logger.exception(f"Failed to initialize OpenAI client: {e}")
             raise
 
+        # httpx async pools are bound to the event loop that opened them,
+        # so one AsyncOpenAI client is kept per running loop.
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
+        self._warmed_up = False
+
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        # Contexts listed here (comma-separated, e.g. "revise user stories") never use the cache.
+        self.cache_opt_out = {
+            c.strip() for c in os.getenv("DEVPILOT_LLM_CACHE_SKIP", "").split(",") if c.strip()
+        }
+        # Captures real request/response pairs for replay by the load-test server.
+        self.recorder = recorder if recorder is not None else CassetteRecorder.from_env()
+        # Shared RPM/TPM limits and retries for every request of the process.
+        self.scheduler = scheduler if scheduler is not None else get_request_scheduler()
+        # Identical requests in flight at the same time share one API call.
+        self.flights = SingleFlight()
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client for the currently running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(
+                    api_key=self._api_key, max_retries=0, http_client=DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+                )
+                self._async_clients[loop] = client
+            return client
+
+
+    def warm_up(self) -> None:
+        """
+        Opens a pooled connection to the API ahead of the first real request so the
+        TLS handshake is not paid inside a user interaction. Safe to call repeatedly.
+        """
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+        try:
+            self.client.models.list()
+            logger.info("OpenAI client warmed up.")
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up request failed: {e}")
+
+
     def call_llm_for_user_stories(self, requirement: str) -> str:
-        messages = generate_user_story_prompt(requirement)
+        messages = generate_user_story_prompt(requirement, find_similar_examples("user_stories", requirement))
         return self._call_openai_chat(messages, context="generate user stories")
 
 
-    def revise_user_stories(self, requirement: str, feedback: str) -> str:
-        messages = generate_revision_prompt(requirement, feedback)
+    def revise_user_stories(self, requirement: str, feedback: str, changes: list[str] | None = None) -> str:
+        messages = generate_revision_prompt(requirement, feedback, changes)
         return self._call_openai_chat(messages, context="revise user stories")
+
+
+    def summarize_feedback(self, changes: list[str]) -> str:
+        messages = generate_feedback_summary_prompt(changes)
+        return self._call_openai_chat(messages, context="summarize feedback", model=self.SUMMARY_MODEL)
     
 
     def call_llm_for_design_doc(self, requirement: str, user_stories: str) -> str:
-        messages = generate_design_doc_prompt(requirement, user_stories)
+        examples = find_similar_examples("design_doc", requirement)
+        messages = generate_design_doc_prompt(requirement, user_stories, examples)
         return self._call_openai_chat(messages, context="generate design doc")
 
 
+    def call_llm_for_design_doc_section(self, requirement: str, user_stories: str, doc: str,
+                                        scope: str = "full") -> str:
+        # Part sections carry no examples, so skip the lookup.
+        examples = find_similar_examples("design_doc", requirement) if scope != "part" else []
+        messages = generate_design_doc_section_prompt(requirement, user_stories, doc, scope, examples)
+        return self._call_openai_chat(messages, context="generate design doc section")
+
+
     def call_llm_for_code_generation(self, design_doc: str) -> str:
-        messages = generate_code_generation_prompt(design_doc)
+        messages = generate_code_generation_prompt(design_doc, find_similar_examples("code", design_doc))
         return self._call_openai_chat(messages, context="generate code")
 
 
-    def _call_openai_chat(self, messages: list[dict], context: str) -> str:
+    def call_llm_for_code_manifest(self, design_doc: str) -> str:
+        messages = generate_code_manifest_prompt(design_doc, find_similar_examples("code", design_doc))
+        return self._call_openai_chat(messages, context="plan code files")
+
+
+    def call_llm_for_code_file(self, design_doc: str, manifest: list[dict], file_entry: dict) -> str:
+        messages = generate_code_file_prompt(design_doc, manifest, file_entry)
+        return self._call_openai_chat(messages, context="generate code file")
+
+
+    def revise_code(self, files: dict[str, str], feedback: str) -> str:
+        messages = generate_code_revision_prompt(files, feedback)
+        return self._call_openai_chat(messages, context="revise code")
+
+
+    def rewrite_code_file(self, filename: str, content: str, feedback: str) -> str:
+        messages = generate_code_file_rewrite_prompt(filename, content, feedback)
+        return self._call_openai_chat(messages, context="rewrite code file")
+
+
+    def stream_llm_for_user_stories(self, requirement: str) -> Iterator[str]:
+        messages = generate_user_story_prompt(requirement, find_similar_examples("user_stories", requirement))
+        return self._stream_openai_chat(messages, context="generate user stories")
+
+
+    def stream_llm_for_design_doc(self, requirement: str, user_stories: str) -> Iterator[str]:
+        examples = find_similar_examples("design_doc", requirement)
+        messages = generate_design_doc_prompt(requirement, user_stories, examples)
+        return self._stream_openai_chat(messages, context="generate design doc")
+
+
+    def stream_llm_for_code_generation(self, design_doc: str) -> Iterator[str]:
+        messages = generate_code_generation_prompt(design_doc, find_similar_examples("code", design_doc))
+        return self._stream_openai_chat(messages, context="generate code")
+
+
+    async def acall_llm_for_user_stories(self, requirement: str) -> str:
+        messages = generate_user_story_prompt(requirement, find_similar_examples("user_stories", requirement))
+        return await self._acall_openai_chat(messages, context="generate user stories")
+
+
+    async def arevise_user_stories(self, requirement: str, feedback: str, changes: list[str] | None = None) -> str:
+        messages = generate_revision_prompt(requirement, feedback, changes)
+        return await self._acall_openai_chat(messages, context="revise user stories")
+
+
+    async def asummarize_feedback(self, changes: list[str]) -> str:
+        messages = generate_feedback_summary_prompt(changes)
+        return await self._acall_openai_chat(messages, context="summarize feedback", model=self.SUMMARY_MODEL)
+
+
+    async def acall_llm_for_design_doc(self, requirement: str, user_stories: str) -> str:
+        examples = find_similar_examples("design_doc", requirement)
+        messages = generate_design_doc_prompt(requirement, user_stories, examples)
+        return await self._acall_openai_chat(messages, context="generate design doc")
+
+
+    async def acall_llm_for_design_doc_section(self, requirement: str, user_stories: str, doc: str,
+                                               scope: str = "full") -> str:
+        # Part sections carry no examples, so skip the lookup.
+        examples = find_similar_examples("design_doc", requirement) if scope != "part" else []
+        messages = generate_design_doc_section_prompt(requirement, user_stories, doc, scope, examples)
+        return await self._acall_openai_chat(messages, context="generate design doc section")
+
+
+    async def acall_llm_for_code_generation(self, design_doc: str) -> str:
+        messages = generate_code_generation_prompt(design_doc, find_similar_examples("code", design_doc))
+        return await self._acall_openai_chat(messages, context="generate code")
+
+
+    async def acall_llm_for_code_manifest(self, design_doc: str) -> str:
+        messages = generate_code_manifest_prompt(design_doc, find_similar_examples("code", design_doc))
+        return await self._acall_openai_chat(messages, context="plan code files")
+
+
+    async def acall_llm_for_code_file(self, design_doc: str, manifest: list[dict], file_entry: dict) -> str:
+        messages = generate_code_file_prompt(design_doc, manifest, file_entry)
+        return await self._acall_openai_chat(messages, context="generate code file")
+
+
+    async def arevise_code(self, files: dict[str, str], feedback: str) -> str:
+        messages = generate_code_revision_prompt(files, feedback)
+        return await self._acall_openai_chat(messages, context="revise code")
+
+
+    async def arewrite_code_file(self, filename: str, content: str, feedback: str) -> str:
+        messages = generate_code_file_rewrite_prompt(filename, content, feedback)
+        return await self._acall_openai_chat(messages, context="rewrite code file")
+
+
+    def _call_openai_chat(self, messages: list[dict], context: str, use_cache: bool = True,
+                          model: str | None = None) -> str:
         """
         Internal helper to call OpenAI's chat completion API.
-        
+
+        Identical requests are answered from the on-disk response cache unless
+        `use_cache` is False or the context is listed in `cache_opt_out`. A
+        completion cut off by its token limit is continued with follow-up
+        requests (see `_continue`) and returned stitched together. A request
+        identical to one already in flight waits for that call's result (or
+        error) instead of being sent again.
+
         Args:
             messages (list): Chat prompt messages.
             context (str): Used for logging (e.g., "generate user story", "revise").
+            use_cache (bool): Set to False to always call the API for this request.
+            model (str): Model to use instead of MODEL.
 
         Returns:
             str: Content string from OpenAI response.
         """
+        with span("llm", context) as call:
+            request, cache_key, cached = self._prepare_request(messages, context, use_cache, call, model)
+            if cached is not None:
+                return cached
+
+            try:
+                return self.flights.do(
+                    _flight_key(request, cache_key),
+                    lambda: self._complete(request, context, cache_key, call),
+                    on_wait=lambda: self._coalesced(context, call),
+                )
+
+            except Exception as e:
+                logger.exception(f"Failed to {context} via OpenAI.")
+                raise
+
+
+    def _stream_openai_chat(self, messages: list[dict], context: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Streaming variant of `_call_openai_chat` that yields content deltas as they arrive.
+
+        A cached response is yielded as a single delta, and so is the result of
+        an identical call already in flight. A stream cut off by its token limit
+        carries on with the deltas of streamed continuations. The complete
+        content is stored in the cache once the stream finishes.
+
+        Args:
+            messages (list): Chat prompt messages.
+            context (str): Used for logging (e.g., "generate user story", "revise").
+            use_cache (bool): Set to False to always call the API for this request.
+
+        Yields:
+            str: Content fragments in arrival order.
+        """
+        # A generator cannot hold a metrics span open across yields (the span
+        # would leak into the consumer's context), so the call is recorded on completion.
+        started = time.perf_counter()
+        call = {"stream": True}
+        request, cache_key, cached = self._prepare_request(messages, context, use_cache, call)
+        if cached is not None:
+            record_span("llm", context, started, **call)
+            yield cached
+            return
+
+        key = _flight_key(request, cache_key)
+        flight, leader = self.flights.join(key)
+        if not leader:
+            self._coalesced(context, call)
+            try:
+                content = flight.result()
+            except Exception:
+                record_span("llm", context, started, status="error", **call)
+                raise
+            record_span("llm", context, started, **call)
+            yield content
+            return
+
+        content = error = None
         try:
-            logger.info(f"Calling OpenAI to {context}...")
-
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo-1106",
-                messages=messages,
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=500,
-            )
+            logger.info(f"Streaming OpenAI response to {context}...")
+            sent = time.perf_counter()
+            stream = self._open_stream(request, call)
+
+            parts = []
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self.scheduler.settle(request, _record_usage(call, chunk))
+                if not chunk.choices:
+                    continue
+                if "first_token_ms" not in call:
+                    call["first_token_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                if chunk.choices[0].finish_reason:
+                    call["finish_reason"] = chunk.choices[0].finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
 
-            content = response.choices[0].message.content.strip()
-            logger.info(f"Received OpenAI response for {context}.")
-            return content
+            content = yield from self._stream_continue(request, "".join(parts), context, call)
+            content = content.strip()
+            logger.info(f"Finished streaming OpenAI response for {context}.")
+            if cache_key and content and call.get("finish_reason") != "length":
+                self.cache.set(cache_key, content, context=context)
+            self._record_exchange(context, request, content, call, sent)
+            record_span("llm", context, started, **call)
 
         except Exception as e:
+            error = e
             logger.exception(f"Failed to {context} via OpenAI.")
+            record_span("llm", context, started, status="error", **call)
             raise
+        finally:
+            if content is None and error is None:
+                error = RuntimeError(f"The OpenAI stream for {context} was closed before it finished.")
+            self.flights.finish(key, flight, content, error)
+
+
+    async def _acall_openai_chat(self, messages: list[dict], context: str, use_cache: bool = True,
+                                 model: str | None = None) -> str:
+        """
+        Async twin of `_call_openai_chat`, backed by the `AsyncOpenAI` client.
+        """
+        with span("llm", context) as call:
+            request, cache_key, cached = self._prepare_request(messages, context, use_cache, call, model)
+            if cached is not None:
+                return cached
+
+            try:
+                return await self.flights.ado(
+                    _flight_key(request, cache_key),
+                    lambda: self._acomplete(request, context, cache_key, call),
+                    on_wait=lambda: self._coalesced(context, call),
+                )
+
+            except Exception as e:
+                logger.exception(f"Failed to {context} via OpenAI.")
+                raise
+
+
+    def _prepare_request(self, messages: list[dict], context: str, use_cache: bool,
+                         call: dict | None = None, model: str | None = None) -> tuple[dict, str | None, str | None]:
+        """
+        Builds the request payload and looks it up in the response cache.
+
+        `max_tokens` is sized per context from the prompt's token count (see
+        `token_budget.fit_request`), and oversized prompts are trimmed or refused.
+        `call` (the metrics span attributes) receives the time spent before the
+        request can be sent and whether it was served from the cache.
+        """
+        started = time.perf_counter()
+        model = model or self.MODEL
+        messages, max_tokens, prompt_tokens = fit_request(messages, context, model)
+        logger.debug("Prompt for %s: %d tokens, max_tokens=%d.", context, prompt_tokens, max_tokens)
+        request = {
+            "model": model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            "temperature": self.TEMPERATURE,
+            "max_tokens": max_tokens,
+        }
+        cacheable = use_cache and context not in self.cache_opt_out
+        cache_key = make_cache_key(request) if cacheable else None
+
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            logger.info(f"Using cached OpenAI response for {context}.")
+        if call is not None:
+            call["queue_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            call["cached"] = cached is not None
+        return request, cache_key, cached
+
+
+    def _record_exchange(self, context: str, request: dict, content: str, call: dict, sent: float) -> None:
+        if self.recorder is None:
+            return
+        try:
+            self.recorder.record(context, request, content, call, (time.perf_counter() - sent) * 1000)
+        except OSError as e:
+            logger.warning(f"Could not record OpenAI exchange for {context}: {e}")
+
+
+    def _complete(self, request: dict, context: str, cache_key: str | None, call: dict) -> str:
+        """Sends a request, continues it if truncated, caches and records the result."""
+        logger.info(f"Calling OpenAI to {context}...")
+        sent = time.perf_counter()
+        response, _ = self._create(request, call)
+        content = self._continue(request, response.choices[0].message.content or "", context, call)
+        content = self._handle_response(content, context, cache_key, call)
+        self._record_exchange(context, request, content, call, sent)
+        return content
+
+
+    async def _acomplete(self, request: dict, context: str, cache_key: str | None, call: dict) -> str:
+        """Async twin of `_complete`."""
+        logger.info(f"Calling OpenAI (async) to {context}...")
+        sent = time.perf_counter()
+        response, _ = await self._acreate(request, call)
+        content = await self._acontinue(request, response.choices[0].message.content or "", context, call)
+        content = self._handle_response(content, context, cache_key, call)
+        self._record_exchange(context, request, content, call, sent)
+        return content
+
+
+    def _coalesced(self, context: str, call: dict) -> None:
+        logger.info(f"Waiting for an identical in-flight OpenAI request to {context}.")
+        call["coalesced"] = True
+
+
+    def _create(self, request: dict, call: dict) -> tuple:
+        """
+        Sends a non-streaming request through the scheduler and records its usage.
+
+        Returns:
+            tuple: (completion, completion tokens or 0 if unreported)
+        """
+        raw = self.scheduler.run(
+            lambda: self.client.chat.completions.with_raw_response.create(**request), request, call
+        )
+        response = raw.parse()
+        completion_tokens = _record_usage(call, response, raw.retries_taken)
+        self.scheduler.settle(request, completion_tokens)
+        return response, completion_tokens
+
+
+    async def _acreate(self, request: dict, call: dict) -> tuple:
+        """Async twin of `_create`."""
+        raw = await self.scheduler.arun(
+            lambda: self.async_client.chat.completions.with_raw_response.create(**request), request, call
+        )
+        response = raw.parse()
+        completion_tokens = _record_usage(call, response, raw.retries_taken)
+        self.scheduler.settle(request, completion_tokens)
+        return response, completion_tokens
+
+
+    def _open_stream(self, request: dict, call: dict):
+        """
+        Opens a streaming completion through the scheduler. Errors are raised (and
+        retried) before the first chunk, so a retry never repeats yielded content.
+        The caller settles the token reservation from the final usage chunk.
+        """
+        return self.scheduler.run(
+            lambda: self.client.chat.completions.create(**request, stream=True, stream_options={"include_usage": True}),
+            request, call,
+        )
+
+
+    def _continue(self, request: dict, content: str, context: str, call: dict) -> str:
+        """
+        Continues a completion that stopped at its token limit.
+
+        Each follow-up request replays the prompt with the output so far as the
+        assistant's turn and asks for the rest, without `response_format` (a
+        fragment is not a JSON object). Pieces are stitched with `stitch` until a
+        completion ends on its own, the output holds a complete payload, or the
+        MAX_CONTINUATIONS / CONTINUATION_TOKEN_BUDGET limits are reached; in that
+        case the truncated output is returned and the parsers recover what they can.
+
+        Args:
+            request (dict): The original request payload.
+            content (str): Content of the first completion.
+            context (str): Call context, used for logging and the token budget.
+            call (dict): Metrics span attributes; usage of follow-ups is added to it.
+
+        Returns:
+            str: The stitched content.
+        """
+        spent = continuations = 0
+        while continuations < MAX_CONTINUATIONS and should_continue(call.get("finish_reason"), content):
+            follow_up = self._continuation_request(request, content, context, spent)
+            if follow_up is None:
+                break
+            continuations += 1
+            response, completion_tokens = self._create(follow_up, call)
+            spent += completion_tokens or follow_up["max_tokens"]
+            content += stitch(content, response.choices[0].message.content or "")
+        return self._finish_continuations(content, context, call, continuations)
+
+
+    async def _acontinue(self, request: dict, content: str, context: str, call: dict) -> str:
+        """Async twin of `_continue`."""
+        spent = continuations = 0
+        while continuations < MAX_CONTINUATIONS and should_continue(call.get("finish_reason"), content):
+            follow_up = self._continuation_request(request, content, context, spent)
+            if follow_up is None:
+                break
+            continuations += 1
+            response, completion_tokens = await self._acreate(follow_up, call)
+            spent += completion_tokens or follow_up["max_tokens"]
+            content += stitch(content, response.choices[0].message.content or "")
+        return self._finish_continuations(content, context, call, continuations)
+
+
+    def _stream_continue(self, request: dict, content: str, context: str, call: dict) -> Iterator[str]:
+        """
+        Streaming twin of `_continue`: yields the stitched deltas of each
+        continuation and returns the full content.
+
+        The first OVERLAP_WINDOW characters of a continuation are held back
+        until any text it repeated can be dropped.
+        """
+        spent = continuations = 0
+        while continuations < MAX_CONTINUATIONS and should_continue(call.get("finish_reason"), content):
+            follow_up = self._continuation_request(request, content, context, spent)
+            if follow_up is None:
+                break
+            continuations += 1
+            call["finish_reason"] = None
+            stream = self._open_stream(follow_up, call)
+            usage_seen = False
+            head: list[str] | None = []
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    completion_tokens = _record_usage(call, chunk)
+                    self.scheduler.settle(follow_up, completion_tokens)
+                    spent += completion_tokens
+                    usage_seen = True
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason:
+                    call["finish_reason"] = chunk.choices[0].finish_reason
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if head is None:
+                    content += delta
+                    yield delta
+                    continue
+                head.append(delta)
+                if sum(len(part) for part in head) >= OVERLAP_WINDOW:
+                    piece = stitch(content, "".join(head))
+                    head = None
+                    content += piece
+                    if piece:
+                        yield piece
+            if head:
+                piece = stitch(content, "".join(head))
+                content += piece
+                if piece:
+                    yield piece
+            if not usage_seen:
+                spent += follow_up["max_tokens"]
+        return self._finish_continuations(content, context, call, continuations)
+
+
+    def _continuation_request(self, request: dict, partial: str, context: str, spent: int) -> dict | None:
+        """Builds the next continuation request, or returns None when the budget is used up."""
+        remaining = CONTINUATION_TOKEN_BUDGET - spent
+        if remaining < MIN_CONTINUATION_TOKENS:
+            logger.warning(f"Continuation budget for {context} is used up ({spent} tokens).")
+            return None
+        try:
+            messages, max_tokens, _ = fit_request(continuation_messages(request["messages"], partial), context, request["model"])
+        except PromptTooLargeError as e:
+            logger.warning(f"Cannot continue {context}: {e}")
+            return None
+        logger.info(f"Continuing truncated OpenAI response for {context}...")
+        return {
+            "model": request["model"],
+            "messages": messages,
+            "temperature": request["temperature"],
+            "max_tokens": min(max_tokens, remaining),
+        }
+
+
+    def _finish_continuations(self, content: str, context: str, call: dict, continuations: int) -> str:
+        if continuations:
+            call["continuations"] = continuations
+        if call.get("finish_reason") == "length":
+            logger.warning(
+                f"OpenAI response for {context} is still truncated after {continuations} continuation(s)."
+            )
+        return content
+
+
+    def _handle_response(self, content: str, context: str, cache_key: str | None, call: dict) -> str:
+        """Strips the completion content and stores it in the cache unless it is still truncated."""
+        content = content.strip()
+        logger.info(f"Received OpenAI response for {context}.")
+
+        if cache_key and content and call.get("finish_reason") != "length":
+            self.cache.set(cache_key, content, context=context)
+        return content
+
+
+def _flight_key(request: dict, cache_key: str | None) -> str:
+    """Identity of a request for in-flight coalescing: its cache key, computed even when caching is off."""
+    return cache_key or make_cache_key(request)
+
+
+def _record_usage(call: dict, response, retries: int = 0) -> int:
+    """
+    Adds token usage and retries of a completion to the span attributes and
+    records its finish reason. Returns the completion tokens (0 if unreported).
+    """
+    usage = getattr(response, "usage", None)
+    completion_tokens = 0
+    if usage is not None:
+        completion_tokens = usage.completion_tokens or 0
+        call["prompt_tokens"] = call.get("prompt_tokens", 0) + (usage.prompt_tokens or 0)
+        call["completion_tokens"] = call.get("completion_tokens", 0) + completion_tokens
+    if retries:
+        call["retries"] = call.get("retries", 0) + retries
+    if getattr(response, "choices", None) and response.choices[0].finish_reason:
+        call["finish_reason"] = response.choices[0].finish_reason
+    return completion_tokens
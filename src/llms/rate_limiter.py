@@ -0,0 +1,262 @@
+# src/llms/rate_limiter.py
+
+"""
+Process-wide scheduler in front of the OpenAI client.
+
+Every request reserves one request from a requests-per-minute bucket and its
+estimated tokens (prompt plus `max_tokens`) from a tokens-per-minute bucket
+before it is sent, and waits when either bucket is empty. Unused completion
+tokens are refunded once the response reports its usage.
+
+Rate limits (429), timeouts and 5xx responses are retried with full-jitter
+exponential backoff; a `Retry-After` header is honoured and also pauses every
+other caller, so one 429 does not turn into a storm of them.
+
+Queue depth, wait time and retries are exported through `src.utils.metrics`.
+"""
+
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import openai  # type: ignore
+
+from src.llms.token_budget import count_message_tokens
+from src.utils.logger import Logger
+from src.utils.metrics import registry
+
+logger = Logger(__name__)
+
+T = TypeVar("T")
+
+# Account limits; 0 disables a bucket. Defaults match a low usage tier for gpt-3.5-turbo.
+REQUESTS_PER_MINUTE = float(os.getenv("DEVPILOT_OPENAI_RPM", "3500"))
+TOKENS_PER_MINUTE = float(os.getenv("DEVPILOT_OPENAI_TPM", "90000"))
+MAX_RETRIES = int(os.getenv("DEVPILOT_OPENAI_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("DEVPILOT_OPENAI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("DEVPILOT_OPENAI_BACKOFF_MAX", "30"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> "RequestScheduler":
+    """
+    Returns the process-wide RequestScheduler, creating it on first use.
+    """
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = RequestScheduler()
+    return _shared_scheduler
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at `per_minute / 60` per second, holding at most
+    one minute's worth.
+
+    `reserve` takes the amount immediately, letting the level go negative, and
+    returns how long the caller must wait for the level to be back at zero. Callers
+    are therefore served in reservation order without polling.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._level = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` and returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A request larger than the whole bucket would never fit; it waits for a full bucket instead.
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def refund(self, amount: float) -> None:
+        if amount <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+
+class RequestScheduler:
+    """
+    Rate-limits, retries and meters chat completion requests.
+
+    Args:
+        requests_per_minute (float): Request budget; 0 for no limit.
+        tokens_per_minute (float): Token budget; 0 for no limit.
+        max_retries (int): Retries after the first attempt.
+        backoff_base (float): First backoff ceiling in seconds; doubles per retry.
+        backoff_max (float): Largest backoff ceiling in seconds.
+    """
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE_SECONDS, backoff_max: float = BACKOFF_MAX_SECONDS):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._resume_at = 0.0
+        self._random = random.Random()
+
+    @staticmethod
+    def estimate_tokens(request: dict) -> int:
+        """Tokens a request counts against the TPM limit before its usage is known."""
+        return count_message_tokens(request["messages"], request["model"]) + request.get("max_tokens", 0)
+
+    def run(self, send: Callable[[], T], request: dict, call: Optional[dict] = None) -> T:
+        """
+        Sends a request with `send()` once the limits allow, retrying transient failures.
+
+        Args:
+            send (callable): Performs the request and returns its result.
+            request (dict): The request payload, used to estimate its tokens.
+            call (dict): Metrics span attributes; receives `queue_ms` and `retries`.
+
+        Returns:
+            The result of `send()`.
+
+        Raises:
+            The last error once it is not retryable or `max_retries` is exhausted.
+        """
+        estimate = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            self._wait(self._reserve(estimate), call)
+            try:
+                return send()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, estimate)
+                if delay is None:
+                    raise
+                attempt += 1
+                _note_retry(call, e, attempt, delay)
+                time.sleep(delay)
+
+    async def arun(self, send: Callable[[], Awaitable[T]], request: dict, call: Optional[dict] = None) -> T:
+        """Async twin of `run`; `send()` returns an awaitable."""
+        estimate = self.estimate_tokens(request)
+        attempt = 0
+        while True:
+            wait = self._reserve(estimate)
+            if wait > 0:
+                self._queued(wait, call, 1)
+                try:
+                    await asyncio.sleep(wait)
+                finally:
+                    self._queued(wait, call, -1)
+            else:
+                registry.observe("devpilot_llm_scheduler_wait_seconds", 0.0)
+            try:
+                return await send()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, estimate)
+                if delay is None:
+                    raise
+                attempt += 1
+                _note_retry(call, e, attempt, delay)
+                await asyncio.sleep(delay)
+
+    def settle(self, request: dict, completion_tokens: int) -> None:
+        """Refunds the part of `max_tokens` a completion did not use (nothing if usage is unknown)."""
+        if self.tokens is not None and completion_tokens:
+            self.tokens.refund(request.get("max_tokens", 0) - completion_tokens)
+
+    def _reserve(self, estimate: int) -> float:
+        wait = max(0.0, self._resume_at - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimate))
+        return wait
+
+    def _wait(self, wait: float, call: Optional[dict]) -> None:
+        if wait <= 0:
+            registry.observe("devpilot_llm_scheduler_wait_seconds", 0.0)
+            return
+        self._queued(wait, call, 1)
+        try:
+            time.sleep(wait)
+        finally:
+            self._queued(wait, call, -1)
+
+    def _queued(self, wait: float, call: Optional[dict], delta: int) -> None:
+        registry.adjust_gauge("devpilot_llm_scheduler_queue_depth", delta)
+        if delta < 0:
+            registry.observe("devpilot_llm_scheduler_wait_seconds", wait)
+            if call is not None:
+                call["queue_ms"] = round(call.get("queue_ms", 0) + wait * 1000, 3)
+
+    def _retry_delay(self, error: Exception, attempt: int, estimate: int) -> Optional[float]:
+        """Seconds to wait before retrying `error`, or None if it must not be retried."""
+        if attempt >= self.max_retries or not _is_retryable(error):
+            return None
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = self._random.uniform(0, ceiling)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+            # Hold back every caller, not just this one, until the server is ready again.
+            self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+        # A failed attempt used none of its tokens, except that a 429 keeps them as back-pressure.
+        if self.tokens is not None and not isinstance(error, openai.RateLimitError):
+            self.tokens.refund(estimate)
+        return delay
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts.
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by the `retry-after-ms` or `retry-after` response header, if any."""
+    response: Optional[httpx.Response] = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _note_retry(call: Optional[dict], error: Exception, attempt: int, delay: float) -> None:
+    reason = "rate_limit" if isinstance(error, openai.RateLimitError) else type(error).__name__
+    registry.increment("devpilot_llm_scheduler_retries_total", reason=reason)
+    if call is not None:
+        call["retries"] = call.get("retries", 0) + 1
+    logger.warning(f"OpenAI request failed ({error.__class__.__name__}); retry {attempt} in {delay:.2f}s.")
@@ -0,0 +1,179 @@
+# src/llms/response_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "../../.cache/llm_responses.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def make_cache_key(payload: dict) -> str:
+    """
+    Builds a stable, content-addressed key for a chat completion request.
+
+    Args:
+        payload (dict): Full request (model, messages, temperature, max_tokens, ...).
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical JSON encoding of the payload.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk LLM response cache backed by SQLite.
+
+    Entries are evicted least-recently-used first once the store grows past
+    `max_bytes`, and expire once they are older than `max_age_seconds`.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS, enabled: bool = True):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Creates a cache configured from environment variables:
+        DEVPILOT_LLM_CACHE ("0"/"off" bypasses the cache), DEVPILOT_LLM_CACHE_PATH,
+        DEVPILOT_LLM_CACHE_MAX_BYTES and DEVPILOT_LLM_CACHE_MAX_AGE (seconds).
+        """
+        enabled = os.getenv("DEVPILOT_LLM_CACHE", "1").strip().lower() not in ("0", "off", "false", "no")
+        return cls(
+            path=os.getenv("DEVPILOT_LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_bytes=int(os.getenv("DEVPILOT_LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            max_age_seconds=int(os.getenv("DEVPILOT_LLM_CACHE_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)),
+            enabled=enabled,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " context TEXT,"
+                " content TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached content for `key`, or None on a miss or expired entry."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT content, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                content, created_at = row
+                if now - created_at > self.max_age_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.evictions += 1
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return content
+        except sqlite3.Error as e:
+            logger.error(f"Response cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, content: str, context: str = "") -> None:
+        """Stores `content` under `key` and evicts old entries if the store is over budget."""
+        if not self.enabled:
+            return
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, context, content, size, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, context, content, size, now, now),
+                )
+                self.stores += 1
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.error(f"Response cache store failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+        self.evictions += max(expired.rowcount, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self) -> None:
+        """Removes every cached response."""
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of the store."""
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries, size = self._connect().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Response cache stats failed: {e}")
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,115 @@
+# src/llms/single_flight.py
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same time.
+
+    The first caller for a key (the leader) does the work; callers arriving
+    before it finishes wait for its result, or get its exception raised, instead
+    of repeating it. A leader that is cancelled (or interrupted) abandons the
+    flight instead, and its followers retry, one of them as the new leader.
+    Flights are plain `concurrent.futures.Future`s, so thread and asyncio
+    callers can lead or follow each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def join(self, key: str) -> tuple[Future, bool]:
+        """
+        Returns the flight for `key` and whether the caller leads it. A leader must
+        end the flight with `finish`.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def finish(self, key: str, future: Future, result=None, error: Exception | None = None) -> None:
+        """Publishes the leader's result (or error) to its followers and closes the flight."""
+        self._close(key, future)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key: str, future: Future) -> None:
+        """Closes the flight without a result; its followers retry the call."""
+        self._close(key, future)
+        future.cancel()
+
+    def _close(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def do(self, key: str, fn: Callable[[], T], on_wait: Callable[[], None] | None = None) -> T:
+        """
+        Runs `fn()` unless an identical call is in flight, in which case its result is returned.
+
+        Args:
+            key (str): Identity of the call.
+            fn (callable): The work, run only by the leader.
+            on_wait (callable): Called when the caller follows another flight.
+        """
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            if on_wait is not None:
+                on_wait()
+            try:
+                return future.result()
+            except CancelledError:
+                continue  # The leader gave up; retry, possibly as the new leader.
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, future, error=e)
+            raise
+        except BaseException:
+            self.abandon(key, future)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]], on_wait: Callable[[], None] | None = None) -> T:
+        """Async twin of `do`; followers wait without blocking the event loop."""
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            if on_wait is not None:
+                on_wait()
+            try:
+                # Shielded so a cancelled follower does not cancel the shared flight.
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This follower was cancelled, not the flight.
+        try:
+            result = await fn()
+        except Exception as e:
+            self.finish(key, future, error=e)
+            raise
+        except BaseException:
+            self.abandon(key, future)
+            raise
+        self.finish(key, future, result)
+        return result
@@ -0,0 +1,172 @@
+# src/llms/token_budget.py
+
+from functools import lru_cache
+
+import tiktoken  # type: ignore
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+# Total context window (prompt + completion) and completion cap per model.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo-1106": 16385,
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+}
+MODEL_MAX_OUTPUT_TOKENS = {
+    "gpt-3.5-turbo-1106": 4096,
+    "gpt-3.5-turbo": 4096,
+    "gpt-4o-mini": 16384,
+    "gpt-4o": 16384,
+}
+DEFAULT_CONTEXT_WINDOW = 16385
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
+# Completion budget per call context; multi-file code needs far more room than stories.
+OUTPUT_BUDGETS = {
+    "generate user stories": 1500,
+    "revise user stories": 1500,
+    "generate design doc": 2500,
+    "generate design doc section": 1500,
+    "revise design doc": 2500,
+    "generate code": 4096,
+    "regenerate code": 4096,
+    "plan code files": 1500,
+    "generate code file": 4096,
+    "revise code": 2500,
+    "rewrite code file": 4096,
+    "summarize feedback": 500,
+}
+DEFAULT_OUTPUT_BUDGET = 1000
+
+# Smallest completion worth sending a request for, and headroom for counting drift.
+MIN_OUTPUT_TOKENS = 256
+SAFETY_MARGIN_TOKENS = 64
+
+# Per-message framing overhead of the chat format (see OpenAI's token counting guide).
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+
+class PromptTooLargeError(ValueError):
+    """Raised when a prompt cannot be trimmed to leave room for a useful completion."""
+
+
+class _ApproximateEncoding:
+    """Fallback used when the tiktoken vocabulary cannot be loaded (e.g. offline)."""
+
+    CHARS_PER_TOKEN = 4
+
+    def encode(self, text: str) -> list[str]:
+        step = self.CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding for {model}, using an approximation: {e}")
+        return _ApproximateEncoding()
+
+
+def count_tokens(text: str, model: str) -> int:
+    return len(get_encoding(model).encode(text or ""))
+
+
+def count_message_tokens(messages: list[dict], model: str) -> int:
+    """
+    Counts the prompt tokens a list of chat messages will consume.
+
+    Args:
+        messages (list): Chat prompt messages.
+        model (str): Model name, used to pick the tokenizer.
+
+    Returns:
+        int: Prompt token count including chat framing overhead.
+    """
+    encoding = get_encoding(model)
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        for value in message.values():
+            if isinstance(value, str):
+                total += len(encoding.encode(value))
+    return total
+
+
+def fit_request(messages: list[dict], context: str, model: str) -> tuple[list[dict], int, int]:
+    """
+    Chooses `max_tokens` for a call and trims the prompt if it would not leave
+    room for a useful completion.
+
+    The completion budget is the per-context budget from OUTPUT_BUDGETS, capped by
+    the model's output limit and by what is left of the context window.
+
+    Args:
+        messages (list): Chat prompt messages.
+        context (str): Call context (e.g. "generate code"), used to pick the budget.
+        model (str): Model name.
+
+    Returns:
+        tuple: (messages, max_tokens, prompt_tokens). `messages` is a trimmed copy
+        when the original prompt was too large.
+
+    Raises:
+        PromptTooLargeError: If even the trimmed prompt leaves no room for output.
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    output_cap = MODEL_MAX_OUTPUT_TOKENS.get(model, DEFAULT_MAX_OUTPUT_TOKENS)
+    desired = min(OUTPUT_BUDGETS.get(context, DEFAULT_OUTPUT_BUDGET), output_cap)
+
+    prompt_tokens = count_message_tokens(messages, model)
+    available = window - prompt_tokens - SAFETY_MARGIN_TOKENS
+
+    if available < MIN_OUTPUT_TOKENS:
+        target = window - SAFETY_MARGIN_TOKENS - min(desired, max(MIN_OUTPUT_TOKENS, desired // 2))
+        logger.warning(
+            f"Prompt for {context} uses {prompt_tokens} of {window} tokens; trimming to {target}."
+        )
+        messages = _trim_messages(messages, prompt_tokens - target, model)
+        prompt_tokens = count_message_tokens(messages, model)
+        available = window - prompt_tokens - SAFETY_MARGIN_TOKENS
+        if available < MIN_OUTPUT_TOKENS:
+            raise PromptTooLargeError(
+                f"Prompt for {context} needs {prompt_tokens} tokens, leaving {available} of {window} for output."
+            )
+
+    return messages, min(desired, available), prompt_tokens
+
+
+def _trim_messages(messages: list[dict], excess_tokens: int, model: str) -> list[dict]:
+    """
+    Removes roughly `excess_tokens` from the middle of the longest user message,
+    keeping its instructions at the start and the output format at the end.
+    """
+    encoding = get_encoding(model)
+    trimmed = [dict(m) for m in messages]
+    candidates = [m for m in trimmed if m.get("role") == "user" and isinstance(m.get("content"), str)]
+    if excess_tokens <= 0 or not candidates:
+        return trimmed
+
+    longest = max(candidates, key=lambda m: len(m["content"]))
+    tokens = encoding.encode(longest["content"])
+    keep = len(tokens) - excess_tokens - len(encoding.encode(TRUNCATION_MARKER))
+    if keep <= 0:
+        return trimmed
+
+    head = keep * 2 // 3
+    tail = keep - head
+    longest["content"] = encoding.decode(tokens[:head]) + TRUNCATION_MARKER + encoding.decode(tokens[-tail:] if tail else [])
+    return trimmed
+
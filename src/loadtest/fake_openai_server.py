@@ -0,0 +1,292 @@
+# src/loadtest/fake_openai_server.py
+
+"""
+Local stand-in for the OpenAI chat completions API used for load testing.
+
+Answers are replayed from a cassette recorded with DEVPILOT_CASSETTE_RECORD (see
+`src.llms.cassette`) or, for prompts without a recording, synthesised from the
+prompt type. Each response is delayed by a log-normally distributed time to
+first token plus its completion tokens at a fixed token rate, and a configurable
+share of requests fails with 500 or 429 (with Retry-After).
+
+Usage:
+    python -m src.loadtest.fake_openai_server --cassette cassette.jsonl --port 8089 \\
+        --latency-ms 600 --tokens-per-second 60 --error-rate 0.01 --rate-limit-rate 0.02
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8089/v1.
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.benchmarks import payloads
+from src.llms.cassette import Cassette
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_TOKENS = 4
+
+
+def synthetic_content(request: dict) -> str:
+    """A plausible JSON answer for the prompt type, for requests with no recording."""
+    system = next((m.get("content", "") for m in request.get("messages", []) if m.get("role") == "system"), "")
+    if "user stories" in system:
+        return payloads.user_stories_payload(2048)
+    if "design document" in system:
+        return payloads.design_doc_payload(4096)
+    if "plans Python projects" in system:
+        return json.dumps({"files": [
+            {"filename": "app/main.py", "responsibility": "Entry point.", "interfaces": ["main()"]},
+            {"filename": "app/service.py", "responsibility": "Business logic.", "interfaces": ["run()"]},
+        ]})
+    if "unified diffs" in system:
+        return json.dumps({"changes": {}})
+    return payloads.generated_code_payload(4096)
+
+
+class FakeOpenAIServer:
+    """
+    Threaded HTTP server implementing GET /v1/models and POST /v1/chat/completions
+    (streaming and non-streaming).
+    """
+
+    def __init__(self, cassette: Optional[Cassette] = None, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 500.0, latency_sigma: float = 0.4, tokens_per_second: float = 80.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: Optional[int] = None):
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "replayed": 0, "synthesized": 0, "errors": 0, "rate_limited": 0, "in_flight": 0,
+                      "max_in_flight": 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """Serves in a background thread and returns the base URL."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake OpenAI server listening on {self.base_url}.")
+        return self.base_url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def draw_failure(self) -> Optional[int]:
+        """Returns 500 or 429 for an injected failure, or None."""
+        with self._random_lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.rate_limit_rate:
+            return 429
+        return None
+
+    def time_to_first_token(self) -> float:
+        """Seconds before the first token, log-normal around `latency_ms`."""
+        with self._random_lock:
+            factor = self._random.lognormvariate(0.0, self.latency_sigma) if self.latency_sigma else 1.0
+        return self.latency_ms * factor / 1000
+
+    def answer(self, request: dict) -> dict:
+        """Returns {"content", "prompt_tokens", "completion_tokens", "finish_reason"} for a request."""
+        entry = self.cassette.match(request) if self.cassette is not None else None
+        if entry is not None:
+            self._count("replayed")
+            response = entry["response"]
+            content = response["content"]
+            usage = response.get("usage") or {}
+            finish_reason = response.get("finish_reason") or "stop"
+        else:
+            self._count("synthesized")
+            content = synthetic_content(request)
+            usage = {}
+            finish_reason = "stop"
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+        return {
+            "content": content,
+            "prompt_tokens": usage.get("prompt_tokens") or math.ceil(prompt_chars / CHARS_PER_TOKEN),
+            "completion_tokens": usage.get("completion_tokens") or math.ceil(len(content) / CHARS_PER_TOKEN),
+            "finish_reason": finish_reason,
+        }
+
+
+def _make_handler(server: FakeOpenAIServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # Silence per-request stderr logging.
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo-1106", "object": "model",
+                                                                    "created": 0, "owned_by": "system"}]})
+            else:
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "Invalid JSON body.", "type": "invalid_request_error"}})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                return
+
+            server._count("requests")
+            server._count("in_flight")
+            try:
+                self._complete(request)
+            finally:
+                server._count("in_flight", -1)
+
+        def _complete(self, request: dict) -> None:
+            failure = server.draw_failure()
+            if failure == 429:
+                server._count("rate_limited")
+                self._send_json(429, {"error": {"message": "Rate limit reached (injected).", "type": "requests",
+                                                "code": "rate_limit_exceeded"}},
+                                {"Retry-After": f"{server.retry_after:g}"})
+                return
+            if failure == 500:
+                server._count("errors")
+                time.sleep(server.time_to_first_token() / 2)
+                self._send_json(500, {"error": {"message": "Injected server error.", "type": "server_error"}})
+                return
+
+            answer = server.answer(request)
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            model = request.get("model", "gpt-3.5-turbo-1106")
+            usage = {
+                "prompt_tokens": answer["prompt_tokens"],
+                "completion_tokens": answer["completion_tokens"],
+                "total_tokens": answer["prompt_tokens"] + answer["completion_tokens"],
+            }
+            generation_time = answer["completion_tokens"] / server.tokens_per_second if server.tokens_per_second else 0
+
+            time.sleep(server.time_to_first_token())
+            if not request.get("stream"):
+                time.sleep(generation_time)
+                self._send_json(200, {
+                    "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer["content"]},
+                                 "finish_reason": answer["finish_reason"]}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def event(choices: list, extra: Optional[dict] = None) -> None:
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": choices, **(extra or {})}
+                self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+            content = answer["content"]
+            step = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+            pieces = [content[i:i + step] for i in range(0, len(content), step)] or [""]
+            delay = generation_time / len(pieces)
+            event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for piece in pieces:
+                if delay:
+                    time.sleep(delay)
+                event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            event([{"index": 0, "delta": {}, "finish_reason": answer["finish_reason"]}])
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event([], {"usage": usage})
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+
+    return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions API.")
+    parser.add_argument("--cassette", help="JSONL cassette recorded with DEVPILOT_CASSETTE_RECORD.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Median time to first token.")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal spread of the latency.")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Completion token rate.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests failing with 429.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        cassette=Cassette.load(args.cassette) if args.cassette else None,
+        host=args.host, port=args.port, latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=args.seed,
+    )
+    print(f"Serving on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# src/loadtest/load_driver.py
+
+"""
+Load driver: runs N simulated review sessions through the Streamlit handler
+functions in `src.ui.handlers` and reports throughput, tail latency and memory
+per session.
+
+Each session generates user stories, optionally submits feedback rounds,
+approves them, creates and approves the design doc, and generates and approves
+code, in the order a user clicks through the UI.
+
+Usage:
+    # Against a fake server started in-process (no network, no API key needed):
+    python -m src.loadtest.load_driver --sessions 200 --concurrency 50 --start-server --latency-ms 400
+
+    # Against a separately started fake server or any OpenAI-compatible endpoint:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python -m src.loadtest.load_driver --sessions 100 --concurrency 20
+"""
+
+import os
+import tempfile
+
+# Keep the run away from the developer's caches and stores unless overridden,
+# before any src module reads its configuration at import time.
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="devpilot-load-")
+for _name, _value in {
+    "DEVPILOT_LOG_LEVEL": "WARNING",
+    "DEVPILOT_LLM_CACHE": "0",
+    "DEVPILOT_TRACE_DIR": "",
+    "DEVPILOT_METRICS_FILE": os.path.join(_SCRATCH_DIR, "metrics.prom"),
+    "DEVPILOT_VECTORSTORE_DIR": os.path.join(_SCRATCH_DIR, "vectorstore"),
+    "DEVPILOT_DEDUP_INDEX_PATH": os.path.join(_SCRATCH_DIR, "requirement_minhash.sqlite3"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import argparse
+import json
+import resource
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from src.batch.runner import read_requirements
+from src.loadtest.fake_openai_server import FakeOpenAIServer
+from src.llms.cassette import Cassette
+from src.state.workflow_state import WorkflowState
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+SAMPLE_REQUIREMENTS = [
+    "Build a reporting portal where analysts schedule exports and share dashboards with clients.",
+    "Create a mobile-first expense tracker with receipt scanning and monthly budget alerts.",
+    "Design an appointment booking service for clinics with reminders and waiting lists.",
+    "Develop an inventory system for small warehouses with barcode scanning and reorder points.",
+    "Implement a customer support inbox that routes tickets by topic and tracks response SLAs.",
+]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (falls back to the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(pick(0.5), 3),
+        "p95": round(pick(0.95), 3),
+        "p99": round(pick(0.99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def run_session(session_id: int, requirement: str, feedback_rounds: int = 0, stream: bool = False,
+                think_time: float = 0.0) -> dict:
+    """
+    Clicks through one session via the UI handlers.
+
+    Returns:
+        dict: {"id", "status", "failed_step", "error", "steps": {step: seconds}, "total_s", "state_bytes"}
+    """
+    from src.ui import handlers
+
+    steps: dict[str, float] = {}
+    result = {"id": session_id, "status": "failed", "failed_step": None, "steps": steps}
+    state = WorkflowState(requirement=f"{requirement} (session {session_id})")
+    on_story = (lambda idx, story: None) if stream else None
+    on_section = (lambda key, text: None) if stream else None
+
+    plan = [("generate_user_stories", partial(handlers.handle_initial_workflow, on_story=on_story, allow_reuse=False))]
+    for round_no in range(feedback_rounds):
+        plan.append((f"feedback_{round_no + 1}", _with_feedback(handlers.handle_feedback, round_no)))
+    plan += [
+        ("approve_user_stories", handlers.handle_approval),
+        ("create_design_doc", partial(handlers.handle_create_design_doc, on_section=on_section)),
+        ("approve_design_doc", handlers.handle_design_approval),
+        ("generate_code", handlers.handle_generate_code),
+        ("approve_code", handlers.handle_code_approval),
+    ]
+
+    started = time.perf_counter()
+    step_name = plan[0][0]
+    try:
+        for step_name, handler in plan:
+            step_started = time.perf_counter()
+            state = handler(state)
+            if not isinstance(state, WorkflowState):
+                state = WorkflowState(**state)
+            steps[step_name] = time.perf_counter() - step_started
+            if step_name == "generate_user_stories" and not state.user_stories:
+                raise ValueError("No user stories were generated.")
+            if think_time:
+                time.sleep(think_time)
+        result["status"] = "completed"
+    except Exception as e:
+        result["failed_step"] = step_name
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["total_s"] = time.perf_counter() - started
+    result["state_bytes"] = len(state.model_dump_json())
+    return result
+
+
+def _with_feedback(handle_feedback, round_no: int):
+    def submit(state: WorkflowState) -> WorkflowState:
+        state.feedback = f"Round {round_no + 1}: add acceptance criteria for error handling."
+        return handle_feedback(state)
+    return submit
+
+
+def run_load(sessions: int, concurrency: int, requirements: list[str], feedback_rounds: int = 0,
+             stream: bool = False, think_time: float = 0.0, trace_memory: bool = False) -> dict:
+    """
+    Runs `sessions` sessions with at most `concurrency` in flight.
+
+    Returns:
+        dict: Throughput, per-step and per-session latency percentiles (seconds) and memory figures.
+    """
+    from src.llms.openai_helper import get_openai_service
+
+    get_openai_service()  # Build the shared client outside the measured window.
+    if trace_memory:
+        tracemalloc.start()
+    rss_start = _rss_mb()
+    rss_peak = rss_start
+    sampling = threading.Event()
+
+    def sample_rss() -> None:
+        nonlocal rss_peak
+        while not sampling.wait(0.25):
+            rss_peak = max(rss_peak, _rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, name="rss-sampler", daemon=True)
+    sampler.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as pool:
+        futures = [
+            pool.submit(run_session, i, requirements[i % len(requirements)], feedback_rounds, stream, think_time)
+            for i in range(sessions)
+        ]
+        results = [future.result() for future in futures]
+    wall_time = time.perf_counter() - started
+
+    sampling.set()
+    sampler.join()
+    rss_peak = max(rss_peak, _rss_mb())
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    completed = [r for r in results if r["status"] == "completed"]
+    step_names = list(dict.fromkeys(name for r in results for name in r["steps"]))
+    in_flight = min(concurrency, sessions)
+    report = {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "failures_by_step": _count_by(r["failed_step"] for r in results if r["status"] != "completed"),
+        "wall_time_s": round(wall_time, 3),
+        "sessions_per_min": round(len(completed) / wall_time * 60, 2) if wall_time else 0.0,
+        "session_latency_s": _percentiles([r["total_s"] for r in completed]),
+        "step_latency_s": {name: _percentiles([r["steps"][name] for r in results if name in r["steps"]])
+                           for name in step_names},
+        "memory": {
+            "rss_start_mb": round(rss_start, 1),
+            "rss_peak_mb": round(rss_peak, 1),
+            "rss_growth_per_concurrent_session_mb": round((rss_peak - rss_start) / in_flight, 3),
+            "state_bytes": _percentiles([r["state_bytes"] for r in results]),
+        },
+        "errors": _count_by(r["error"].split(":")[0] for r in results if r.get("error")),
+    }
+    if traced_peak is not None:
+        report["memory"]["python_heap_peak_mb"] = round(traced_peak, 2)
+        report["memory"]["python_heap_per_concurrent_session_mb"] = round(traced_peak / in_flight, 3)
+    return report
+
+
+def _count_by(values) -> dict:
+    counts: dict = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Drive simulated UI sessions through the DevPilot handlers.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--feedback-rounds", type=int, default=0, help="User story feedback rounds per session.")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming user story/design doc paths.")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a session's steps.")
+    parser.add_argument("--requirements", help="JSONL file of requirements (same format as the batch runner).")
+    parser.add_argument("--trace-memory", action="store_true", help="Track Python heap peak with tracemalloc (slow).")
+    parser.add_argument("--report", help="Write the JSON report to this path.")
+    server_group = parser.add_argument_group("in-process fake OpenAI server")
+    server_group.add_argument("--start-server", action="store_true", help="Serve a fake OpenAI API in-process.")
+    server_group.add_argument("--cassette", help="Cassette to replay from (see DEVPILOT_CASSETTE_RECORD).")
+    server_group.add_argument("--latency-ms", type=float, default=500.0)
+    server_group.add_argument("--latency-sigma", type=float, default=0.4)
+    server_group.add_argument("--tokens-per-second", type=float, default=80.0)
+    server_group.add_argument("--error-rate", type=float, default=0.0)
+    server_group.add_argument("--rate-limit-rate", type=float, default=0.0)
+    server_group.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    requirements = SAMPLE_REQUIREMENTS
+    if args.requirements:
+        requirements = [item["requirement"] for item in read_requirements(args.requirements) if item["requirement"]]
+
+    server = None
+    if args.start_server:
+        server = FakeOpenAIServer(
+            cassette=Cassette.load(args.cassette) if args.cassette else None,
+            latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+            tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+        )
+        os.environ["OPENAI_BASE_URL"] = server.start()
+        os.environ.setdefault("OPENAI_API_KEY", "load-test")
+
+    try:
+        report = run_load(
+            sessions=args.sessions, concurrency=max(1, args.concurrency), requirements=requirements,
+            feedback_rounds=args.feedback_rounds, stream=args.stream, think_time=args.think_ms / 1000,
+            trace_memory=args.trace_memory,
+        )
+    finally:
+        if server is not None:
+            server.stop()
+    if server is not None:
+        report["server"] = dict(server.stats)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,33 @@
 # src/prompts/code_generation_prompt.py
 
-def generate_code_generation_prompt(design_doc: str) -> list[dict]:
+import json
+
+from src.prompts.design_doc_prompt import opening_paragraphs
+
+# Approved code examples are trimmed to this many characters of design document
+# and of files each, keeping whole files only.
+EXAMPLE_DOC_CHARS = 1200
+EXAMPLE_CODE_CHARS = 6000
+
+
+def generate_code_generation_prompt(design_doc: str, examples: list[dict] | None = None) -> list[dict]:
     """
     Returns messages instructing the LLM to create multi-file code based on a design doc.
+    Approved examples ({"text": design doc, "files"}) are added as prior
+    user/assistant exchanges, trimmed to EXAMPLE_DOC_CHARS / EXAMPLE_CODE_CHARS.
     """
+    example_messages = []
+    for example in examples or []:
+        files = _fitting_files(example.get("files") or {}, EXAMPLE_CODE_CHARS)
+        if not files:
+            continue
+        example_doc = opening_paragraphs(example.get("text", ""), EXAMPLE_DOC_CHARS)
+        example_messages.append({
+            "role": "user",
+            "content": f"Generate code based on this design document:\n\n{example_doc}",
+        })
+        example_messages.append({"role": "assistant", "content": json.dumps({"files": files})})
+
     return [
         {
             "role": "system",
@@ -12,6 +36,7 @@ def generate_code_generation_prompt(design_doc: str) -> list[dict]:
                 "Output only valid JSON with a 'files' object containing {filename: file_content}."
             ),
         },
+        *example_messages,
         {
             "role": "user",
             "content": f"""
@@ -32,3 +57,185 @@ def generate_code_generation_prompt(design_doc: str) -> list[dict]:
             """
         }
     ]
+
+
+def generate_code_manifest_prompt(design_doc: str, examples: list[dict] | None = None) -> list[dict]:
+    """
+    Returns messages asking the LLM to plan the files of a project before any code is written.
+    The file names of approved examples are listed as a reference layout.
+    """
+    layouts = [", ".join(example["files"]) for example in examples or [] if example.get("files")]
+    reference = "Approved projects with similar designs used these files: " + "; ".join(layouts) if layouts else ""
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a software architect who plans Python projects file by file. "
+                "Output only valid JSON with a 'files' list describing each file to create."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+            Plan the files needed to implement this design document:
+
+            {design_doc}
+
+            {reference}
+
+            "Return only JSON with the following structure:"
+
+            ```json
+            {{
+                "files": [
+                    {{
+                        "filename": "main.py",
+                        "responsibility": "What this file is responsible for",
+                        "interfaces": ["def main() -> None"]
+                    }}
+                ]
+            }}
+            ```
+            """
+        }
+    ]
+
+
+def generate_code_file_prompt(design_doc: str, manifest: list[dict], file_entry: dict) -> list[dict]:
+    """
+    Returns messages asking the LLM to write a single file from the project manifest.
+    The full manifest is included so the file can import its siblings' interfaces.
+    """
+    filename = file_entry.get("filename", "")
+    interfaces = "\n".join(f"- {i}" for i in file_entry.get("interfaces", []))
+    project_files = "\n".join(
+        f"- {f.get('filename')}: {f.get('responsibility', '')}" for f in manifest
+    )
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a code-generating assistant that writes one Python file of a larger project. "
+                "Output only valid JSON with a 'files' object containing {filename: file_content}."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+            Design document:
+
+            {design_doc}
+
+            Project files:
+            {project_files}
+
+            Write the complete contents of {filename}.
+            Responsibility: {file_entry.get("responsibility", "")}
+            It must expose these interfaces:
+            {interfaces}
+
+            "Return only JSON with the following structure:"
+
+            ```json
+            {{
+                "files": {{
+                    "{filename}": "... complete file content ..."
+                }}
+            }}
+            ```
+            """
+        }
+    ]
+
+
+def generate_code_revision_prompt(files: dict[str, str], feedback: str) -> list[dict]:
+    """
+    Returns messages asking the LLM to apply review feedback to existing files,
+    answering with unified diffs for the files that change instead of full files.
+    """
+    current_files = "\n\n".join(
+        f"### {filename}\n```\n{content}\n```" for filename, content in files.items()
+    )
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a code-revising assistant. You change only what the feedback requires and "
+                "answer with unified diffs. Output only valid JSON with a 'changes' object."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+            Revise these files according to the feedback.
+
+            Feedback: {feedback}
+
+            Current files:
+
+            {current_files}
+
+            "Return only JSON. Include only files that change. Use a unified diff (with @@ hunk headers
+            and a few lines of context) for edits, full content for new files, and delete for removals:"
+
+            ```json
+            {{
+                "changes": {{
+                    "main.py": {{"diff": "@@ -1,3 +1,4 @@\\n import os\\n+import sys\\n ..."}},
+                    "new_module.py": {{"content": "... complete file content ..."}},
+                    "obsolete.py": {{"delete": true}}
+                }}
+            }}
+            ```
+            """
+        }
+    ]
+
+
+def generate_code_file_rewrite_prompt(filename: str, content: str, feedback: str) -> list[dict]:
+    """
+    Returns messages asking the LLM to rewrite one file in full to address feedback.
+    Used when a diff for that file could not be applied.
+    """
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a code-revising assistant that rewrites one Python file. "
+                "Output only valid JSON with a 'files' object containing {filename: file_content}."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+            Rewrite {filename} so that it addresses the feedback.
+
+            Feedback: {feedback}
+
+            Current content of {filename}:
+            ```
+            {content}
+            ```
+
+            "Return only JSON with the following structure:"
+
+            ```json
+            {{
+                "files": {{
+                    "{filename}": "... complete file content ..."
+                }}
+            }}
+            ```
+            """
+        }
+    ]
+
+
+def _fitting_files(files: dict[str, str], limit: int) -> dict[str, str]:
+    """The files, in order, whose combined content fits in `limit` characters; larger files are left out."""
+    fitting, used = {}, 0
+    for filename, content in files.items():
+        if used + len(content) <= limit:
+            fitting[filename] = content
+            used += len(content)
+    return fitting
@@ -1,10 +1,30 @@
 # src/prompts/design_doc_prompt.py
 
-def generate_design_doc_prompt(requirement: str, user_stories: str = "") -> list[dict]:
+import json
+
+
+def generate_design_doc_prompt(requirement: str, user_stories: str = "",
+                               examples: list[dict] | None = None) -> list[dict]:
     """
     Returns a ChatCompletion-like prompt instructing the LLM to produce a design doc.
     We can pass user_stories in case we want to reference them in the doc.
+    Approved examples ({"requirement", "user_stories", "functional_doc", "technical_doc"})
+    are added as prior user/assistant exchanges.
     """
+    example_messages = []
+    for example in examples or []:
+        example_messages.append({
+            "role": "user",
+            "content": f"Requirement: {example.get('requirement', '')}\nUser Stories: {example.get('user_stories', '')}",
+        })
+        example_messages.append({
+            "role": "assistant",
+            "content": json.dumps({
+                "functional_doc": example.get("functional_doc", ""),
+                "technical_doc": example.get("technical_doc", ""),
+            }),
+        })
+
     return [
         {
             "role": "system",
@@ -13,6 +33,7 @@ def generate_design_doc_prompt(requirement: str, user_stories: str = "") -> list
                 "Output your response in JSON format only—no markdown, no extra commentary."
             ),
         },
+        *example_messages,
         {
             "role": "user",
             "content": f"""
@@ -32,3 +53,82 @@ def generate_design_doc_prompt(requirement: str, user_stories: str = "") -> list
             ```"""
         },
     ]
+
+
+_DOC_NAMES = {"functional_doc": "functional", "technical_doc": "technical"}
+# Overview requests only see the opening of each example document.
+OVERVIEW_EXAMPLE_CHARS = 1200
+
+
+def generate_design_doc_section_prompt(requirement: str, user_stories: str, doc: str, scope: str = "full",
+                                       examples: list[dict] | None = None) -> list[dict]:
+    """
+    Returns a prompt for one design document ("functional_doc" or "technical_doc") only.
+
+    scope is "full" (the whole document for all the user stories), "overview" (the
+    opening section, with the stories listed for context only) or "part" (the
+    section for a group of related stories; overview and other stories are
+    written separately). Approved examples contribute the same document: in full
+    for "full", only its opening for "overview", and not at all for "part", so
+    example tokens are not repeated in every section request.
+    """
+    name = _DOC_NAMES[doc]
+    instructions = {
+        "full": f"Create the {name} design document for the following requirement and user stories.",
+        "overview": (
+            f"Create only the overview section of the {name} design document for the following requirement. "
+            "The user stories are listed for context; they are covered in detail by separate sections, "
+            "so do not describe them one by one."
+        ),
+        "part": (
+            f"Create the section of the {name} design document that covers only the following user stories. "
+            "The overview and the other user stories are covered by separate sections, so do not repeat "
+            "an overview. Start with a short heading naming the area these stories cover."
+        ),
+    }[scope]
+
+    example_messages = []
+    for example in (examples or []) if scope != "part" else []:
+        example_doc = example.get(doc, "")
+        if scope == "overview":
+            example_doc = opening_paragraphs(example_doc, OVERVIEW_EXAMPLE_CHARS)
+        example_messages.append({
+            "role": "user",
+            "content": f"Requirement: {example.get('requirement', '')}\nUser Stories: {example.get('user_stories', '')}",
+        })
+        example_messages.append({"role": "assistant", "content": json.dumps({doc: example_doc})})
+
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"You are a helpful assistant that writes {name} design documents. "
+                "Output your response in JSON format only—no markdown, no extra commentary."
+            ),
+        },
+        *example_messages,
+        {
+            "role": "user",
+            "content": f"""
+            {instructions}
+
+            Requirement: {requirement}
+            User Stories: {user_stories}
+
+            "Output only JSON, with the single key '{doc}', like this:"
+
+            ```json
+            {{
+              "{doc}": "Document text here..."
+            }}
+            ```"""
+        },
+    ]
+
+
+def opening_paragraphs(text: str, limit: int) -> str:
+    """The leading paragraphs of `text` that fit in `limit` characters (at least the first one, cut)."""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n\n", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip()
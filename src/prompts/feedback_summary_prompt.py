@@ -0,0 +1,28 @@
+def generate_feedback_summary_prompt(changes: list[str]) -> list[dict]:
+    change_lines = "\n".join(f"- {change}" for change in changes)
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You consolidate product owner feedback into a short list of change requests. "
+                "Output your response in raw JSON format only — no explanations, no markdown."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+            Merge the following change requests, oldest first, into as few short items as possible.
+            Keep every distinct request, drop duplicates, and when two requests conflict keep the later one.
+
+            Change requests:
+            {change_lines}
+
+            Return only JSON in this structure:
+
+            ```json
+            {{
+            "changes": ["Change 1", "Change 2"]
+            }}
+            ```"""
+        },
+    ]
@@ -1,4 +1,6 @@
-def generate_revision_prompt(requirement: str, feedback: str) -> list[dict]:
+def generate_revision_prompt(requirement: str, feedback: str, changes: list[str] | None = None) -> list[dict]:
+    # Earlier feedback arrives as a compacted change list, so the prompt stays the same size every round.
+    change_lines = "\n".join(f"- {change}" for change in changes or []) or "- None"
     return [
         {
             "role": "system",
@@ -14,7 +16,10 @@ def generate_revision_prompt(requirement: str, feedback: str) -> list[dict]:
 
             Requirement: {requirement}
 
-            Feedback: {feedback}
+            All changes requested so far, oldest first:
+            {change_lines}
+
+            Latest feedback: {feedback}
 
             "Return only JSON with user stories and acceptance criteria in this structure:"
 
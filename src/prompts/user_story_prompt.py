@@ -1,5 +1,12 @@
-def generate_user_story_prompt(requirement: str) -> list[dict]:
-    return [
+import json
+
+
+def generate_user_story_prompt(requirement: str, examples: list[dict] | None = None) -> list[dict]:
+    """
+    Returns the user story prompt. Each example ({"requirement", "user_stories"})
+    is added as a prior user/assistant exchange so the model can follow it.
+    """
+    messages = [
         {
             "role": "system",
             "content": (
@@ -7,6 +14,14 @@ def generate_user_story_prompt(requirement: str) -> list[dict]:
                 "Output your response in raw JSON format only — no explanations, no markdown."
             ),
         },
+    ]
+    for example in examples or []:
+        messages.append({"role": "user", "content": f"Requirement: {example.get('requirement', '')}"})
+        messages.append({
+            "role": "assistant",
+            "content": json.dumps({"user_stories": example.get("user_stories", [])}),
+        })
+    messages.append(
         {
             "role": "user",
             "content": f"""
@@ -29,5 +44,6 @@ def generate_user_story_prompt(requirement: str) -> list[dict]:
             ]
             }}
             ```""",
-        },
-    ]
+        }
+    )
+    return messages
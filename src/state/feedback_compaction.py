@@ -0,0 +1,114 @@
+import os
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from src.llms.token_budget import count_tokens
+from src.utils.json_extract import extract_json
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+# Bounds of the change list sent with every revision prompt.
+MAX_CHANGES = int(os.getenv("DEVPILOT_FEEDBACK_MAX_CHANGES", "10"))
+MAX_CHANGE_TOKENS = int(os.getenv("DEVPILOT_FEEDBACK_MAX_TOKENS", "400"))
+# Above this many tokens the list is summarized by the cheap model, if one is given.
+SUMMARY_THRESHOLD_TOKENS = int(os.getenv("DEVPILOT_FEEDBACK_SUMMARY_TOKENS", "250"))
+# Word overlap at which two changes count as the same request (the newer wording
+# wins). Changes that mention different numbers are never duplicates.
+DUPLICATE_SIMILARITY = 0.9
+
+TOKEN_MODEL = "gpt-3.5-turbo"
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_WORD = re.compile(r"\w+")
+
+
+def merge_feedback(changes: List[str], feedback: str) -> List[str]:
+    """
+    Adds the items of a feedback message (one per line, bullets stripped) to the
+    change list, oldest first. An item that repeats an earlier change replaces it
+    and moves to the end, so the list holds each request once, newest wording last.
+    """
+    merged = list(changes)
+    for item in _split(feedback):
+        words = _words(item)
+        merged = [change for change in merged if _similarity(words, _words(change)) < DUPLICATE_SIMILARITY]
+        merged.append(item)
+    return merged
+
+
+def needs_summary(changes: List[str]) -> bool:
+    return _tokens(changes) > SUMMARY_THRESHOLD_TOKENS
+
+
+def bound_changes(changes: List[str]) -> List[str]:
+    """Drops the oldest changes until the list fits MAX_CHANGES and MAX_CHANGE_TOKENS."""
+    bounded = changes[-MAX_CHANGES:]
+    while len(bounded) > 1 and _tokens(bounded) > MAX_CHANGE_TOKENS:
+        bounded = bounded[1:]
+    return bounded
+
+
+def compact_feedback(changes: List[str], feedback: str,
+                     summarize: Optional[Callable[[List[str]], str]] = None) -> List[str]:
+    """
+    Merges `feedback` into the change list and keeps it bounded.
+
+    Args:
+        changes (list): Current change list, oldest first.
+        feedback (str): The new feedback message.
+        summarize (callable): Condenses a change list; returns the model's raw JSON
+            response ({"changes": [...]}). Used once the list is over SUMMARY_THRESHOLD_TOKENS.
+
+    Returns:
+        list: The new change list.
+    """
+    merged = merge_feedback(changes, feedback)
+    if summarize is not None and needs_summary(merged):
+        try:
+            merged = _parse_summary(summarize(merged)) or merged
+        except Exception:
+            logger.exception("Feedback summary failed; keeping the newest changes instead.")
+    return bound_changes(merged)
+
+
+async def acompact_feedback(changes: List[str], feedback: str,
+                            summarize: Optional[Callable[[List[str]], Awaitable[str]]] = None) -> List[str]:
+    """Async twin of `compact_feedback`."""
+    merged = merge_feedback(changes, feedback)
+    if summarize is not None and needs_summary(merged):
+        try:
+            merged = _parse_summary(await summarize(merged)) or merged
+        except Exception:
+            logger.exception("Feedback summary failed; keeping the newest changes instead.")
+    return bound_changes(merged)
+
+
+def _parse_summary(response: str) -> List[str]:
+    data = extract_json(response).data
+    items = data.get("changes") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        logger.warning("Feedback summary had no change list.")
+        return []
+    summary = [item.strip() for item in items if isinstance(item, str) and item.strip()]
+    logger.info(f"Summarized feedback into {len(summary)} changes.")
+    return summary
+
+
+def _split(feedback: str) -> List[str]:
+    items = (_BULLET.sub("", line).strip() for line in (feedback or "").splitlines())
+    return [item for item in items if item]
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.lower()))
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b or {w for w in a if w.isdigit()} != {w for w in b if w.isdigit()}:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _tokens(changes: List[str]) -> int:
+    return count_tokens("\n".join(changes), TOKEN_MODEL)
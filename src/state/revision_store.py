@@ -0,0 +1,133 @@
+import difflib
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.state.user_story_model import UserStoryModel
+
+# Revisions kept per session; older ones are dropped. Also bounds feedback_history.
+MAX_REVISIONS = int(os.getenv("DEVPILOT_MAX_REVISIONS", "20"))
+# A revision is stored in full after N - 1 deltas, so rebuilding one replays at most N - 1 deltas.
+SNAPSHOT_INTERVAL = int(os.getenv("DEVPILOT_REVISION_SNAPSHOT_INTERVAL", "8"))
+
+
+def story_digest(story: UserStoryModel) -> str:
+    return hashlib.blake2b(story.model_dump_json().encode("utf-8"), digest_size=12).hexdigest()
+
+
+class RevisionOp(BaseModel):
+    """Copy stories [start, end) of the previous revision, then append `insert`."""
+    start: int = 0
+    end: int = 0
+    insert: List[str] = Field(default_factory=list)
+
+
+class Revision(BaseModel):
+    feedback: str = ""
+    snapshot: Optional[List[str]] = None  # Story digests when stored in full,
+    ops: List[RevisionOp] = Field(default_factory=list)  # else the delta from the previous revision.
+
+
+class RevisionStore(BaseModel):
+    """
+    Previous user story lists, oldest first, with structural sharing: every
+    distinct story is stored once in `stories` and revisions refer to it by
+    digest, as a full snapshot or as a delta from the previous revision.
+    Only the newest `max_revisions` revisions are kept.
+    """
+    stories: Dict[str, UserStoryModel] = Field(default_factory=dict)
+    revisions: List[Revision] = Field(default_factory=list)
+    max_revisions: int = MAX_REVISIONS
+    snapshot_interval: int = SNAPSHOT_INTERVAL
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    def record(self, stories: List[UserStoryModel], feedback: str = "") -> None:
+        """Appends a revision and drops the oldest ones beyond `max_revisions`."""
+        digests = []
+        for story in stories:
+            digest = story_digest(story)
+            self.stories.setdefault(digest, story)
+            digests.append(digest)
+
+        if not self.revisions or self._deltas_since_snapshot() >= max(1, self.snapshot_interval) - 1:
+            self.revisions.append(Revision(feedback=feedback, snapshot=digests))
+        else:
+            self.revisions.append(Revision(feedback=feedback, ops=_delta(self._digests(-1), digests)))
+        self._prune()
+
+    def get(self, index: int) -> List[UserStoryModel]:
+        """Rebuilds revision `index` (negative indices count from the newest)."""
+        return [self.stories[digest] for digest in self._digests(index)]
+
+    def memory_bytes(self) -> int:
+        """Serialized size of the store, a stable measure of what it costs a session."""
+        return len(self.model_dump_json())
+
+    def _digests(self, index: int) -> List[str]:
+        if index < 0:
+            index += len(self.revisions)
+        if not 0 <= index < len(self.revisions):
+            raise IndexError("revision index out of range")
+        base = index
+        while self.revisions[base].snapshot is None:
+            base -= 1
+        digests = list(self.revisions[base].snapshot)
+        for revision in self.revisions[base + 1:index + 1]:
+            digests = _apply(digests, revision.ops)
+        return digests
+
+    def _deltas_since_snapshot(self) -> int:
+        count = 0
+        for revision in reversed(self.revisions):
+            if revision.snapshot is not None:
+                break
+            count += 1
+        return count
+
+    def _prune(self) -> None:
+        excess = len(self.revisions) - max(1, self.max_revisions)
+        if excess <= 0:
+            return
+        # Only the new head is rebuilt; it becomes a snapshot if it was a delta.
+        if self.revisions[excess].snapshot is None:
+            self.revisions[excess] = Revision(feedback=self.revisions[excess].feedback,
+                                              snapshot=self._digests(excess))
+        dropped = _stored_digests(self.revisions[:excess])
+        del self.revisions[:excess]
+        # Every story of a kept revision appears in a kept snapshot or insert.
+        unreferenced = dropped - _stored_digests(self.revisions)
+        for digest in unreferenced:
+            self.stories.pop(digest, None)
+
+
+def _stored_digests(revisions: List[Revision]) -> set:
+    digests = set()
+    for revision in revisions:
+        digests.update(revision.snapshot or ())
+        for op in revision.ops:
+            digests.update(op.insert)
+    return digests
+
+
+def _delta(previous: List[str], current: List[str]) -> List[RevisionOp]:
+    ops: List[RevisionOp] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, previous, current, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(RevisionOp(start=i1, end=i2))
+        elif tag in ("replace", "insert"):
+            if not ops:
+                ops.append(RevisionOp())
+            ops[-1].insert.extend(current[j1:j2])
+    return ops
+
+
+def _apply(previous: List[str], ops: List[RevisionOp]) -> List[str]:
+    digests: List[str] = []
+    for op in ops:
+        digests.extend(previous[op.start:op.end])
+        digests.extend(op.insert)
+    return digests
@@ -1,17 +1,31 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from src.state.user_story_model import UserStoryModel
 from src.state.design_doc_model import DesignDocumentModel
 from src.state.generated_code_model import CodeGenerationModel
+from src.state.revision_store import RevisionStore
 
 class WorkflowState(BaseModel):
-    requirement: Optional[str] = "" 
+    requirement: Optional[str] = ""
     user_stories: Optional[List[UserStoryModel]] = Field(default_factory=list)
     user_story_status: Optional[str] = "Pending"
     feedback: Optional[str] = ""
     feedback_history: List[str] = Field(default_factory=list)
-    revisions: List[List[UserStoryModel]] = Field(default_factory=list)
+    change_list: List[str] = Field(default_factory=list)  # Compacted feedback sent with every revision.
+    revisions: RevisionStore = Field(default_factory=RevisionStore)
     review_attempts: int = 0
     next_step: Optional[str] = "review_user_stories"
     design_doc: DesignDocumentModel = Field(default_factory=DesignDocumentModel)
-    code_generation: CodeGenerationModel = Field(default_factory=CodeGenerationModel)
\ No newline at end of file
+    code_generation: CodeGenerationModel = Field(default_factory=CodeGenerationModel)
+    near_duplicate: Optional[dict] = None  # {"requirement", "similarity"} when stories were reused.
+
+    @field_validator("revisions", mode="before")
+    @classmethod
+    def _revisions_from_lists(cls, value):
+        # Older states (and checkpoints) hold every revision as a full list of stories.
+        if isinstance(value, list):
+            store = RevisionStore()
+            for stories in value[-store.max_revisions:]:
+                store.record([UserStoryModel.model_validate(story) for story in stories])
+            return store
+        return value
@@ -1,7 +1,9 @@
 import streamlit as st
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
-from src.ui.components import render_section_heading, render_divider
+from src.ui.components import render_section_heading, render_divider, render_flash, rerun_after_action
+from src.ui.session import checkpoint_session
+from src.components.code_renderer import render_generated_code
 
 logger = Logger(__name__)
 
@@ -12,6 +14,7 @@ def code_generation_ui(state: WorkflowState, handle_generate_code,
 
     with st.expander("Step 4: Code Generation", expanded=True):
         render_section_heading("Step 4: Code Generation")
+        render_flash("code_generation")
 
         col1, col2 = st.columns(2)
 
@@ -32,7 +35,7 @@ def code_generation_ui(state: WorkflowState, handle_generate_code,
 
         st.session_state.workflow_state = state
         render_divider()
-        logger.info(f"[code_generation_ui] Final state: {state.__dict__}")
+        logger.debug("[code_generation_ui] Final state: %s", state.__dict__)
 
     return state
 
@@ -61,13 +64,12 @@ def render_code_gen_area(container, state: WorkflowState, handle_generate_code)
                 st.info("No code generated yet.")
                 if st.button("Generate Code"):
                     state = handle_generate_code(state)
-                    st.success("Code generation complete.")
+                    st.session_state.workflow_state = state
+                    rerun_after_action("code_generation", "Code generation complete.", whole_app=False)
             else:
-                # Display code files
+                # Display code files (one at a time, large ones as a preview)
                 st.subheader("Generated Code Files")
-                for filename, code_content in state.code_generation.generated_code.items():
-                    st.markdown(f"**{filename}**")
-                    st.code(code_content, language="python")
+                render_generated_code(state.code_generation.generated_code)
 
 
 def render_code_review_area(container, state: WorkflowState, handle_code_approval, handle_code_feedback) -> None:
@@ -81,6 +83,7 @@ def render_code_review_area(container, state: WorkflowState, handle_code_approva
         with approve_btn:
             if st.button("Approve Code"):
                 state = handle_code_approval(state)
+                checkpoint_session("code_approval")
                 st.success("Code approved.")
         with feedback_btn:
             if st.button("Submit Code Feedback"):
@@ -88,4 +91,5 @@ def render_code_review_area(container, state: WorkflowState, handle_code_approva
                     st.warning("Please enter feedback before submitting.")
                 else:
                     state = handle_code_feedback(state, code_feedback_text.strip())
+                    checkpoint_session("code_feedback")
                     st.info("Feedback submitted. Code status updated.")
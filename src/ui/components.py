@@ -1,4 +1,7 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from src.ui.session import checkpoint_session
 
 def render_heading(title: str, level: int = 3) -> None:
     level = min(max(level, 1), 6)  # Clamp level between 1 and 6
@@ -13,5 +16,24 @@ def render_divider() -> None:
 def render_labeled_text(label: str, content: str) -> None:
     st.markdown(f"**{label}**  \n{content}")
 
+def rerun_after_action(step: str, message: str | None = None, whole_app: bool = True,
+                       level: str = "success") -> None:
+    """
+    Reruns after a button in `step` changed the workflow state. Steps are
+    fragments, so a click reruns only its own step; `whole_app` also reruns the
+    steps that depend on the change. `message` is shown once in `step` by
+    `render_flash` (as st.success, st.info, st.error, ...), since elements drawn
+    before a rerun are discarded. The session is checkpointed first.
+    """
+    checkpoint_session(step)
+    if message:
+        st.session_state[f"flash_{step}"] = (level, message)
+    # A fragment-scoped rerun is only allowed while a fragment rerun is in progress.
+    in_fragment_run = bool(getattr(get_script_run_ctx(), "fragment_ids_this_run", None))
+    st.rerun(scope="fragment" if not whole_app and in_fragment_run else "app")
 
-
+def render_flash(step: str) -> None:
+    flash = st.session_state.pop(f"flash_{step}", None)
+    if flash:
+        level, message = flash
+        getattr(st, level)(message)
@@ -1,7 +1,11 @@
 import streamlit as st
 from src.state.workflow_state import WorkflowState
 from src.utils.logger import Logger
-from src.ui.components import render_section_heading, render_divider
+from src.ui.components import render_section_heading, render_divider, render_flash, rerun_after_action
+from src.ui.session import checkpoint_session
+from src.ui.job_progress import has_pending_job, render_job_progress
+from src.ui.speculation import DESIGN_DOC_STEP, apply_speculative_design_doc
+from src.components.design_doc_renderer import render_design_documents
 
 logger = Logger(__name__)
 
@@ -20,6 +24,7 @@ def design_doc_ui(state: WorkflowState, handle_create_design_doc,
 
     with st.expander("Step 3: Design Document", expanded=True):
         render_section_heading("Step 3: Design Document")
+        render_flash("design_doc")
 
         # We'll split the layout into two columns, for example,
         # one for "Create/Show Docs" and the other for "Approval/Feedback".
@@ -41,7 +46,7 @@ def design_doc_ui(state: WorkflowState, handle_create_design_doc,
         # Update session state
         st.session_state.workflow_state = state
         render_divider()
-        logger.info(f"[design_doc_ui] Final state: {state.__dict__}")
+        logger.debug("[design_doc_ui] Final state: %s", state.__dict__)
 
     return state
 
@@ -68,29 +73,35 @@ def render_design_doc_area(container, state: WorkflowState, handle_create_design
     we display a 'Create' button. If it exists, we display functional & technical text areas.
     """
     with container:
+        # A design document speculatively generated before approval may still be running.
+        if has_pending_job(DESIGN_DOC_STEP):
+            render_job_progress(DESIGN_DOC_STEP, apply_speculative_design_doc, _render_prepared_sections,
+                                failure_message="Failed to create design document.")
         # If no docs yet, show a 'Create' button:
-        if not state.design_doc.functional_doc and not state.design_doc.technical_doc:
+        elif not state.design_doc.functional_doc and not state.design_doc.technical_doc:
             st.info("No design document created yet.")
             if st.button("Create Design Document"):
-                state = handle_create_design_doc(state)
-                st.success("Design document created.")
+                live_area = st.container()
+                live_area.caption("Generating design document...")
+
+                def on_section(section, text):
+                    title = "Functional Document" if section == "functional_doc" else "Technical Document"
+                    with live_area:
+                        st.subheader(title)
+                        st.markdown(text)
+
+                state = handle_create_design_doc(state, on_section=on_section)
+                st.session_state.workflow_state = state
+                # Later steps only change once the design is approved.
+                rerun_after_action("design_doc", "Design document created.", whole_app=False)
         else:
-            # If docs already exist, show them in disabled text areas
-            st.subheader("Functional Document")
-            st.text_area(
-                "Functional Doc Content",
-                value=state.design_doc.functional_doc or "",
-                disabled=True,
-                height=150
-            )
-
-            st.subheader("Technical Document")
-            st.text_area(
-                "Technical Doc Content",
-                value=state.design_doc.technical_doc or "",
-                disabled=True,
-                height=150
-            )
+            # If docs already exist, show them in disabled text areas (large ones as a preview)
+            render_design_documents(state.design_doc.functional_doc, state.design_doc.technical_doc)
+
+
+def _render_prepared_sections(sections: list) -> None:
+    done = ", ".join("Functional Document" if s == "functional_doc" else "Technical Document" for s in dict.fromkeys(sections))
+    st.caption(f"Ready: {done}")
 
 
 def render_design_review_area(container, state: WorkflowState, handle_design_approval, handle_design_feedback) -> None:
@@ -108,11 +119,13 @@ def render_design_review_area(container, state: WorkflowState, handle_design_app
         with approve_btn:
             if st.button("Approve Design"):
                 state = handle_design_approval(state)
-                st.success("Design approved.")
+                st.session_state.workflow_state = state
+                rerun_after_action("design_doc", "Design approved.")
         with feedback_btn:
             if st.button("Submit Design Feedback"):
                 if not user_feedback.strip():
                     st.warning("Please enter feedback before submitting.")
                 else:
                     state = handle_design_feedback(state, user_feedback.strip())
+                    checkpoint_session("design_feedback")
                     st.info("Feedback submitted. Status set to 'Feedback'.")
@@ -1,14 +1,33 @@
+from typing import Callable, Optional
+
 from src.graph.workflow import Workflow
+from src.handlers.code_generation_service import (
+    CODEGEN_MODE,
+    handle_code_generation,
+    handle_code_generation_by_manifest,
+)
+from src.handlers.design_doc_service import (
+    DESIGN_DOC_MODE,
+    handle_design_doc_by_sections,
+    handle_design_doc_generation,
+    handle_design_doc_streaming,
+)
+from src.llms.openai_helper import get_openai_service
 from src.state.workflow_state import WorkflowState
+from src.state.user_story_model import UserStoryModel
 from src.utils.logger import Logger
+from src.vectorstore.retrieval import record_approved_artifact
+from src.vectorstore.requirement_dedup import record_approved_requirement
 
 logger = Logger(__name__)
 
-def handle_initial_workflow(state: WorkflowState) -> WorkflowState:
+def handle_initial_workflow(state: WorkflowState,
+                            on_story: Optional[Callable[[int, UserStoryModel], None]] = None,
+                            allow_reuse: bool = True) -> WorkflowState:
     try:
         requirement_str = getattr(state, "requirement", "")
         workflow = Workflow(requirement=requirement_str)
-        result = workflow.run_initial_only()
+        result = workflow.run_initial_only(on_story=on_story, allow_reuse=allow_reuse)
         logger.info("Initial workflow run completed.")
         return result
     except Exception as e:
@@ -18,6 +37,14 @@ def handle_initial_workflow(state: WorkflowState) -> WorkflowState:
 def handle_approval(state: WorkflowState) -> WorkflowState:
     try:
         state.user_story_status = "Approved"
+        record_approved_artifact("requirement", state.requirement or "", {})
+        approved_stories = [s.model_dump() for s in state.user_stories or []]
+        record_approved_artifact("user_stories", state.requirement or "", {
+            "requirement": state.requirement,
+            "user_stories": approved_stories,
+        })
+        if not state.near_duplicate:
+            record_approved_requirement(state.requirement or "", approved_stories)
         workflow = Workflow(requirement=(state.requirement or ""))
         workflow.state = state
         result = workflow.run_review_only()
@@ -48,21 +75,24 @@ def handle_feedback(state: WorkflowState) -> WorkflowState:
         raise
 
 
-def handle_create_design_doc(state: WorkflowState) -> WorkflowState:
+def handle_create_design_doc(state: WorkflowState,
+                             on_section: Optional[Callable[[str, str], None]] = None) -> WorkflowState:
     """
-    Creates or updates the design document with placeholders or
-    content from an LLM, then marks review_status as Pending.
+    Creates or updates the design document from the requirement and user stories,
+    then marks review_status as Pending. When `on_section` is given the response is
+    streamed and each finished section is passed to it as it arrives (in sections
+    mode, each document once all of its sections are merged).
     """
-    # Example placeholders (replace with actual AI-generated text if desired)
-    state.design_doc.functional_doc = (
-        "Placeholder functional requirements describing system behavior..."
-    )
-    state.design_doc.technical_doc = (
-        "Placeholder technical architecture details (data models, APIs, etc.)..."
-    )
-
-    # Reset to 'Pending' if it's a brand-new doc or a refresh
-    state.design_doc.review_status = "Pending"
+    ai_service = get_openai_service()
+    if DESIGN_DOC_MODE == "sections":
+        state = handle_design_doc_by_sections(state, ai_service, on_section)
+    elif on_section is not None:
+        state = handle_design_doc_streaming(state, ai_service.stream_llm_for_design_doc, on_section,
+                                            ai_service.call_llm_for_design_doc_section)
+    else:
+        state = handle_design_doc_generation(state, ai_service.call_llm_for_design_doc,
+                                             ai_service.call_llm_for_design_doc_section)
+
     state.design_doc.feedback = None  # Clear any old feedback
     return state
 
@@ -73,6 +103,12 @@ def handle_design_approval(state: WorkflowState) -> WorkflowState:
     """
     state.design_doc.review_status = "Approved"
     state.design_doc.feedback = None
+    record_approved_artifact("design_doc", state.requirement or "", {
+        "requirement": state.requirement,
+        "user_stories": "\n".join(s.user_story for s in state.user_stories or []),
+        "functional_doc": state.design_doc.functional_doc,
+        "technical_doc": state.design_doc.technical_doc,
+    })
     return state
 
 
@@ -94,12 +130,12 @@ def handle_generate_code(state: WorkflowState) -> WorkflowState:
         # Optionally raise an exception or log a warning
         return state
 
-    # Example placeholders for multi-file code:
-    state.code_generation.generated_code = {
-        "main.py": "def main():\n    print('Hello from main')\n",
-        "utils.py": "def helper():\n    return 'Helper result'\n"
-    }
-    state.code_generation.code_review_status = "Pending"
+    ai_service = get_openai_service()
+    if CODEGEN_MODE == "manifest":
+        state = handle_code_generation_by_manifest(state, ai_service)
+    else:
+        state = handle_code_generation(state, ai_service.call_llm_for_code_generation,
+                                       ai_service.call_llm_for_code_file)
     state.code_generation.code_feedback = None
     return state
 
@@ -110,6 +146,10 @@ def handle_code_approval(state: WorkflowState) -> WorkflowState:
     """
     state.code_generation.code_review_status = "Approved"
     state.code_generation.code_feedback = None
+    record_approved_artifact("code", f"{state.design_doc.functional_doc}\n\n{state.design_doc.technical_doc}", {
+        "requirement": state.requirement,
+        "files": state.code_generation.generated_code,
+    })
     return state
 
 
@@ -0,0 +1,87 @@
+# src/ui/job_progress.py
+
+import os
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from src.graph.sessions import bind_thread
+from src.jobs.executor import CANCELLED, SUCCEEDED, Job, get_job_executor
+from src.ui.components import rerun_after_action
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+JOB_POLL_SECONDS = float(os.getenv("DEVPILOT_UI_JOB_POLL_SECONDS", "1.0"))
+
+
+def submit_step_job(step: str, name: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+    """
+    Runs `fn(*args, **kwargs)` on the background job executor on behalf of `step`
+    and remembers the job in the session, so the script thread is free while it runs.
+    Workflows the job creates checkpoint to the session's thread.
+    """
+    with bind_thread(st.session_state.get("session_id")):
+        job = get_job_executor().submit(name, fn, *args, **kwargs)
+    st.session_state[f"job_{step}"] = job.id
+    return job
+
+
+def has_pending_job(step: str) -> bool:
+    return f"job_{step}" in st.session_state
+
+
+def pending_job(step: str) -> Optional[Job]:
+    """The step's submitted job that has not been applied yet, if it is still known."""
+    job_id = st.session_state.get(f"job_{step}")
+    return get_job_executor().get(job_id) if job_id else None
+
+
+def render_job_progress(step: str, on_success: Callable[[Any], Optional[str]],
+                        render_progress: Optional[Callable[[list], None]] = None,
+                        failure_message: str = "The job failed.") -> None:
+    """
+    Shows the step's running job and polls it every JOB_POLL_SECONDS seconds.
+
+    Once it has finished, `on_success(result)` applies the result to the session
+    state (and may return a confirmation message), then every step reruns.
+
+    Args:
+        step (str): Step the job belongs to.
+        on_success (callable): Applies the job result; runs on the script thread.
+        render_progress (callable): Renders the progress items reported so far.
+        failure_message (str): Shown with the error when the job failed.
+    """
+    _job_status(step, on_success, render_progress, failure_message)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_status(step: str, on_success, render_progress, failure_message: str) -> None:
+    executor = get_job_executor()
+    job_id = st.session_state.get(f"job_{step}")
+    job = executor.get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pop(f"job_{step}", None)
+        if job_id:
+            logger.warning(f"Job {job_id} of {step} is no longer known; it may have expired.")
+            rerun_after_action(step, "The background job was lost; please try again.", level="warning")
+        return
+
+    if not job.done:
+        snapshot = job.snapshot()
+        label = "Cancelling" if job.cancel_requested else "Running" if job.status == "running" else "Queued"
+        st.caption(f"{label}: {job.name} ({snapshot['elapsed_s']:.0f}s)")
+        if render_progress is not None and job.progress:
+            render_progress(list(job.progress))
+        if not job.cancel_requested and st.button("Cancel", key=f"cancel_{job.id}"):
+            executor.cancel(job.id)
+        return
+
+    st.session_state.pop(f"job_{step}", None)
+    executor.forget(job.id)
+    if job.status == SUCCEEDED:
+        rerun_after_action(step, on_success(job.result))
+    elif job.status == CANCELLED:
+        rerun_after_action(step, f"Cancelled: {job.name}.", level="info")
+    else:
+        rerun_after_action(step, f"{failure_message} {job.error}", level="error")
@@ -1,12 +1,19 @@
+from typing import Optional
+
 import streamlit as st
 from src.state.workflow_state import WorkflowState
-from src.ui.components import render_section_heading, render_divider
+from src.ui.components import render_section_heading, render_divider, render_flash, rerun_after_action
 from src.utils.logger import Logger
 from src.handlers.product_owner_service import approve_user_stories, submit_feedback
 from src.ui.requirement_input_ui import render_user_stories_column
+from src.ui.job_progress import has_pending_job, pending_job, render_job_progress, submit_step_job
+from src.ui.speculation import (adopt_design_doc_speculation, discard_design_doc_speculation,
+                                start_design_doc_speculation)
 
 logger = Logger(__name__)
 
+STEP = "product_owner_review"
+
 def product_owner_review(state: WorkflowState, handle_approval, handle_feedback):
     if not state or not getattr(state, "user_stories", None):
         logger.warning("Skipping Product Owner Review: no user stories found.")
@@ -20,47 +27,65 @@ def product_owner_review(state: WorkflowState, handle_approval, handle_feedback)
     with st.expander("Step 2: Product Owner Review", expanded=True):
         user_story_col = st.container()
         with user_story_col:
-            render_user_stories_column(user_story_col, state)
+            render_user_stories_column(user_story_col, state, key="review_user_stories")
 
         render_section_heading("Step 2: Product Owner Review")
         render_section_heading("Approve or Provide Feedback")
+        render_flash(STEP)
+        if has_pending_job(STEP):
+            # An unknown (expired) job is cleared by render_job_progress without applying anything.
+            job_name = getattr(pending_job(STEP), "name", "revise user stories")
+            render_job_progress(STEP, _APPLY_RESULT[job_name], failure_message=f"Failed to {job_name}.")
 
         col1, col2 = st.columns(2)
         render_approval_column(col1, handle_approval)
         render_feedback_column(col2, state, handle_feedback)
 
         render_divider()
-        logger.info(f"[product_owner_review] Final state: {state.__dict__}")
+        logger.debug("[product_owner_review] Final state: %s", state.__dict__)
         return state
 
 
 def render_approval_column(container, handle_approval):
     with container:
-        if st.button("✅ Approve User Stories"):
-            try:
-                updated_state = approve_user_stories(st.session_state.workflow_state, handle_approval)
-                st.session_state.workflow_state = updated_state
-                st.success("✅ User stories approved!")
-                logger.info("[product_owner_review] Approval handled successfully.")
-            except Exception as e:
-                st.error("Approval failed.")
-                st.exception(e)
+        if st.button("✅ Approve User Stories", disabled=has_pending_job(STEP)):
+            submit_step_job(STEP, "approve user stories", approve_user_stories,
+                            st.session_state.workflow_state.model_copy(deep=True), handle_approval)
+            rerun_after_action(STEP, whole_app=False)
 
 
 def render_feedback_column(container, state, handle_feedback):
     with container:
         feedback = st.text_area("Enter Feedback", value=state.feedback or "", height=120, key="feedback_input")
 
-        if st.button("✍️ Submit Feedback"):
-            try:
-                updated_state = submit_feedback(state, feedback, handle_feedback)
-
-                if isinstance(updated_state, WorkflowState):
-                    st.session_state.workflow_state = updated_state
-                    st.session_state.workflow_state.feedback = ""
-                    st.rerun()
-                else:
-                    st.error("Workflow state update failed. Unexpected return type.")
-            except Exception as e:
-                st.error("Feedback submission failed.")
-                st.exception(e)
+        if st.button("✍️ Submit Feedback", disabled=has_pending_job(STEP)):
+            if not feedback.strip():
+                st.warning("Please enter feedback before submitting.")
+                return
+            discard_design_doc_speculation("feedback submitted")
+            submit_step_job(STEP, "revise user stories", submit_feedback,
+                            state.model_copy(deep=True), feedback, handle_feedback)
+            rerun_after_action(STEP, whole_app=False)
+
+
+def _apply_approval(updated_state: WorkflowState) -> str:
+    st.session_state.workflow_state = updated_state
+    adopt_design_doc_speculation(updated_state)
+    logger.info("[product_owner_review] Approval handled successfully.")
+    return "✅ User stories approved!"
+
+
+def _apply_feedback(updated_state) -> Optional[str]:
+    if not isinstance(updated_state, WorkflowState):
+        raise TypeError("Workflow state update failed. Unexpected return type.")
+    st.session_state.workflow_state = updated_state
+    st.session_state.workflow_state.feedback = ""
+    start_design_doc_speculation(updated_state)
+    return None
+
+
+# Applies the result of each kind of review job to the session state.
+_APPLY_RESULT = {
+    "approve user stories": _apply_approval,
+    "revise user stories": _apply_feedback,
+}
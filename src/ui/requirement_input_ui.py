@@ -1,21 +1,29 @@
 # src/ui/requirement_input_ui.py
 
+from functools import partial
+
 import streamlit as st
 
 from src.state.workflow_state import WorkflowState
-from src.ui.components import render_section_heading, render_divider, render_labeled_text
+from src.ui.components import render_section_heading, render_divider, render_labeled_text, render_flash, rerun_after_action
 from src.utils.logger import Logger
 from src.handlers.requirement_service import handle_user_story_generation
-from src.components.user_story_renderer import render_user_stories
+from src.components.user_story_renderer import render_user_stories, render_user_story
+from src.jobs.executor import current_job
+from src.ui.job_progress import has_pending_job, render_job_progress, submit_step_job
+from src.ui.speculation import start_design_doc_speculation
 
 logger = Logger(__name__)
 
+STEP = "requirement_input"
+
 def requirement_input(state: WorkflowState, handle_initial_workflow) -> WorkflowState | None:
     if not validate_state(state):
         return None
 
     with st.expander("Requirement Gathering", expanded=True):
         render_section_heading("Step 1: Enter Software Requirement")
+        render_flash(STEP)
 
         col1, col2 = st.columns(2)
         render_requirement_input_area(col1, state, handle_initial_workflow)
@@ -23,7 +31,7 @@ def requirement_input(state: WorkflowState, handle_initial_workflow) -> Workflow
 
         st.session_state.workflow_state = state
         render_divider()
-        logger.info(f"[requirement_input] Final state: {state.__dict__}")
+        logger.debug("[requirement_input] Final state: %s", state.__dict__)
         return state
 
 
@@ -42,24 +50,60 @@ def validate_state(state: WorkflowState | None) -> bool:
 def render_requirement_input_area(container, state: WorkflowState, handle_initial_workflow) -> None:
     with container:
         requirement = st.text_area("Requirement", value=state.requirement or "", height=150)
+        if has_pending_job(STEP):
+            # Stories are rendered here as they stream in; the final list is shown
+            # by render_user_stories_column once the job has finished.
+            render_job_progress(STEP, _apply_generated_stories, _render_streamed_stories,
+                                failure_message="Failed to generate user stories.")
+            return
+
         if st.button("Generate User Stories", key="generate_button"):
             if requirement.strip():
-                try:
-                    state.requirement = requirement.strip()
-                    with st.spinner("Generating user stories..."):
-                        updated_state = handle_user_story_generation(state, handle_initial_workflow)
-
-                    state.user_stories = updated_state.user_stories
-                    logger.info("User stories successfully generated.")
-                except Exception as e:
-                    logger.exception("Failed to generate user stories.")
-                    st.error("Failed to generate user stories.")
-                    st.exception(e)
+                state.requirement = requirement.strip()
+                st.session_state.workflow_state = state
+                submit_step_job(STEP, "generate user stories", _generate_user_stories,
+                                state.model_copy(deep=True), handle_initial_workflow)
+                rerun_after_action(STEP, whole_app=False)
             else:
                 st.warning("Please enter a valid requirement.")
 
+        if state.near_duplicate and state.user_stories:
+            render_near_duplicate_notice(state, handle_initial_workflow)
+
+
+def render_near_duplicate_notice(state: WorkflowState, handle_initial_workflow) -> None:
+    match = state.near_duplicate
+    st.info(
+        f"Reused user stories from an approved requirement that is {match['similarity']:.0%} similar:\n\n"
+        f"> {match['requirement']}"
+    )
+    if st.button("Regenerate without reuse", key="regenerate_without_reuse"):
+        submit_step_job(STEP, "regenerate user stories", _generate_user_stories,
+                        state.model_copy(deep=True), partial(handle_initial_workflow, allow_reuse=False))
+        rerun_after_action(STEP, whole_app=False)
+
+
+def _generate_user_stories(state: WorkflowState, handle_initial_workflow) -> WorkflowState:
+    """Job body: generates stories, reporting each one as it streams in."""
+    job = current_job()
+    return handle_user_story_generation(state, handle_initial_workflow, on_story=lambda idx, story: job.report(story))
+
+
+def _render_streamed_stories(stories: list) -> None:
+    for idx, story in enumerate(stories):
+        render_user_story(story, idx)
+
+
+def _apply_generated_stories(updated_state: WorkflowState) -> str:
+    state = st.session_state.workflow_state
+    state.user_stories = updated_state.user_stories
+    state.near_duplicate = updated_state.near_duplicate
+    start_design_doc_speculation(state)
+    logger.info("User stories successfully generated.")
+    return "User stories generated."
+
 
-def render_user_stories_column(container, state: WorkflowState) -> None:
+def render_user_stories_column(container, state: WorkflowState, key: str = "user_stories") -> None:
     with container:
         render_section_heading("Auto-Generated User Stories")
         user_stories = getattr(state, "user_stories", None)
@@ -68,4 +112,4 @@ def render_user_stories_column(container, state: WorkflowState) -> None:
             st.info("Enter a requirement and click 'Generate User Stories' to see output.")
         
         else:
-            render_user_stories(user_stories)
+            render_user_stories(user_stories, key=key)
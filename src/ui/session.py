@@ -0,0 +1,98 @@
+# src/ui/session.py
+
+import streamlit as st
+
+from src.graph import sessions
+from src.state.workflow_state import WorkflowState
+from src.ui.speculation import discard_design_doc_speculation
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+SESSION_PARAM = "session"
+RECENT_SESSIONS = 10
+
+
+def init_session() -> WorkflowState:
+    """
+    Puts the workflow state in the session on its first run: resumed from the
+    checkpoints of the session named in the URL (?session=...), so a refresh or a
+    server restart comes back to the last step without calling the LLM, or a new
+    empty state under a new session id.
+    """
+    state = st.session_state.get("workflow_state")
+    if isinstance(state, WorkflowState) and "session_id" in st.session_state:
+        return state
+
+    thread_id = st.query_params.get(SESSION_PARAM)
+    resumed = None
+    if thread_id:
+        try:
+            resumed = sessions.resume(thread_id)
+        except Exception:
+            logger.exception(f"Failed to resume session {thread_id}.")
+    if resumed is None:
+        thread_id = thread_id or sessions.new_thread_id()
+        logger.info("Initialized workflow state.")
+    _open(thread_id, resumed or WorkflowState(requirement=""))
+    return st.session_state.workflow_state
+
+
+def session_id() -> str | None:
+    return st.session_state.get("session_id")
+
+
+def checkpoint_session(step: str) -> None:
+    """Checkpoints what `step` changed in the session's workflow state. Never fails the UI."""
+    thread_id = session_id()
+    state = st.session_state.get("workflow_state")
+    if not thread_id or not isinstance(state, WorkflowState):
+        return
+    try:
+        sessions.save_state(thread_id, state, step)
+    except Exception:
+        logger.exception(f"Failed to checkpoint session {thread_id} after {step}.")
+
+
+def render_session_sidebar() -> None:
+    """Lists recent sessions in the sidebar, with buttons to open or fork one or start afresh."""
+    with st.sidebar:
+        st.markdown("### Sessions")
+        st.caption(f"Current session: `{session_id()}`")
+        if st.button("New session", key="session_new"):
+            _open(sessions.new_thread_id(), WorkflowState(requirement=""))
+            st.rerun()
+
+        try:
+            recent = sessions.list_sessions(RECENT_SESSIONS)
+        except Exception:
+            logger.exception("Failed to list sessions.")
+            recent = []
+        if not recent:
+            return
+
+        labels = {
+            s["thread_id"]: f"{(s['requirement'] or 'No requirement')[:60]} · {s['writer']}"
+            for s in recent
+        }
+        chosen = st.selectbox("Recent sessions", list(labels), format_func=labels.get, key="session_choice")
+        open_col, fork_col = st.columns(2)
+        with open_col:
+            if st.button("Open", key="session_open", disabled=chosen == session_id()):
+                _open(chosen, sessions.resume(chosen) or WorkflowState(requirement=""))
+                st.rerun()
+        with fork_col:
+            if st.button("Fork", key="session_fork"):
+                forked = sessions.fork(chosen)
+                _open(forked, sessions.resume(forked) or WorkflowState(requirement=""))
+                st.rerun()
+
+
+def _open(thread_id: str, state: WorkflowState) -> None:
+    # Jobs, flashes and widget state belong to the previous session.
+    discard_design_doc_speculation("session closed")
+    for key in [k for k in st.session_state if str(k).startswith(("job_", "flash_"))]:
+        del st.session_state[key]
+    st.session_state.session_id = thread_id
+    st.session_state.workflow_state = state
+    st.query_params[SESSION_PARAM] = thread_id
@@ -0,0 +1,57 @@
+# src/ui/speculation.py
+
+from typing import Optional
+
+import streamlit as st
+
+from src.jobs.executor import SUCCEEDED, get_job_executor
+from src.jobs.speculation import speculate_design_doc
+from src.state.workflow_state import WorkflowState
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+SESSION_KEY = "speculation_design_doc"
+DESIGN_DOC_STEP = "design_doc"
+
+
+def start_design_doc_speculation(state: WorkflowState) -> None:
+    """Pre-generates the design document for the stories now under review (when enabled)."""
+    discard_design_doc_speculation("new user stories")
+    speculation = speculate_design_doc(state)
+    if speculation is not None:
+        st.session_state[SESSION_KEY] = speculation
+
+
+def discard_design_doc_speculation(reason: str) -> None:
+    speculation = st.session_state.pop(SESSION_KEY, None)
+    if speculation is not None:
+        speculation.discard(reason)
+
+
+def adopt_design_doc_speculation(state: WorkflowState) -> None:
+    """
+    Uses the speculative design document for the approved `state` if it was
+    generated from the same stories: a finished one is applied right away, a
+    running one becomes the design step's pending job.
+    """
+    speculation = st.session_state.pop(SESSION_KEY, None)
+    if speculation is None or state.design_doc.functional_doc or state.design_doc.technical_doc:
+        if speculation is not None:
+            speculation.discard("design document already exists")
+        return
+    job = speculation.claim(state)
+    if job is None:
+        return
+    if job.status == SUCCEEDED:
+        get_job_executor().forget(job.id)
+        apply_speculative_design_doc(job.result, state)
+    elif not job.done:
+        st.session_state[f"job_{DESIGN_DOC_STEP}"] = job.id
+
+
+def apply_speculative_design_doc(result: WorkflowState, state: Optional[WorkflowState] = None) -> str:
+    state = state or st.session_state.workflow_state
+    state.design_doc = result.design_doc
+    logger.info("Applied the speculative design document.")
+    return "Design document created."
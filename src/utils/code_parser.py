@@ -1,11 +1,20 @@
 # src/utils/code_parser.py
 
-import json
-from typing import Union
+from typing import Optional, Tuple, Union
+from src.utils.json_extract import ExtractionResult, extract_json
 from src.utils.logger import Logger
 
 logger = Logger(__name__)
 
+def _extract_object(raw_response: Union[str, dict]) -> ExtractionResult:
+    result = extract_json(raw_response)
+    if result.data is None:
+        raise ValueError(result.error)
+    if not isinstance(result.data, dict):
+        raise ValueError("Payload is not a JSON object.")
+    return result
+
+
 def parse_generated_code_response(raw_response: Union[str, dict]) -> dict:
     """
     Parses LLM response into a dictionary of filenames and their content.
@@ -14,23 +23,83 @@ def parse_generated_code_response(raw_response: Union[str, dict]) -> dict:
         raw_response (str | dict): JSON string or dict from LLM response.
 
     Returns:
-        dict: { filename: code_str }
+        dict: { filename: code_str }; files cut off by truncation are omitted.
+    """
+    return parse_generated_code_result(raw_response)[0]
+
+
+def parse_generated_code_result(raw_response: Union[str, dict]) -> Tuple[dict, Optional[str]]:
+    """
+    Like `parse_generated_code_response`, but also returns the name of the file
+    that was cut off by truncation (if its name was written), so only that file
+    needs to be requested again.
+
+    Returns:
+        tuple: (files, lost_filename)
     """
     try:
-        if isinstance(raw_response, str):
-            clean = raw_response.strip()
-            if "```json" in clean:
-                import re
-                json_block = re.search(r"```json(.*?)```", clean, re.DOTALL)
-                clean = json_block.group(1).strip() if json_block else clean
-            parsed = json.loads(clean)
-        elif isinstance(raw_response, dict):
-            parsed = raw_response
-        else:
-            raise ValueError("Unsupported response type.")
-
-        return parsed.get("files", {})
+        result = _extract_object(raw_response)
+
+        files = result.data.get("files", {})
+        files = {name: code for name, code in files.items() if isinstance(code, str)}
+        lost = result.lost_under("files")
+        if lost is not None:
+            logger.warning(f"Generated code response was cut off in {lost[1]}.")
+        return files, lost[1] if lost is not None else None
 
     except Exception as e:
         logger.error(f"Failed to parse generated code response: {e}")
+        return {}, None
+
+
+def parse_code_manifest_response(raw_response: Union[str, dict]) -> list[dict]:
+    """
+    Parses the file-planning response into a list of manifest entries.
+
+    Args:
+        raw_response (str | dict): JSON string or dict from LLM response.
+
+    Returns:
+        list: [{ "filename": str, "responsibility": str, "interfaces": list[str] }]
+    """
+    try:
+        parsed = _extract_object(raw_response).data
+
+        manifest = []
+        seen = set()
+        for entry in parsed.get("files", []):
+            filename = entry.get("filename") if isinstance(entry, dict) else None
+            if not filename or filename in seen:
+                continue
+            seen.add(filename)
+            manifest.append({
+                "filename": filename,
+                "responsibility": entry.get("responsibility", ""),
+                "interfaces": list(entry.get("interfaces") or []),
+            })
+        return manifest
+
+    except Exception as e:
+        logger.error(f"Failed to parse code manifest response: {e}")
+        return []
+
+
+def parse_code_revision_response(raw_response: Union[str, dict]) -> dict:
+    """
+    Parses a code revision response into per-file changes.
+
+    Args:
+        raw_response (str | dict): JSON string or dict from LLM response.
+
+    Returns:
+        dict: { filename: {"diff": str} | {"content": str} | {"delete": True} }
+    """
+    try:
+        parsed = _extract_object(raw_response).data
+
+        changes = parsed.get("changes", {})
+        return {name: change for name, change in changes.items() if isinstance(change, dict)}
+
+    except Exception as e:
+        logger.error(f"Failed to parse code revision response: {e}")
         return {}
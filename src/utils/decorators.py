@@ -1,18 +1,41 @@
+import inspect
 from functools import wraps
 from src.utils.logger import Logger
+from src.utils.metrics import span
 
 logger = Logger(__name__)
 
 def log_node(func):
+    """
+    Logs entry/exit of a graph node and records its latency, token usage and
+    failures (see `src.utils.metrics.span`).
+    """
+    node_name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(state, *args, **kwargs):
+            logger.info(f"🟢 Entering node: {node_name}")
+            logger.debug("State before: %s", state.__dict__)
+
+            with span("node", node_name):
+                result = await func(state, *args, **kwargs)
+
+            logger.debug("State after: %s", state.__dict__)
+            logger.info(f"✅ Exiting node: {node_name}")
+
+            return result  # ✅ Must return WorkflowState!
+        return async_wrapper
+
     @wraps(func)
-    def wrapper(self, state, *args, **kwargs):
-        node_name = func.__name__
+    def wrapper(state, *args, **kwargs):
         logger.info(f"🟢 Entering node: {node_name}")
-        logger.debug(f"State before: {state.__dict__}")
+        logger.debug("State before: %s", state.__dict__)
 
-        result = func(self, state, *args, **kwargs)
+        with span("node", node_name):
+            result = func(state, *args, **kwargs)
 
-        logger.debug(f"State after: {state.__dict__}")
+        logger.debug("State after: %s", state.__dict__)
         logger.info(f"✅ Exiting node: {node_name}")
 
         return result  # ✅ Must return WorkflowState!
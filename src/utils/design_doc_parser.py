@@ -1,11 +1,14 @@
 # src/utils/design_doc_parser.py
 
-import json
-from typing import Union
+from typing import List, Tuple, Union
+from src.utils.json_extract import extract_json
 from src.utils.logger import Logger
 
 logger = Logger(__name__)
 
+DOC_KEYS = ("functional_doc", "technical_doc")
+
+
 def parse_design_doc_response(raw_response: Union[str, dict]) -> dict:
     """
     Parses LLM response into a dictionary containing design docs.
@@ -14,26 +17,28 @@ def parse_design_doc_response(raw_response: Union[str, dict]) -> dict:
         raw_response (str | dict): JSON string or dict from LLM response.
 
     Returns:
-        dict: { "functional_doc": str, "technical_doc": str }
+        dict: { "functional_doc": str, "technical_doc": str }; a document cut off
+        by truncation is returned as "".
+    """
+    return parse_design_doc_result(raw_response)[0]
+
+
+def parse_design_doc_result(raw_response: Union[str, dict]) -> Tuple[dict, List[str]]:
     """
-    try:
-        if isinstance(raw_response, str):
-            clean = raw_response.strip()
-            if "```json" in clean:
-                import re
-                json_block = re.search(r"```json(.*?)```", clean, re.DOTALL)
-                clean = json_block.group(1).strip() if json_block else clean
-            parsed = json.loads(clean)
-        elif isinstance(raw_response, dict):
-            parsed = raw_response
-        else:
-            raise ValueError("Unsupported response type.")
-
-        return {
-            "functional_doc": parsed.get("functional_doc", ""),
-            "technical_doc": parsed.get("technical_doc", "")
-        }
-
-    except Exception as e:
-        logger.error(f"Failed to parse design doc response: {e}")
-        return {"functional_doc": "", "technical_doc": ""}
+    Like `parse_design_doc_response`, but also returns the documents that were
+    cut off by truncation, so only those need to be requested again.
+
+    Returns:
+        tuple: (docs, lost) where lost lists keys of DOC_KEYS, in document order.
+    """
+    result = extract_json(raw_response)
+    parsed = result.data if isinstance(result.data, dict) else None
+    if parsed is None:
+        logger.error(f"Failed to parse design doc response: {result.error or 'payload is not an object'}")
+        return {"functional_doc": "", "technical_doc": ""}, []
+
+    docs = {key: parsed.get(key, "") for key in DOC_KEYS}
+    lost = [key for key in DOC_KEYS if (key,) in result.lost]
+    if lost:
+        logger.warning(f"Design doc response was cut off in {', '.join(lost)}.")
+    return docs, lost
@@ -0,0 +1,166 @@
+# src/utils/diff_apply.py
+
+import re
+from typing import List, Tuple
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchApplyError(ValueError):
+    """Raised when a unified diff does not match the file it is applied to."""
+
+
+def parse_hunks(diff: str) -> List[Tuple[int, List[str], List[str]]]:
+    """
+    Splits a unified diff into hunks.
+
+    Returns:
+        list: (old_start, old_lines, new_lines) per hunk, where old_start is 1-based.
+    """
+    hunks = []
+    current = None
+    lines = diff.splitlines()
+    for index, line in enumerate(lines):
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+        if current is None or line.startswith("\\") or _is_file_header(lines, index):
+            continue
+
+        _, old_lines, new_lines = current
+        if line.startswith("-"):
+            old_lines.append(line[1:])
+        elif line.startswith("+"):
+            new_lines.append(line[1:])
+        else:
+            # Context line; models often drop the leading space on blank lines.
+            text = line[1:] if line.startswith(" ") else line
+            old_lines.append(text)
+            new_lines.append(text)
+
+    if not hunks:
+        raise PatchApplyError("Diff contains no hunks.")
+    return hunks
+
+
+def _is_file_header(lines: List[str], index: int) -> bool:
+    """
+    Whether lines[index] is a "--- a/file" / "+++ b/file" header between hunks.
+    Inside a hunk such lines are removals of "-- ..." or additions of "++ ...",
+    so they only count as headers when the pair is directly followed by a hunk header.
+    """
+    line = lines[index]
+    if line.startswith("--- "):
+        pair = index + 1
+    elif line.startswith("+++ ") and index > 0 and lines[index - 1].startswith("--- "):
+        pair = index
+    else:
+        return False
+    return (pair < len(lines) and lines[pair].startswith("+++ ")
+            and pair + 1 < len(lines) and bool(_HUNK_HEADER.match(lines[pair + 1])))
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """
+    Applies a unified diff to `original`.
+
+    Each hunk is matched at its stated line first and then at the nearest offset
+    after the previous hunk, ignoring trailing whitespace.
+
+    Raises:
+        PatchApplyError: If any hunk's context or removed lines cannot be found.
+    """
+    lines = original.split("\n")
+    trailing_newline = original.endswith("\n")
+    if trailing_newline:
+        lines.pop()
+
+    cursor = 0
+    offset = 0
+    for index, (old_start, old_lines, new_lines) in enumerate(parse_hunks(diff), start=1):
+        expected = max(old_start - 1 + offset, cursor)
+        if not old_lines:
+            position = min(max(old_start + offset, cursor), len(lines)) if old_start else cursor
+        else:
+            position = _find_block(lines, old_lines, expected, cursor)
+            if position < 0:
+                raise PatchApplyError(f"Hunk {index} does not match the file (expected near line {old_start}).")
+
+        lines[position:position + len(old_lines)] = new_lines
+        cursor = position + len(new_lines)
+        offset = position - (old_start - 1) + len(new_lines) - len(old_lines)
+
+    result = "\n".join(lines)
+    return result + "\n" if trailing_newline else result
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, lower_bound: int) -> int:
+    wanted = [line.rstrip() for line in block]
+    size = len(wanted)
+    last = len(lines) - size
+    if last < lower_bound:
+        return -1
+
+    expected = min(max(expected, lower_bound), last)
+    for distance in range(0, max(expected - lower_bound, last - expected) + 1):
+        for start in (expected - distance, expected + distance):
+            if lower_bound <= start <= last and all(
+                lines[start + i].rstrip() == wanted[i] for i in range(size)
+            ):
+                return start
+    return -1
+
+
+def validate_source(filename: str, content: str) -> bool:
+    """Returns False if a Python file no longer compiles after an edit."""
+    if not filename.endswith(".py"):
+        return True
+    try:
+        compile(content, filename, "exec")
+        return True
+    except (SyntaxError, ValueError) as e:
+        logger.warning(f"Revised {filename} does not compile: {e}")
+        return False
+
+
+def apply_code_changes(files: dict[str, str], changes: dict[str, dict]) -> Tuple[dict[str, str], List[str]]:
+    """
+    Applies per-file changes from a code revision response.
+
+    Args:
+        files (dict): Current { filename: code_str }.
+        changes (dict): { filename: {"diff": str} | {"content": str} | {"delete": True} }.
+
+    Returns:
+        tuple: (revised files, filenames whose change could not be applied or
+        validated and need a full rewrite). Failed files keep their original content.
+    """
+    revised = dict(files)
+    failed = []
+    for filename, change in changes.items():
+        try:
+            if change.get("delete"):
+                revised.pop(filename, None)
+                continue
+            if isinstance(change.get("content"), str):
+                content = change["content"]
+            elif isinstance(change.get("diff"), str):
+                content = apply_unified_diff(files.get(filename, ""), change["diff"])
+            else:
+                raise PatchApplyError("Change has neither a diff nor content.")
+        except PatchApplyError as e:
+            logger.warning(f"Could not apply change to {filename}: {e}")
+            failed.append(filename)
+            continue
+
+        if validate_source(filename, content):
+            revised[filename] = content
+        else:
+            failed.append(filename)
+    return revised, failed
@@ -0,0 +1,245 @@
+# src/utils/json_extract.py
+
+import json
+from typing import Any, List, Optional, Tuple, Union
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+# strict=False accepts raw control characters (e.g. newlines) inside strings,
+# which models frequently emit in multi-line code and documents.
+_DECODER = json.JSONDecoder(strict=False)
+_WHITESPACE = " \t\r\n"
+_FENCE = "```json"
+# Depth of the container whose complete children are kept when a payload is cut
+# off: 2 keeps finished elements of a top-level collection ("user_stories", "files").
+RECOVERY_DEPTH = 2
+
+Path = Tuple[Union[str, int], ...]
+
+
+class ExtractionResult:
+    """
+    Outcome of `extract_json`.
+
+    Attributes:
+        data: The parsed payload; for a repaired response only its complete parts.
+        complete (bool): The payload parsed without any repair.
+        truncated (bool): The response ended inside the payload (e.g. hit the token limit).
+        repairs (list): Human-readable notes on what was repaired.
+        lost (list): Paths of values that were cut off and dropped, outermost first,
+            e.g. [("user_stories",), ("user_stories", 7), ("user_stories", 7, "acceptance_criteria")].
+        error (str): Why nothing could be extracted, if `data` is None.
+    """
+
+    def __init__(self, data: Any = None, complete: bool = False, truncated: bool = False,
+                 repairs: Optional[List[str]] = None, lost: Optional[List[Path]] = None,
+                 error: Optional[str] = None):
+        self.data = data
+        self.complete = complete
+        self.truncated = truncated
+        self.repairs = repairs or []
+        self.lost = lost or []
+        self.error = error
+
+    def lost_under(self, *prefix: Union[str, int]) -> Optional[Path]:
+        """Returns the first lost path directly below `prefix`, e.g. ("user_stories", 7)."""
+        for path in self.lost:
+            if len(path) == len(prefix) + 1 and path[:len(prefix)] == prefix:
+                return path
+        return None
+
+    def __repr__(self) -> str:
+        return (f"ExtractionResult(complete={self.complete}, truncated={self.truncated}, "
+                f"repairs={self.repairs}, lost={self.lost}, error={self.error!r})")
+
+
+def extract_json(raw_response: Union[str, dict, list]) -> ExtractionResult:
+    """
+    Finds and parses the JSON payload of an LLM response.
+
+    The payload is located without regexes or slicing: anything before the first
+    "{" or "[" (prose, a ```json fence) and anything after the payload (a closing
+    fence) is ignored. If the payload does not parse, one scan over it repairs
+    trailing commas and, when the response was cut off, closes every open
+    container after its last complete value, so all finished elements survive.
+
+    Args:
+        raw_response (str | dict | list): Raw LLM content, or an already parsed payload.
+
+    Returns:
+        ExtractionResult: Parsed data plus what was repaired and what was lost.
+    """
+    if isinstance(raw_response, (dict, list)):
+        return ExtractionResult(raw_response, complete=True)
+    if not isinstance(raw_response, str):
+        return ExtractionResult(error=f"Unsupported response type {type(raw_response).__name__}.")
+
+    text = raw_response
+    start = _payload_start(text)
+    if start < 0:
+        return ExtractionResult(error="No JSON object or array found.")
+
+    try:
+        data, _ = _DECODER.raw_decode(text, start)
+        return ExtractionResult(data, complete=True)
+    except json.JSONDecodeError as e:
+        first_error = e
+
+    return _repair(text, start, first_error)
+
+
+def has_complete_json(text: str) -> bool:
+    """True if `text` holds a JSON payload that parses without repair (no logging, no repair scan)."""
+    start = _payload_start(text)
+    if start < 0:
+        return False
+    try:
+        _DECODER.raw_decode(text, start)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def _payload_start(text: str) -> int:
+    fence = text.find(_FENCE)
+    search_from = fence + len(_FENCE) if fence >= 0 else 0
+    brace = text.find("{", search_from)
+    bracket = text.find("[", search_from)
+    if brace < 0 or (0 <= bracket < brace):
+        return bracket
+    return brace
+
+
+class _Open:
+    __slots__ = ("closer", "key", "index", "last_end", "pending_key")
+
+    def __init__(self, closer: str):
+        self.closer = closer
+        self.key = None            # member currently being written (objects)
+        self.index = 0             # number of complete elements (arrays)
+        self.last_end = None       # offset just past the last complete child value
+        self.pending_key = False   # a key string was read, its value has not completed
+
+
+def _repair(text: str, start: int, first_error: json.JSONDecodeError) -> ExtractionResult:
+    stack: List[_Open] = []
+    skip: List[int] = []           # offsets of trailing commas to drop
+    last_comma = -1
+    in_string = False
+    escape = False
+    string_start = 0
+    literal_cut = False
+    end = len(text)
+    i = start
+
+    while i < end:
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                _string_done(text, stack, string_start, i + 1)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+            string_start = i
+        elif c in "{[":
+            stack.append(_Open("}" if c == "{" else "]"))
+        elif c in "}]":
+            if last_comma >= 0 and not text[last_comma + 1:i].strip(_WHITESPACE):
+                skip.append(last_comma)
+            stack.pop()
+            if not stack:
+                end = i + 1
+                break
+            _value_done(stack[-1], i + 1)
+        elif c == ",":
+            last_comma = i
+            stack[-1].key = None
+        elif c not in _WHITESPACE and c != ":":
+            # Number or literal: complete once its last character is followed by a delimiter.
+            j = i
+            while j < end and text[j] not in ",}] \t\r\n":
+                j += 1
+            if j < end:
+                _value_done(stack[-1], j)
+            else:
+                literal_cut = True
+            i = j
+            continue
+        i += 1
+
+    repairs: List[str] = []
+    if skip:
+        repairs.append(f"removed {len(skip)} trailing comma(s)")
+
+    lost: List[Path] = []
+    truncated = bool(stack)
+    cut = end
+    closers = ""
+    if truncated:
+        mid_value = in_string or literal_cut or stack[-1].pending_key
+        path: List[Union[str, int]] = []
+        for depth, frame in enumerate(stack):
+            child = frame.key if frame.closer == "}" else frame.index
+            if child is None or not (depth < len(stack) - 1 or mid_value):
+                break
+            path.append(child)
+            lost.append(tuple(path))
+        # Recover at the granularity of the top-level collections' elements: keep
+        # the complete children of the container at depth RECOVERY_DEPTH (or the
+        # deepest open one above it) and drop the partially written child, so a
+        # half-written story or file never looks finished.
+        kept = stack[:RECOVERY_DEPTH]
+        while len(kept) > 1 and kept[-1].last_end is None:
+            kept.pop()
+        cut = kept[-1].last_end if kept[-1].last_end is not None else start + 1
+        closers = "".join(frame.closer for frame in reversed(kept))
+        repairs.append(f"closed {len(kept)} container(s) cut off by truncation")
+
+    pieces = []
+    position = start
+    for offset in sorted(o for o in skip if o < cut):
+        pieces.append(text[position:offset])
+        position = offset + 1
+    pieces.append(text[position:cut])
+    pieces.append(closers)
+
+    try:
+        data = _DECODER.decode("".join(pieces))
+    except json.JSONDecodeError as e:
+        logger.error(f"Could not repair JSON payload: {first_error}; after repair: {e}")
+        return ExtractionResult(truncated=truncated, repairs=repairs, lost=lost, error=str(first_error))
+
+    if truncated:
+        dropped = lost[len(kept) - 1] if len(lost) >= len(kept) else "a partially written member"
+        logger.warning(f"Recovered a truncated JSON payload; lost {dropped}.")
+    return ExtractionResult(data, complete=False, truncated=truncated, repairs=repairs, lost=lost)
+
+
+def _string_done(text: str, stack: List[_Open], string_start: int, string_end: int) -> None:
+    frame = stack[-1]
+    if frame.closer == "}" and not frame.pending_key:
+        try:
+            frame.key = json.loads(text[string_start:string_end])
+        except json.JSONDecodeError:
+            frame.key = None
+        frame.pending_key = True
+        return
+    _value_done(frame, string_end)
+
+
+def _value_done(frame: _Open, value_end: int) -> None:
+    frame.last_end = value_end
+    if frame.closer == "]":
+        frame.index += 1
+    else:
+        frame.key = None
+        frame.pending_key = False
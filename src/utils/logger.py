@@ -1,48 +1,215 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
 import re
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Records are handed to a background listener thread through a bounded queue, so
+# the request path never waits on file or console I/O. When the queue is full,
+# records are dropped and counted instead of blocking.
+LOG_LEVEL = os.getenv("DEVPILOT_LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("DEVPILOT_LOG_QUEUE_SIZE", "10000"))
+LOG_FILE_FORMAT = os.getenv("DEVPILOT_LOG_FORMAT", "json").lower()  # "json" or "text"
+
+_NON_ASCII = re.compile(r'[^\x00-\x7F]+')
+
+# Standard LogRecord attributes; anything else on a record came from `extra=`.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SanitizingFormatter(logging.Formatter):
+    """Plain-text formatter that strips non-ASCII characters (e.g. emoji) from the output."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return _NON_ASCII.sub('', super().format(record))
+
+
+class _BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops records (and counts them) instead of blocking on a full queue."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped: dict[str, int] = {}
+        self._reported_drops = 0
+        self._counts_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args into the message on the calling thread (they may be mutated
+        # later) but keep the traceback separate so formatters can structure it.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._counts_lock:
+                self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+            return
+
+        with self._counts_lock:
+            self.enqueued += 1
+            total_dropped = sum(self.dropped.values())
+            unreported = total_dropped - self._reported_drops
+            if unreported:
+                self._reported_drops = total_dropped
+        if unreported:
+            notice = logging.makeLogRecord({
+                "name": record.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"Log queue was full; dropped {unreported} records.", "dropped": unreported,
+            })
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                pass
+
+
+class _ModuleFileHandler(logging.Handler):
+    """Listener-side handler that writes each logger's records to its own rotating file."""
+
+    def __init__(self, log_dir: str, formatter: logging.Formatter):
+        super().__init__()
+        self.log_dir = log_dir
+        self.setFormatter(formatter)
+        self._handlers: dict[str, RotatingFileHandler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = self._handlers.get(record.name)
+        if handler is None:
+            log_file = os.path.join(self.log_dir, f"{record.name}.log")
+            handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=3, encoding="utf-8")
+            handler.setFormatter(self.formatter)
+            self._handlers[record.name] = handler
+        handler.handle(record)
+
+    def close(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+
+class _LogPipeline:
+    """The process-wide queue, its handler and the listener thread draining it."""
+
+    def __init__(self, log_dir: str):
+        os.makedirs(log_dir, exist_ok=True)
+        self.queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.handler = _BoundedQueueHandler(self.queue)
+
+        file_formatter = (
+            JsonFormatter() if LOG_FILE_FORMAT == "json"
+            else SanitizingFormatter("%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+        )
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(SanitizingFormatter("%(levelname)s - %(message)s"))
+
+        self.listener = QueueListener(self.queue, _ModuleFileHandler(log_dir, file_formatter), console_handler)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Drains the queue and stops the listener thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
 
 class Logger:
     LOG_DIR = os.path.join(os.path.dirname(__file__), "../../logs")
 
-    def __init__(self, module_name: str):
-        if not os.path.exists(self.LOG_DIR):
-            os.makedirs(self.LOG_DIR)
-
-        log_file = os.path.join(self.LOG_DIR, f"{module_name}.log")
+    _pipeline = None
+    _pipeline_lock = threading.Lock()
 
+    def __init__(self, module_name: str):
         self._logger = logging.getLogger(module_name)
-        self._logger.setLevel(logging.INFO)
+        self._logger.setLevel(LOG_LEVEL)
 
-        if not self._logger.hasHandlers():
-            file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=3)
-            file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(module)s - %(message)s"))
+        handler = self._get_pipeline().handler
+        if handler not in self._logger.handlers:
+            self._logger.addHandler(handler)
 
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+    @classmethod
+    def _get_pipeline(cls) -> _LogPipeline:
+        if cls._pipeline is None:
+            with cls._pipeline_lock:
+                if cls._pipeline is None:
+                    cls._pipeline = _LogPipeline(os.path.abspath(cls.LOG_DIR))
+        return cls._pipeline
 
-            self._logger.addHandler(file_handler)
-            self._logger.addHandler(console_handler)
+    @classmethod
+    def stats(cls) -> dict:
+        """Returns queue depth and enqueued/dropped record counts for this process."""
+        pipeline = cls._get_pipeline()
+        return {
+            "queue_size": pipeline.queue.qsize(),
+            "queue_capacity": LOG_QUEUE_SIZE,
+            "enqueued": pipeline.handler.enqueued,
+            "dropped": dict(pipeline.handler.dropped),
+        }
+
+    @classmethod
+    def flush(cls) -> None:
+        """Blocks until every queued record has been written."""
+        if cls._pipeline is not None:
+            cls._pipeline.stop()
+            cls._pipeline.listener.start()
 
     def sanitize(self, msg):
-        return re.sub(r'[^\x00-\x7F]+', '', str(msg))
+        return _NON_ASCII.sub('', str(msg))
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
 
-    # Overriding log methods to sanitize messages
+    # Messages are formatted lazily: pass %-style args ("State: %s", state) and
+    # nothing is formatted unless the level is enabled. Sanitizing happens in the
+    # listener thread's formatters.
     def info(self, msg, *args, **kwargs):
-        self._logger.info(self.sanitize(msg), *args, **kwargs)
+        self._logger.info(msg, *args, stacklevel=2, **kwargs)
 
     def error(self, msg, *args, **kwargs):
-        self._logger.error(self.sanitize(msg), *args, **kwargs)
+        self._logger.error(msg, *args, stacklevel=2, **kwargs)
 
     def warning(self, msg, *args, **kwargs):
-        self._logger.warning(self.sanitize(msg), *args, **kwargs)
+        self._logger.warning(msg, *args, stacklevel=2, **kwargs)
 
     def exception(self, msg, *args, **kwargs):
-        self._logger.exception(self.sanitize(msg), *args, **kwargs)
+        self._logger.exception(msg, *args, stacklevel=2, **kwargs)
 
     def debug(self, msg, *args, **kwargs):
-        self._logger.debug(self.sanitize(msg), *args, **kwargs)
+        self._logger.debug(msg, *args, stacklevel=2, **kwargs)
 
     def critical(self, msg, *args, **kwargs):
-        self._logger.critical(self.sanitize(msg), *args, **kwargs)
+        self._logger.critical(msg, *args, stacklevel=2, **kwargs)
@@ -0,0 +1,404 @@
+# src/utils/metrics.py
+
+"""
+In-process latency/token/error metrics and per-run traces.
+
+Nodes (via `log_node`) and LLM calls (via `OpenAIService`) are timed with
+`span(kind, name)`. Each span:
+
+  * feeds rolling histograms in the process-wide `registry`, labelled by node
+    name or LLM call context, exportable as Prometheus text;
+  * is appended to the active `RunTrace` (see `run_trace`), which is written as
+    one JSON file per workflow run with a per-node breakdown of the critical path;
+    only the newest TRACE_MAX_FILES traces are kept.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+DEFAULT_METRICS_FILE = os.path.join(os.path.dirname(__file__), "../../.cache/metrics.prom")
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(__file__), "../../.cache/traces")
+METRICS_FILE = os.getenv("DEVPILOT_METRICS_FILE", DEFAULT_METRICS_FILE)
+TRACE_DIR = os.getenv("DEVPILOT_TRACE_DIR", DEFAULT_TRACE_DIR)
+# Newest run traces kept in TRACE_DIR; older ones are deleted (0 keeps all).
+TRACE_MAX_FILES = int(os.getenv("DEVPILOT_TRACE_MAX_FILES", "500"))
+# Percentiles are computed over the most recent samples of each series.
+HISTOGRAM_WINDOW = int(os.getenv("DEVPILOT_METRICS_WINDOW", "2048"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Label used for a span's name in metric series, per span kind.
+SPAN_LABELS = {"node": "node", "llm": "context", "stage": "stage"}
+
+_current_trace: contextvars.ContextVar[Optional["RunTrace"]] = contextvars.ContextVar("devpilot_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("devpilot_span", default=None)
+_rollup_lock = threading.Lock()
+
+
+class Histogram:
+    """Count and sum over all samples plus a rolling window for percentiles."""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples: deque = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def quantiles(self) -> dict[float, float]:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+    def snapshot(self) -> dict:
+        snapshot = {"count": self.count, "sum": round(self.total, 6), "max": round(self.max, 6)}
+        for q, value in self.quantiles().items():
+            snapshot[f"p{int(q * 100)}"] = round(value, 6)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Thread-safe collection of labelled histograms, counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, float] = {}
+        self._gauges: dict[tuple, float] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def adjust_gauge(self, name: str, amount: float, **labels) -> float:
+        """Adds `amount` (may be negative) to a gauge and returns its new value."""
+        key = self._key(name, labels)
+        with self._lock:
+            value = self._gauges[key] = self._gauges.get(key, 0) + amount
+            return value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def snapshot(self) -> dict:
+        """Returns {"histograms": [...], "counters": [...], "gauges": [...]} with labels and values."""
+        with self._lock:
+            return {
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+            }
+
+    def to_prometheus(self) -> str:
+        """Renders every series in the Prometheus text exposition format (histograms as summaries)."""
+        lines = []
+        typed = set()
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} summary")
+                    typed.add(name)
+                for q, value in histogram.quantiles().items():
+                    lines.append(f"{name}{_format_labels(labels + (('quantile', str(q)),))} {value:.6g}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value:.6g}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value:.6g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = METRICS_FILE) -> None:
+        """Atomically writes the Prometheus text file (e.g. for node_exporter's textfile collector)."""
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Runs finishing at the same time each write their own temporary file.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = MetricsRegistry()
+
+
+class RunTrace:
+    """Spans recorded during one workflow run, serialisable as a JSON trace."""
+
+    def __init__(self, name: str, **attrs):
+        self.run_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: list[dict] = []
+        self.status = "ok"
+        self.duration_ms = 0.0
+        self.last_step_end: Optional[float] = None
+
+    def offset_ms(self, timestamp: float) -> float:
+        return round((timestamp - self._start) * 1000, 3)
+
+    def add(self, span_record: dict) -> None:
+        with self._lock:
+            self.spans.append(span_record)
+
+    def finish(self, status: str = "ok") -> None:
+        self.status = status
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        # Top-level spans (graph nodes, batch stages) run one after another, so
+        # together they are the run's critical path.
+        steps = [s for s in spans if s["parent"] is None]
+
+        critical_path = []
+        for step in steps:
+            llm_calls = [s for s in spans if s["kind"] == "llm" and s["parent"] == step["id"]]
+            critical_path.append({
+                "step": step["name"],
+                "kind": step["kind"],
+                "duration_ms": step["duration_ms"],
+                "queue_ms": step["attrs"].get("queue_ms", 0.0),
+                "llm_calls": len(llm_calls),
+                "llm_ms_max": max((s["duration_ms"] for s in llm_calls), default=0.0),
+                "prompt_tokens": step["attrs"].get("prompt_tokens", 0),
+                "completion_tokens": step["attrs"].get("completion_tokens", 0),
+                "share": round(step["duration_ms"] / self.duration_ms, 4) if self.duration_ms else 0.0,
+            })
+
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "critical_path": critical_path,
+            "slowest_step": max(critical_path, key=lambda n: n["duration_ms"])["step"] if critical_path else None,
+            "spans": spans,
+        }
+
+    def write(self, directory: str = TRACE_DIR) -> Optional[str]:
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(self.started_at))}-{self.name}-{self.run_id[:8]}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        prune_traces(directory)
+        return path
+
+
+def prune_traces(directory: str = TRACE_DIR, max_files: int = TRACE_MAX_FILES) -> int:
+    """Deletes the oldest run traces beyond `max_files`; returns how many were deleted."""
+    if not directory or max_files <= 0:
+        return 0
+    with os.scandir(directory) as entries:
+        traces = [(entry.stat().st_mtime, entry.path) for entry in entries
+                  if entry.is_file() and entry.name.endswith(".json")]
+    excess = len(traces) - max_files
+    if excess <= 0:
+        return 0
+    deleted = 0
+    for _, path in sorted(traces)[:excess]:
+        try:
+            os.remove(path)
+            deleted += 1
+        except FileNotFoundError:
+            pass  # Pruned by a run finishing at the same time.
+    return deleted
+
+
+def current_trace() -> Optional[RunTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def run_trace(name: str, **attrs) -> Iterator[RunTrace]:
+    """
+    Collects the spans of one workflow run. On exit the JSON trace is written to
+    TRACE_DIR and the Prometheus file is refreshed. Nested calls reuse the outer trace.
+    """
+    existing = _current_trace.get()
+    if existing is not None:
+        yield existing
+        return
+
+    trace = RunTrace(name, **attrs)
+    token = _current_trace.set(trace)
+    status = "ok"
+    try:
+        yield trace
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace.finish(status)
+        registry.observe("devpilot_run_duration_seconds", trace.duration_ms / 1000, run=name)
+        try:
+            path = trace.write()
+            registry.write_prometheus()
+            if path:
+                logger.info(f"Run trace written to {path} ({trace.duration_ms:.0f} ms).")
+        except OSError as e:
+            logger.warning(f"Could not write metrics for run {trace.run_id}: {e}")
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs) -> Iterator[dict]:
+    """
+    Times a graph node ("node"), batch stage ("stage") or LLM call ("llm") and
+    records it in the registry and the active trace. The yielded dict collects attributes; numeric ones named
+    `*_tokens`, `retries` and `queue_ms` also become metric series. Token counts
+    roll up into the enclosing span.
+    """
+    parent = _current_span.get()
+    record = _new_span(kind, name, parent, attrs)
+    started = time.perf_counter()
+    if parent is None:
+        trace = _current_trace.get()
+        if trace is not None:
+            since = trace.last_step_end if trace.last_step_end is not None else trace._start
+            record["attrs"]["queue_ms"] = round((started - since) * 1000, 3)
+
+    token = _current_span.set(record)
+    status = "ok"
+    try:
+        yield record["attrs"]
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish_span(record, parent, started, status)
+
+
+def record_span(kind: str, name: str, started: float, status: str = "ok", **attrs) -> None:
+    """
+    Records a span that began at `started` (a `time.perf_counter()` value) and
+    ends now. For code that cannot hold a `span` open, such as generators.
+    """
+    parent = _current_span.get()
+    _finish_span(_new_span(kind, name, parent, attrs), parent, started, status)
+
+
+def _new_span(kind: str, name: str, parent: Optional[dict], attrs: dict) -> dict:
+    return {
+        "id": uuid.uuid4().hex[:12],
+        "name": name,
+        "kind": kind,
+        "parent": parent["id"] if parent else None,
+        "thread": threading.current_thread().name,
+        "attrs": dict(attrs),
+    }
+
+
+def _finish_span(record: dict, parent: Optional[dict], started: float, status: str) -> None:
+    ended = time.perf_counter()
+    record["status"] = status
+    record["duration_ms"] = round((ended - started) * 1000, 3)
+    _record_span_metrics(record["kind"], record["name"], record, parent)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        record["start_ms"] = trace.offset_ms(started)
+        trace.add(record)
+        if parent is None:
+            trace.last_step_end = ended
+
+
+def _record_span_metrics(kind: str, name: str, record: dict, parent: Optional[dict]) -> None:
+    labels = {SPAN_LABELS.get(kind, "name"): name}
+    attrs = record["attrs"]
+    registry.observe(f"devpilot_{kind}_duration_seconds", record["duration_ms"] / 1000, **labels)
+    registry.increment(f"devpilot_{kind}_calls_total", **labels)
+    if record["status"] != "ok" or attrs.get("failed_calls"):
+        # Nodes catch their own exceptions, so a node also counts as failed when
+        # one of its LLM calls did.
+        registry.increment(f"devpilot_{kind}_errors_total", **labels)
+        if parent is not None:
+            with _rollup_lock:
+                parent["attrs"]["failed_calls"] = parent["attrs"].get("failed_calls", 0) + 1
+    if attrs.get("queue_ms") is not None:
+        registry.observe(f"devpilot_{kind}_queue_seconds", attrs["queue_ms"] / 1000, **labels)
+    if attrs.get("retries"):
+        registry.increment(f"devpilot_{kind}_retries_total", attrs["retries"], **labels)
+    if attrs.get("cached"):
+        registry.increment(f"devpilot_{kind}_cache_hits_total", **labels)
+    if attrs.get("coalesced"):
+        registry.increment(f"devpilot_{kind}_coalesced_total", **labels)
+
+    for key, value in attrs.items():
+        if key.endswith("_tokens") and isinstance(value, (int, float)):
+            registry.observe(f"devpilot_{kind}_{key}", value, **labels)
+            if parent is not None:
+                with _rollup_lock:
+                    parent["attrs"][key] = parent["attrs"].get(key, 0) + value
@@ -0,0 +1,164 @@
+# src/utils/stream_parser.py
+
+import bisect
+import json
+from typing import Any, List, Optional, Tuple, Union
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+_WHITESPACE = " \t\r\n"
+# Same leniency as extract_json: raw control characters inside strings are accepted.
+_DECODER = json.JSONDecoder(strict=False)
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "key", "expect_key", "index", "value_start", "scalar_open")
+
+    def __init__(self, kind: str, path: tuple):
+        self.kind = kind            # "{" or "["
+        self.path = path            # member names leading here (None marks an array element)
+        self.key = None             # last member name seen (objects only)
+        self.expect_key = kind == "{"
+        self.index = 0              # next element index (arrays only)
+        self.value_start = None     # buffer offset where the current child value began
+        self.scalar_open = False    # a number/literal child value is being read
+
+
+class IncrementalJsonExtractor:
+    """
+    Incrementally scans a JSON document as it streams in and surfaces every
+    completed child of the container found at `path`.
+
+    Examples:
+        ("user_stories",) -> each finished element of the "user_stories" array
+        ("files",)        -> each finished {filename: content} member of "files"
+        ()                -> each finished top-level member (e.g. "functional_doc")
+
+    Leading text before the first "{" or "[" (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self, path: Tuple[str, ...] = ()):
+        self.path = tuple(path)
+        # Streamed text is kept as chunks (with their start offsets) so feeding
+        # never copies the whole buffer; completed values are sliced out of them.
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._frames: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+            self._offsets = [0]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> List[Tuple[Union[str, int], Any]]:
+        """
+        Appends a chunk of streamed text and returns children completed by it.
+
+        Returns:
+            list: (key, value) pairs; key is the member name for objects and the
+            element index for arrays.
+        """
+        if not chunk or self.done:
+            return []
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        completed: List[Tuple[Union[str, int], Any]] = []
+
+        for offset, c in enumerate(chunk):
+            i = base + offset
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(i, completed)
+                continue
+
+            if not self._frames:
+                if c in "{[":
+                    self._frames.append(_Frame(c, ()))
+                continue
+
+            frame = self._frames[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = frame.kind == "{" and frame.expect_key
+                if not self._string_is_key:
+                    frame.value_start = i
+            elif c in "{[":
+                frame.value_start = i
+                child_path = frame.path + ((frame.key,) if frame.kind == "{" else (None,))
+                self._frames.append(_Frame(c, child_path))
+            elif c in "}]":
+                self._close_scalar(frame, i, completed)
+                self._frames.pop()
+                if not self._frames:
+                    self.done = True
+                    return completed
+                self._end_value(self._frames[-1], i + 1, completed)
+            elif c == ":":
+                frame.expect_key = False
+            elif c == ",":
+                self._close_scalar(frame, i, completed)
+                if frame.kind == "{":
+                    frame.expect_key = True
+            elif c not in _WHITESPACE and not frame.scalar_open:
+                frame.value_start = i
+                frame.scalar_open = True
+
+        return completed
+
+    def _end_string(self, end: int, completed: list) -> None:
+        frame = self._frames[-1] if self._frames else None
+        if frame is None:
+            return
+        if self._string_is_key:
+            try:
+                frame.key = _DECODER.decode(self._slice(self._string_start, end + 1))
+            except json.JSONDecodeError:
+                frame.key = None
+            return
+        self._end_value(frame, end + 1, completed)
+
+    def _close_scalar(self, frame: _Frame, end: int, completed: list) -> None:
+        if frame.scalar_open:
+            frame.scalar_open = False
+            self._end_value(frame, end, completed)
+
+    def _end_value(self, frame: _Frame, end: int, completed: list) -> None:
+        start, frame.value_start = frame.value_start, None
+        key: Optional[Union[str, int]] = frame.key
+        if frame.kind == "[":
+            key = frame.index
+            frame.index += 1
+
+        if frame.path != self.path or start is None:
+            return
+        try:
+            completed.append((key, _DECODER.decode(self._slice(start, end))))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed element {key!r}: {e}")
+
+    def _slice(self, start: int, end: int) -> str:
+        first = bisect.bisect_right(self._offsets, start) - 1
+        last = bisect.bisect_left(self._offsets, end)
+        joined = "".join(self._chunks[first:last])
+        base = self._offsets[first]
+        return joined[start - base:end - base]
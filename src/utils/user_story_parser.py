@@ -1,10 +1,8 @@
-import json
-import re
-
 from typing import List, Union
 from pydantic import ValidationError
 
 from src.state.workflow_state import UserStoryModel
+from src.utils.json_extract import extract_json
 from src.utils.logger import Logger
 
 logger = Logger(__name__)
@@ -13,29 +11,40 @@ def parse_user_stories_from_llm_response(raw_response: Union[str, dict]) -> List
     """
     Parses LLM response into a list of validated user stories.
 
+    A response cut off mid-story still yields every story that was finished;
+    stories that fail validation are skipped individually.
+
     Args:
         raw_response (str | dict): JSON string, dict, or markdown response from LLM.
 
     Returns:
         List[UserStoryModel]: Validated list of user stories.
     """
-    try:
-        if isinstance(raw_response, str):
-            json_block = re.search(r"```json(.*?)```", raw_response, re.DOTALL)
-            clean = json_block.group(1).strip() if json_block else raw_response.strip()
-            parsed = json.loads(clean)
-        elif isinstance(raw_response, dict):
-            parsed = raw_response
-        else:
-            raise ValueError("Unsupported response type from LLM.")
-
-        stories = parsed.get("user_stories", [])
-        if isinstance(stories, dict):
-            stories = [stories]
-
-        validated = [UserStoryModel(**story) for story in stories]
-        return validated
-
-    except (json.JSONDecodeError, ValidationError, TypeError) as e:
-        logger.error(f"Failed to parse LLM response: {e}")
+    if not isinstance(raw_response, (str, dict)):
+        logger.error("Failed to parse LLM response: Unsupported response type from LLM.")
+        return []
+
+    result = extract_json(raw_response)
+    if result.data is None:
+        logger.error(f"Failed to parse LLM response: {result.error}")
         return []
+
+    parsed = result.data
+    stories = parsed.get("user_stories", []) if isinstance(parsed, dict) else parsed
+    if isinstance(stories, dict):
+        stories = [stories]
+    if not isinstance(stories, list):
+        logger.error(f"Failed to parse LLM response: unexpected user_stories type {type(stories).__name__}.")
+        return []
+
+    lost = result.lost_under("user_stories") if isinstance(parsed, dict) else result.lost_under()
+    if lost is not None:
+        logger.warning(f"User story response was cut off in story {lost[-1]}; {len(stories)} finished stories kept.")
+
+    validated = []
+    for idx, story in enumerate(stories):
+        try:
+            validated.append(UserStoryModel(**story))
+        except (ValidationError, TypeError) as e:
+            logger.error(f"Skipping invalid user story {idx}: {e}")
+    return validated
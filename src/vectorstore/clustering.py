@@ -0,0 +1,70 @@
+# src/vectorstore/clustering.py
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.vectorstore.hashing_vectorizer import HashingVectorizer
+
+KMEANS_ITERATIONS = 8
+
+
+def cluster_texts(texts: Sequence[str], max_cluster_size: int,
+                  vectorizer: Optional[HashingVectorizer] = None) -> list[list[int]]:
+    """
+    Groups similar texts into clusters of at most `max_cluster_size` items.
+
+    Texts are embedded with the hashing vectorizer and grouped by a
+    capacity-bounded k-means over cosine similarity, with k = ceil(n / max size).
+    Seeding is farthest-point from the first text, so the result is deterministic.
+
+    Returns:
+        list: Clusters as lists of text indices, ascending, ordered by their first index.
+    """
+    n = len(texts)
+    max_cluster_size = max(1, max_cluster_size)
+    if n <= max_cluster_size:
+        return [list(range(n))] if n else []
+
+    vectors = (vectorizer or HashingVectorizer()).transform(texts)
+    k = math.ceil(n / max_cluster_size)
+    centroids = vectors[_farthest_point_seeds(vectors, k)]
+
+    assignment = None
+    for _ in range(KMEANS_ITERATIONS):
+        updated = _assign(vectors @ centroids.T, max_cluster_size)
+        if assignment is not None and np.array_equal(updated, assignment):
+            break
+        assignment = updated
+        for c in range(k):
+            members = vectors[assignment == c]
+            centroid = members.mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            centroids[c] = centroid / norm if norm > 0 else centroid
+
+    clusters = [sorted(np.flatnonzero(assignment == c).tolist()) for c in range(k)]
+    return sorted((cluster for cluster in clusters if cluster), key=lambda cluster: cluster[0])
+
+
+def _farthest_point_seeds(vectors: np.ndarray, k: int) -> list[int]:
+    seeds = [0]
+    closest = vectors @ vectors[0]
+    for _ in range(1, k):
+        candidate = int(np.argmin(closest))
+        seeds.append(candidate)
+        closest = np.maximum(closest, vectors @ vectors[candidate])
+    return seeds
+
+
+def _assign(similarity: np.ndarray, capacity: int) -> np.ndarray:
+    # Most similar (text, centroid) pairs first; a full cluster takes no more texts.
+    n, k = similarity.shape
+    assignment = np.full(n, -1)
+    sizes = np.zeros(k, dtype=int)
+    for flat in np.argsort(-similarity, axis=None, kind="stable"):
+        i, c = divmod(int(flat), k)
+        if assignment[i] == -1 and sizes[c] < capacity:
+            assignment[i] = c
+            sizes[c] += 1
+    return assignment
@@ -0,0 +1,45 @@
+# src/vectorstore/hashing_vectorizer.py
+
+import hashlib
+import re
+from typing import Iterable
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingVectorizer:
+    """
+    Stateless text embedder: word unigrams and bigrams are hashed into a fixed
+    number of signed buckets and the result is L2-normalised.
+
+    No vocabulary or model is needed, so documents can be embedded offline and
+    appended to an index one at a time. Hashes come from BLAKE2b, so vectors are
+    stable across processes (unlike Python's salted `hash`).
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def features(self, text: str) -> list[str]:
+        tokens = _TOKEN_PATTERN.findall((text or "").lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def transform_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self.features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dim] += sign
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def transform(self, texts: Iterable[str]) -> np.ndarray:
+        rows = [self.transform_one(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(rows)
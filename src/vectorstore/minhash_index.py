@@ -0,0 +1,206 @@
+# src/vectorstore/minhash_index.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Bumped whenever signatures change; older databases are re-signed on open.
+_SIGNATURE_VERSION = 1
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class MinHashLSHIndex:
+    """
+    Near-duplicate text index: MinHash signatures over word shingles, bucketed
+    with LSH banding and persisted in SQLite.
+
+    With `bands` bands of `num_perm / bands` rows each, two texts whose Jaccard
+    similarity is s share at least one bucket with probability 1 - (1 - s^r)^b,
+    so near-duplicates are found without comparing against every stored entry.
+    Candidates are then ranked by their estimated Jaccard similarity.
+
+    Each permutation is h(x) = (a·x + b) mod p with p = 2^61 - 1 and 32-bit
+    shingle hashes x. a and b are drawn below 2^32, so a·x + b stays below 2^64
+    and the uint64 arithmetic never wraps.
+
+    Entries are unique by text: adding a stored text again replaces its payload.
+    """
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 32, shingle_size: int = 3,
+                 seed: int = 1, latency_window: int = 1000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.path = os.path.abspath(path)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._latencies_ms: deque = deque(maxlen=latency_window)
+        self.lookups = 0
+        self.hits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " text TEXT NOT NULL,"
+                " signature BLOB NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, entry_id INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets(bucket)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_text ON entries(text)")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SIGNATURE_VERSION:
+                self._resign(conn)
+            self._conn = conn
+        return self._conn
+
+    def _resign(self, conn: sqlite3.Connection) -> None:
+        """Recomputes every signature and bucket with the current hash functions, keeping the newest entry per text."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE id NOT IN (SELECT MAX(id) FROM entries GROUP BY text)")
+            conn.execute("DELETE FROM buckets")
+            entries = conn.execute("SELECT id, text FROM entries").fetchall()
+            for entry_id, text in entries:
+                signature = self.signature(text)
+                conn.execute("UPDATE entries SET signature = ? WHERE id = ?", (signature.tobytes(), entry_id))
+                conn.executemany(
+                    "INSERT INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                    [(key, entry_id) for key in self._bucket_keys(signature)],
+                )
+            conn.execute(f"PRAGMA user_version = {_SIGNATURE_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if entries:
+            logger.info(f"Re-signed {len(entries)} near-duplicate index entries.")
+
+    def shingles(self, text: str) -> set[str]:
+        tokens = _TOKEN_PATTERN.findall((text or "").lower())
+        if len(tokens) < self.shingle_size:
+            return {" ".join(tokens)} if tokens else set()
+        return {" ".join(tokens[i:i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """Returns the MinHash signature (num_perm uint64 values) of `text`."""
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in self.shingles(text)],
+            dtype=np.uint64,
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _bucket_keys(self, signature: np.ndarray) -> list[int]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(band.to_bytes(2, "little") + chunk, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    def add(self, text: str, payload: dict) -> int:
+        """Stores `text` with `payload` (replacing the payload if `text` is stored) and returns its entry id."""
+        signature = self.signature(text)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = conn.execute("SELECT id FROM entries WHERE text = ?", (text,)).fetchone()
+                if existing is not None:
+                    conn.execute(
+                        "UPDATE entries SET payload = ?, created_at = ? WHERE id = ?",
+                        (json.dumps(payload, ensure_ascii=False), time.time(), existing[0]),
+                    )
+                    conn.execute("COMMIT")
+                    return existing[0]
+                cursor = conn.execute(
+                    "INSERT INTO entries (text, signature, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (text, signature.tobytes(), json.dumps(payload, ensure_ascii=False), time.time()),
+                )
+                entry_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                    [(key, entry_id) for key in self._bucket_keys(signature)],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return entry_id
+
+    def query(self, text: str, threshold: float) -> Optional[dict]:
+        """
+        Returns the most similar stored entry whose estimated Jaccard similarity is
+        at least `threshold`, as {"id", "text", "similarity", "payload"}, or None.
+        """
+        started = time.perf_counter()
+        signature = self.signature(text)
+        keys = self._bucket_keys(signature)
+
+        best = None
+        with self._lock:
+            conn = self._connect()
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                "SELECT id, text, signature, payload FROM entries WHERE id IN "
+                f"(SELECT DISTINCT entry_id FROM buckets WHERE bucket IN ({placeholders}))",
+                keys,
+            ).fetchall()
+
+            for entry_id, entry_text, blob, payload in rows:
+                similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint64) == signature))
+                if similarity >= threshold and (best is None or similarity > best["similarity"]):
+                    best = {"id": entry_id, "text": entry_text, "similarity": similarity, "payload": payload}
+
+            self.lookups += 1
+            if best is not None:
+                self.hits += 1
+                best["payload"] = json.loads(best["payload"])
+            self._latencies_ms.append((time.perf_counter() - started) * 1000)
+        return best
+
+    def stats(self) -> dict:
+        """Returns lookup counters and latency percentiles (ms) over recent lookups."""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            entries = self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        stats = {"entries": entries, "lookups": self.lookups, "hits": self.hits}
+        if latencies:
+            stats.update({
+                "latency_ms_mean": round(statistics.fmean(latencies), 3),
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 3),
+                "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            })
+        return stats
@@ -0,0 +1,67 @@
+# src/vectorstore/requirement_dedup.py
+
+import os
+import threading
+from typing import Optional
+
+from src.vectorstore.minhash_index import MinHashLSHIndex
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), "../../.cache/requirement_minhash.sqlite3")
+# Minimum estimated Jaccard similarity (over word 3-grams) for a requirement to
+# count as a rewording of an approved one. Set DEVPILOT_DEDUP_THRESHOLD above 1 to disable.
+DEDUP_THRESHOLD = float(os.getenv("DEVPILOT_DEDUP_THRESHOLD", "0.8"))
+
+_index: Optional[MinHashLSHIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_requirement_index() -> MinHashLSHIndex:
+    """Returns the process-wide near-duplicate index of approved requirements."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MinHashLSHIndex(os.getenv("DEVPILOT_DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH))
+    return _index
+
+
+def find_near_duplicate(requirement: str, threshold: float = DEDUP_THRESHOLD) -> Optional[dict]:
+    """
+    Looks up an approved requirement that is a near-duplicate of `requirement`.
+
+    Returns:
+        dict | None: {"requirement", "similarity", "user_stories"} of the best match.
+    """
+    if not requirement or threshold > 1:
+        return None
+    try:
+        index = get_requirement_index()
+        match = index.query(requirement, threshold)
+        stats = index.stats()
+        logger.info(
+            f"Near-duplicate lookup: {'hit' if match else 'miss'} "
+            f"(p50 {stats.get('latency_ms_p50', 0)} ms, p95 {stats.get('latency_ms_p95', 0)} ms)."
+        )
+        if match is None:
+            return None
+        return {
+            "requirement": match["text"],
+            "similarity": round(match["similarity"], 3),
+            "user_stories": match["payload"].get("user_stories", []),
+        }
+    except Exception as e:
+        logger.error(f"Near-duplicate lookup failed: {e}")
+        return None
+
+
+def record_approved_requirement(requirement: str, user_stories: list[dict]) -> None:
+    """Stores an approved requirement and its user stories for later reuse; re-approving replaces the stories."""
+    if not requirement or not user_stories:
+        return
+    try:
+        get_requirement_index().add(requirement, {"user_stories": user_stories})
+    except Exception as e:
+        logger.error(f"Failed to record approved requirement: {e}")
@@ -0,0 +1,77 @@
+# src/vectorstore/retrieval.py
+
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+from src.vectorstore.hashing_vectorizer import HashingVectorizer
+from src.vectorstore.vector_index import LocalVectorIndex
+from src.utils.logger import Logger
+
+logger = Logger(__name__)
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(__file__), "../../.cache/vectorstore")
+FEW_SHOT_K = int(os.getenv("DEVPILOT_FEW_SHOT_K", "2"))
+MIN_EXAMPLE_SIMILARITY = float(os.getenv("DEVPILOT_FEW_SHOT_MIN_SIMILARITY", "0.3"))
+
+_index: Optional[LocalVectorIndex] = None
+_vectorizer: Optional[HashingVectorizer] = None
+_index_lock = threading.Lock()
+
+
+def get_default_index() -> tuple[LocalVectorIndex, HashingVectorizer]:
+    """Returns the process-wide index of approved artifacts and its vectorizer."""
+    global _index, _vectorizer
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LocalVectorIndex(os.getenv("DEVPILOT_VECTORSTORE_DIR", DEFAULT_INDEX_DIR))
+                _vectorizer = HashingVectorizer(dim=_index.dim)
+    return _index, _vectorizer
+
+
+def record_approved_artifact(kind: str, text: str, payload: dict) -> None:
+    """
+    Indexes an approved artifact so later prompts can use it as an example.
+    Approving the same artifact again replaces its entry (or leaves it alone
+    when nothing changed), so retrieval never returns duplicates.
+
+    Args:
+        kind (str): "requirement", "user_stories", "design_doc" or "code".
+        text (str): Text the artifact is retrieved by (usually the requirement).
+        payload (dict): Data returned with search results.
+    """
+    if not text:
+        return
+    try:
+        index, vectorizer = get_default_index()
+        key = hashlib.blake2b(f"{kind}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+        index.append(vectorizer.transform([text]), [{"kind": kind, "text": text, **payload, "key": key}])
+        logger.info(f"Indexed approved {kind} ({len(index)} entries).")
+    except Exception as e:
+        logger.error(f"Failed to index approved {kind}: {e}")
+
+
+def find_similar_examples(kind: str, text: str, k: int = FEW_SHOT_K,
+                          min_similarity: float = MIN_EXAMPLE_SIMILARITY) -> list[dict]:
+    """
+    Returns payloads of the `k` most similar approved artifacts of `kind`.
+    Lookup failures are logged and yield no examples.
+    """
+    if k <= 0 or not text:
+        return []
+    try:
+        index, vectorizer = get_default_index()
+        if not len(index):
+            return []
+        started = time.perf_counter()
+        results = index.search(vectorizer.transform_one(text), k=k, kind=kind)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        examples = [meta for score, meta in results if score >= min_similarity and meta.get("text") != text]
+        logger.info(f"Found {len(examples)} similar {kind} examples in {elapsed_ms:.1f} ms.")
+        return examples
+    except Exception as e:
+        logger.error(f"Similar {kind} lookup failed: {e}")
+        return []
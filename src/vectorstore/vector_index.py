@@ -0,0 +1,309 @@
+# src/vectorstore/vector_index.py
+
+import json
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from src.utils.logger import Logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialised within one process.
+    fcntl = None
+
+logger = Logger(__name__)
+
+
+class LocalVectorIndex:
+    """
+    Append-only vector index stored in a directory:
+
+        index.json      header (dim, count, capacity, LSH settings, kind names)
+        vectors.f32     memory-mapped float32 matrix of L2-normalised rows
+        metadata.jsonl  one JSON object per row (must contain "kind")
+        index.lock      held while appending, so several processes can write
+
+    Small indexes are searched exactly with one matrix-vector product. Once the
+    index holds `ann_min_size` rows, searches use random-projection LSH buckets
+    (signed hyperplanes) in `n_tables` independent tables, probing every bucket
+    within Hamming distance 1 of the query's code in each, so only a small
+    fraction of rows is scored.
+
+    A row whose metadata has a "key" supersedes earlier rows with the same key;
+    superseded rows stay on disk but are never returned by `search`. Rows
+    appended by other processes are picked up before each append and search.
+    """
+
+    HEADER_FILE = "index.json"
+    VECTORS_FILE = "vectors.f32"
+    METADATA_FILE = "metadata.jsonl"
+    LOCK_FILE = "index.lock"
+
+    def __init__(self, directory: str, dim: int = 512, n_bits: int = 12, n_tables: int = 4, seed: int = 0,
+                 ann_min_size: int = 5000):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.RLock()
+
+        header = self._read_header()
+        self.dim = header.get("dim", dim)
+        self.n_bits = header.get("n_bits", n_bits)
+        self.n_tables = header.get("n_tables", n_tables)
+        self.seed = header.get("seed", seed)
+        self.capacity = 0  # Taken from the size of the vectors file when it is mapped.
+        self.kinds: list[str] = header.get("kinds", [])
+        self.ann_min_size = ann_min_size
+
+        self._planes = np.random.default_rng(self.seed).standard_normal(
+            (self.dim, self.n_tables * self.n_bits)
+        ).astype(np.float32)
+        self._bit_weights = (1 << np.arange(self.n_bits)).astype(np.int64)
+
+        self.count = 0
+        self._offsets: list[int] = []
+        self._kind_ids = np.zeros(0, dtype=np.int16)
+        self._live = np.zeros(0, dtype=bool)
+        self._keys: dict[str, int] = {}
+        self._metadata_size = 0
+        self._matrix: Optional[np.memmap] = None
+        self._buckets: dict[int, list[int]] = defaultdict(list)
+        self._refresh()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_header(self) -> dict:
+        try:
+            with open(self._path(self.HEADER_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_header(self) -> None:
+        header = {
+            "dim": self.dim,
+            "n_bits": self.n_bits,
+            "n_tables": self.n_tables,
+            "seed": self.seed,
+            "capacity": self.capacity,
+            "count": self.count,
+            "kinds": self.kinds,
+        }
+        tmp = self._path(self.HEADER_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp, self._path(self.HEADER_FILE))
+
+    def _refresh(self) -> None:
+        """Loads rows appended (by this or another process) since the last refresh."""
+        path = self._path(self.METADATA_FILE)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return
+        if size == self._metadata_size:
+            return
+
+        vectors_path = self._path(self.VECTORS_FILE)
+        capacity = os.path.getsize(vectors_path) // (self.dim * 4) if os.path.exists(vectors_path) else 0
+        if capacity > self.capacity or (capacity and self._matrix is None):
+            self._map(capacity)
+
+        # Vectors are flushed before their metadata rows are written, so every
+        # complete metadata row within the capacity has a vector behind it.
+        start = self.count
+        offset = self._metadata_size
+        rows = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n") or start + len(rows) >= self.capacity:
+                    break  # Partially written row from an interrupted or ongoing append.
+                rows.append((offset, json.loads(line)))
+                offset += len(line)
+        if rows:
+            self._add_rows(start, rows)
+            self._index_rows(start, start + len(rows))
+        self._metadata_size = offset
+
+    def _add_rows(self, start: int, rows: list[tuple[int, dict]]) -> None:
+        live = np.ones(len(rows), dtype=bool)
+        for i, (offset, item) in enumerate(rows):
+            self._offsets.append(offset)
+            key = item.get("key")
+            if key is not None:
+                previous = self._keys.get(key)
+                if previous is not None:
+                    if previous >= start:
+                        live[previous - start] = False
+                    else:
+                        self._live[previous] = False
+                self._keys[key] = start + i
+        kind_ids = [self._kind_id(item.get("kind", "")) for _, item in rows]
+        self._kind_ids = np.concatenate([self._kind_ids, np.array(kind_ids, dtype=np.int16)])
+        self._live = np.concatenate([self._live, live])
+        self.count = start + len(rows)
+
+    def _kind_id(self, kind: str) -> int:
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+        return self.kinds.index(kind)
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """Returns an (n, n_tables) array of bucket codes, offset so tables never collide."""
+        bits = ((vectors @ self._planes) > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        table_offsets = np.arange(self.n_tables, dtype=np.int64) << self.n_bits
+        return bits.astype(np.int64) @ self._bit_weights + table_offsets
+
+    def _index_rows(self, start: int, stop: int, chunk_size: int = 65536) -> None:
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            rows = np.asarray(self._matrix[chunk_start:chunk_stop])
+            for row, codes in enumerate(self._codes(rows), start=chunk_start):
+                for code in codes:
+                    self._buckets[int(code)].append(row)
+
+    def _map(self, capacity: int) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        self._matrix = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._path(self.LOCK_FILE), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity * 2, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self._path(self.VECTORS_FILE), "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._map(new_capacity)
+
+    def append(self, vectors: np.ndarray, metadata: list[dict]) -> list[int]:
+        """
+        Appends L2-normalised vectors with one metadata dict each.
+
+        An entry whose metadata has a "key" replaces the current row with that
+        key, or is skipped if that row's metadata is identical.
+
+        Returns:
+            list: Row id of each entry (the existing row for a skipped duplicate).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(vectors) != len(metadata):
+            raise ValueError("Each vector needs exactly one metadata entry.")
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            start = self.count
+            lines = [(json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8") for item in metadata]
+            rows, new = [], []
+            for i, item in enumerate(metadata):
+                existing = self._keys.get(item["key"]) if "key" in item else None
+                if existing is not None and self.get_metadata(existing) == json.loads(lines[i]):
+                    rows.append(existing)
+                    continue
+                rows.append(start + len(new))
+                new.append(i)
+            if not new:
+                return rows
+
+            added = vectors[new]
+            self._ensure_capacity(start + len(added))
+            self._matrix[start:start + len(added)] = added
+            self._matrix.flush()
+
+            # Anything past the last complete row is left over from an interrupted append.
+            offset = self._metadata_size
+            with open(self._path(self.METADATA_FILE), "ab") as f:
+                f.truncate(offset)
+                f.write(b"".join(lines[i] for i in new))
+            new_rows = []
+            for i in new:
+                new_rows.append((offset, metadata[i]))
+                offset += len(lines[i])
+            self._add_rows(start, new_rows)
+            self._index_rows(start, self.count)
+            self._metadata_size = offset
+
+            self._write_header()
+            return rows
+
+    def get_metadata(self, row: int) -> dict:
+        with open(self._path(self.METADATA_FILE), "rb") as f:
+            f.seek(self._offsets[row])
+            return json.loads(f.readline())
+
+    def search(self, query: np.ndarray, k: int = 5, kind: Optional[str] = None,
+               approximate: Optional[bool] = None) -> list[tuple[float, dict]]:
+        """
+        Returns up to `k` (cosine similarity, metadata) pairs, best first.
+
+        Args:
+            query (np.ndarray): L2-normalised query vector.
+            k (int): Number of results.
+            kind (str, optional): Only return entries with this "kind".
+            approximate (bool, optional): Force LSH (True) or exact (False) search;
+                by default LSH is used once the index has `ann_min_size` rows.
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            self._refresh()
+            if self.count == 0 or k <= 0:
+                return []
+            if kind is not None and kind not in self.kinds:
+                return []
+            kind_id = self.kinds.index(kind) if kind is not None else None
+
+            if approximate is None:
+                approximate = self.count >= self.ann_min_size
+
+            candidates = self._lsh_candidates(query) if approximate else None
+            if candidates is None or len(candidates) < k:
+                candidates = np.arange(self.count)
+            keep = self._live[candidates]
+            if kind_id is not None:
+                keep &= self._kind_ids[candidates] == kind_id
+            candidates = candidates[keep]
+            if len(candidates) == 0:
+                return []
+
+            if len(candidates) == self.count:
+                scores = np.asarray(self._matrix[:self.count]) @ query
+            else:
+                scores = np.asarray(self._matrix[candidates]) @ query
+
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [(float(scores[i]), self.get_metadata(int(candidates[i]))) for i in best]
+
+    def _lsh_candidates(self, query: np.ndarray) -> np.ndarray:
+        probes = []
+        for code in self._codes(query.reshape(1, -1))[0]:
+            code = int(code)
+            probes.append(code)
+            probes.extend(code ^ (1 << bit) for bit in range(self.n_bits))
+        rows = [row for probe in probes for row in self._buckets.get(probe, ())]
+        return np.unique(np.array(rows, dtype=np.int64))